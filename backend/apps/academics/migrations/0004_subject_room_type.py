@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0003_add_teacher_status_replacement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='room_type',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
@@ -85,6 +85,8 @@ class Subject(models.Model):
     code = models.CharField(max_length=20)
     short_name = models.CharField(max_length=10, blank=True)
     color = models.CharField(max_length=7, default="#3B82F6")  # Hex color for UI
+    # Room type lessons need (e.g. lab); blank means the section's own room
+    room_type = models.CharField(max_length=50, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -51,7 +51,7 @@ class SubjectSerializer(serializers.ModelSerializer):
         model = Subject
         fields = [
             "id", "branch", "branch_name", "name", "code",
-            "short_name", "color", "is_active", "created_at", "updated_at",
+            "short_name", "color", "room_type", "is_active", "created_at", "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
@@ -1,7 +1,7 @@
 import io
 
 import pandas as pd
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from openpyxl import load_workbook
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -180,7 +180,8 @@ class TeacherViewSet(TenantFilterMixin, viewsets.ModelViewSet):
         transfer_timetable_entries = data.get("transfer_timetable_entries", True)
 
         from datetime import date
-        from apps.timetable.models import TimetableEntry
+        from apps.timetable.engine import invalidate_validation
+        from apps.timetable.models import Timetable, TimetableEntry
 
         results = {
             "assignments_transferred": 0,
@@ -200,9 +201,21 @@ class TeacherViewSet(TenantFilterMixin, viewsets.ModelViewSet):
 
             # Transfer timetable entries
             if transfer_timetable_entries:
-                entries_updated = TimetableEntry.objects.filter(
-                    teacher=departing_teacher
-                ).update(teacher=replacement_teacher)
+                invalidate_validation(Timetable.objects.filter(
+                    id__in=TimetableEntry.objects.filter(teacher=departing_teacher).values("timetable_id")
+                ))
+                try:
+                    with transaction.atomic():
+                        entries_updated = TimetableEntry.objects.filter(
+                            teacher=departing_teacher
+                        ).update(teacher=replacement_teacher)
+                except IntegrityError:
+                    # The replacement already teaches in one of these periods
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"error": f"{replacement_teacher.full_name} is already teaching in some of {departing_teacher.full_name}'s periods. Resolve those clashes before transferring timetable entries."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 results["timetable_entries_transferred"] = entries_updated
 
             # Update departing teacher status
@@ -397,7 +397,8 @@ class Command(BaseCommand):
             if created:
                 self.stdout.write(f'  Created timetable: {timetable.name}')
 
-                # Create timetable entries
+                # Create timetable entries, never booking a teacher twice in a slot
+                booked = set()  # {(teacher_id, day, period_slot_id)}
                 branch_sections = [s for s in sections if s.grade.branch == branch][:10]  # First 10 sections
 
                 for section in branch_sections:
@@ -421,7 +422,15 @@ class Command(BaseCommand):
 
                     for day in days:
                         for slot in slots:
-                            assignment = random.choice(section_assignments)
+                            free = [
+                                a for a in section_assignments
+                                if a.teacher_id is None or (a.teacher_id, day, slot.id) not in booked
+                            ]
+                            if not free:
+                                continue
+                            assignment = random.choice(free)
+                            if assignment.teacher_id is not None:
+                                booked.add((assignment.teacher_id, day, slot.id))
                             TimetableEntry.objects.get_or_create(
                                 timetable=timetable,
                                 section=section,
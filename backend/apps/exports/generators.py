@@ -140,7 +140,11 @@ class ExcelExportGenerator(TimetableExportGenerator):
                 cell = sheet.cell(row=row, column=col)
                 entry = grid.get(day, {}).get(slot.period_number)
                 if entry:
-                    cell.value = f"{entry.subject.short_name or entry.subject.name}\n({entry.teacher.first_name[:1]}. {entry.teacher.last_name})"
+                    teacher_name = (
+                        f"{entry.teacher.first_name[:1]}. {entry.teacher.last_name}"
+                        if entry.teacher else "Unassigned"
+                    )
+                    cell.value = f"{entry.subject.short_name or entry.subject.name}\n({teacher_name})"
                 else:
                     cell.value = "-"
                 cell.border = self.border
@@ -315,7 +319,8 @@ class CSVExportGenerator(TimetableExportGenerator):
                 for slot in period_slots:
                     entry = grid.get(day, {}).get(slot.period_number)
                     if entry:
-                        row.append(f"{entry.subject.name} ({entry.teacher.full_name})")
+                        teacher_name = entry.teacher.full_name if entry.teacher else "Unassigned"
+                        row.append(f"{entry.subject.name} ({teacher_name})")
                     else:
                         row.append("-")
                 writer.writerow(row)
@@ -1,6 +1,16 @@
+from collections import defaultdict
+
 from django.contrib import admin
 
-from .models import Conflict, Substitution, Timetable, TimetableEntry, TimetableVersion
+from .engine import mark_slots_dirty
+from .models import (
+    Conflict,
+    GenerationJob,
+    Substitution,
+    Timetable,
+    TimetableEntry,
+    TimetableVersion,
+)
 
 
 @admin.register(Timetable)
@@ -30,6 +40,17 @@ class TimetableEntryAdmin(admin.ModelAdmin):
     list_filter = ["timetable", "day_of_week"]
     ordering = ["timetable", "day_of_week", "period_slot"]
 
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip TimetableEntry.delete(), which marks dirty slots
+        slots = defaultdict(list)
+        for timetable_id, day, period_slot_id in queryset.values_list(
+            "timetable_id", "day_of_week", "period_slot_id"
+        ):
+            slots[timetable_id].append((day, period_slot_id))
+        super().delete_queryset(request, queryset)
+        for timetable_id, timetable_slots in slots.items():
+            mark_slots_dirty(timetable_id, timetable_slots)
+
 
 @admin.register(Substitution)
 class SubstitutionAdmin(admin.ModelAdmin):
@@ -49,3 +70,13 @@ class ConflictAdmin(admin.ModelAdmin):
     ]
     list_filter = ["is_resolved", "conflict_type"]
     ordering = ["-created_at"]
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id", "branch", "status", "progress_placed",
+        "progress_total", "timetable", "created_at"
+    ]
+    list_filter = ["status", "branch"]
+    ordering = ["-created_at"]
@@ -5,3 +5,6 @@ class TimetableConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.timetable"
     verbose_name = "Timetable Management"
+
+    def ready(self):
+        import apps.timetable.signals  # noqa
@@ -0,0 +1,168 @@
+"""
+Cache of generation results keyed by a fingerprint of their inputs.
+
+Generating again with unchanged sections, assignments, slots, availability,
+working days and options returns the stored result instead of searching.
+Only complete timetables are stored; a run that leaves lessons unplaced is
+searched again next time.
+Results live in Redis when TIMETABLE_GENERATION_CACHE_URL is set and
+reachable, otherwise in the GenerationCacheEntry table. Both stores drop
+entries older than TIMETABLE_GENERATION_CACHE_TTL seconds and keep at most
+TIMETABLE_GENERATION_CACHE_MAX_ENTRIES, evicting the least recently used.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict
+from datetime import timedelta
+from typing import Optional
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from solver import GenerationResult, TimetableGenerator
+from .models import GenerationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Bump when an engine change makes stored results stale
+CACHE_VERSION = 1
+
+REDIS_KEY_PREFIX = "timetable:generation:"
+REDIS_LRU_KEY = f"{REDIS_KEY_PREFIX}lru"  # Sorted set of fingerprints scored by last use
+
+
+def generation_fingerprint(generator: TimetableGenerator, seed: Optional[int]) -> str:
+    """
+    SHA-256 over the generator's problem and every option that changes its
+    result. seed is the requested seed; None (a random seed per run)
+    matches any earlier unseeded run with the same inputs, so repeating an
+    unseeded generation returns the draw that was cached first rather than
+    a new one. Pass use_cache=False to generate_cached for a fresh draw.
+    """
+    payload = {
+        "version": CACHE_VERSION,
+        "problem": generator.problem.to_dict(),
+        "seed": seed,
+        "options": generator.option_values(),
+    }
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class DatabaseStore:
+    """Cache entries in the GenerationCacheEntry table"""
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        now = timezone.now()
+        entry = GenerationCacheEntry.objects.filter(
+            fingerprint=fingerprint,
+            created_at__gte=now - timedelta(seconds=settings.TIMETABLE_GENERATION_CACHE_TTL),
+        ).values("id", "result").first()
+        if entry is None:
+            return None
+        GenerationCacheEntry.objects.filter(id=entry["id"]).update(last_used_at=now)
+        return entry["result"]
+
+    def set(self, fingerprint: str, data: dict):
+        now = timezone.now()
+        GenerationCacheEntry.objects.filter(
+            created_at__lt=now - timedelta(seconds=settings.TIMETABLE_GENERATION_CACHE_TTL)
+        ).delete()
+        GenerationCacheEntry.objects.update_or_create(
+            fingerprint=fingerprint,
+            defaults={"result": data, "last_used_at": now},
+        )
+
+        stale = list(
+            GenerationCacheEntry.objects.order_by("-last_used_at").values_list("id", flat=True)[
+                settings.TIMETABLE_GENERATION_CACHE_MAX_ENTRIES:
+            ]
+        )
+        if stale:
+            GenerationCacheEntry.objects.filter(id__in=stale).delete()
+
+
+class RedisStore:
+    """Cache entries as Redis keys that expire by age, with an LRU index"""
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        data = self.client.get(REDIS_KEY_PREFIX + fingerprint)
+        if data is None:
+            return None
+        self.client.zadd(REDIS_LRU_KEY, {fingerprint: time.time()})
+        return json.loads(data)
+
+    def set(self, fingerprint: str, data: dict):
+        now = time.time()
+        ttl = settings.TIMETABLE_GENERATION_CACHE_TTL
+        pipe = self.client.pipeline()
+        pipe.set(REDIS_KEY_PREFIX + fingerprint, json.dumps(data), ex=ttl)
+        pipe.zadd(REDIS_LRU_KEY, {fingerprint: now})
+        # Unused for longer than the TTL means the key itself has expired
+        pipe.zremrangebyscore(REDIS_LRU_KEY, "-inf", now - ttl)
+        pipe.execute()
+
+        excess = self.client.zcard(REDIS_LRU_KEY) - settings.TIMETABLE_GENERATION_CACHE_MAX_ENTRIES
+        if excess > 0:
+            stale = [member.decode() for member in self.client.zrange(REDIS_LRU_KEY, 0, excess - 1)]
+            pipe = self.client.pipeline()
+            pipe.delete(*(REDIS_KEY_PREFIX + fingerprint for fingerprint in stale))
+            pipe.zrem(REDIS_LRU_KEY, *stale)
+            pipe.execute()
+
+
+@functools.lru_cache(maxsize=None)
+def redis_client(url: str) -> redis.Redis:
+    return redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+
+
+def cache_call(method: str, *args):
+    """Call a store method on Redis, or on the database if Redis is off or unreachable"""
+    url = settings.TIMETABLE_GENERATION_CACHE_URL
+    if url:
+        try:
+            return getattr(RedisStore(redis_client(url)), method)(*args)
+        except redis.RedisError:
+            logger.warning("Generation cache Redis unavailable, using the database")
+    return getattr(DatabaseStore(), method)(*args)
+
+
+def generate_cached(
+    generator: TimetableGenerator,
+    seed: Optional[int] = None,
+    use_cache: bool = True,
+) -> GenerationResult:
+    """
+    Run generator.generate(), or return the stored result of an earlier run
+    with the same fingerprint. statistics["cache"] records which it was.
+    Only successful results are stored, so failed or partial runs are
+    retried. use_cache=False always searches, and still stores the result.
+    """
+    if settings.TIMETABLE_GENERATION_CACHE_MAX_ENTRIES <= 0 or generator.load_problem() is None:
+        return generator.generate()
+
+    started = time.perf_counter()
+    fingerprint = generation_fingerprint(generator, seed)
+    data = cache_call("get", fingerprint) if use_cache else None
+    if data is not None:
+        result = GenerationResult(**data)
+        result.statistics["cache"] = {
+            "hit": True,
+            "fingerprint": fingerprint,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        return result
+
+    result = generator.generate()
+    if result.success and not result.errors:
+        cache_call("set", fingerprint, asdict(result))
+    result.statistics["cache"] = {"hit": False, "fingerprint": fingerprint}
+    return result
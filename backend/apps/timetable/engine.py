@@ -1,156 +1,37 @@
 """
-Timetable Generation Engine
+Django adapter for the timetable generation engine.
 
-This module implements the core timetable generation algorithm.
-It uses deterministic heuristics with backtracking to create
-conflict-free schedules.
+The search lives in the Django-free solver package and works on a Problem.
+This module loads that problem from the database for a branch/session/shift
+and validates saved timetables, keeping their conflicts up to date as
+entries change.
 """
 
-import random
-from collections import defaultdict
-from dataclasses import dataclass, field
 from typing import Optional
 
-from apps.academics.models import Assignment, DayOfWeek, PeriodSlot, PeriodTemplate, Section, Teacher
+from django.db import transaction
+from django.db.models import Count, Q
 
+from apps.academics.models import PeriodSlot
+from solver import engine
 
-@dataclass
-class SlotInfo:
-    day: int
-    period_slot_id: str
-    period_number: int
-    is_break: bool = False
+from .models import DirtySlot, Timetable, TimetableEntry
+from .problem import load_problem
 
+# (conflict type, clashing entry field, existing entry field, conflict key for it)
+VALIDATION_CHECKS = (
+    ("teacher_overlap", "teacher_id", "section_id", "existing_section"),
+    ("section_overlap", "section_id", "subject_id", "existing_subject"),
+    ("room_overlap", "room_id", "section_id", "existing_section"),
+)
 
-@dataclass
-class ScheduleEntry:
-    section_id: str
-    subject_id: str
-    teacher_id: str
-    room_id: Optional[str] = None
+# Dirty slot rows a timetable may collect before the next validation
+# rescans it in full instead
+MAX_DIRTY_SLOTS = 500
 
 
-@dataclass
-class GenerationResult:
-    success: bool
-    schedule: dict = field(default_factory=dict)
-    conflicts: list = field(default_factory=list)
-    statistics: dict = field(default_factory=dict)
-    errors: list = field(default_factory=list)
-
-
-class ConflictDetector:
-    """Detects scheduling conflicts"""
-
-    def __init__(self):
-        self.teacher_schedule = defaultdict(dict)  # {teacher_id: {(day, period): section_id}}
-        self.section_schedule = defaultdict(dict)  # {section_id: {(day, period): subject_id}}
-        self.room_schedule = defaultdict(dict)     # {room_id: {(day, period): section_id}}
-
-    def reset(self):
-        self.teacher_schedule.clear()
-        self.section_schedule.clear()
-        self.room_schedule.clear()
-
-    def check_teacher_available(self, teacher_id: str, day: int, period: int) -> bool:
-        """Check if teacher is available at given slot"""
-        return (day, period) not in self.teacher_schedule[teacher_id]
-
-    def check_section_available(self, section_id: str, day: int, period: int) -> bool:
-        """Check if section slot is available"""
-        return (day, period) not in self.section_schedule[section_id]
-
-    def check_room_available(self, room_id: str, day: int, period: int) -> bool:
-        """Check if room is available (if room allocation is enabled)"""
-        if not room_id:
-            return True
-        return (day, period) not in self.room_schedule[room_id]
-
-    def can_assign(
-        self,
-        teacher_id: str,
-        section_id: str,
-        day: int,
-        period: int,
-        room_id: Optional[str] = None
-    ) -> tuple[bool, list]:
-        """Check if assignment is valid and return conflicts if any"""
-        conflicts = []
-
-        if not self.check_teacher_available(teacher_id, day, period):
-            existing = self.teacher_schedule[teacher_id][(day, period)]
-            conflicts.append({
-                "type": "teacher_overlap",
-                "teacher_id": teacher_id,
-                "day": day,
-                "period": period,
-                "existing_section": existing,
-                "new_section": section_id,
-            })
-
-        if not self.check_section_available(section_id, day, period):
-            existing = self.section_schedule[section_id][(day, period)]
-            conflicts.append({
-                "type": "section_overlap",
-                "section_id": section_id,
-                "day": day,
-                "period": period,
-                "existing_subject": existing,
-            })
-
-        if room_id and not self.check_room_available(room_id, day, period):
-            existing = self.room_schedule[room_id][(day, period)]
-            conflicts.append({
-                "type": "room_overlap",
-                "room_id": room_id,
-                "day": day,
-                "period": period,
-                "existing_section": existing,
-            })
-
-        return len(conflicts) == 0, conflicts
-
-    def assign(
-        self,
-        teacher_id: str,
-        section_id: str,
-        subject_id: str,
-        day: int,
-        period: int,
-        room_id: Optional[str] = None
-    ):
-        """Record an assignment"""
-        self.teacher_schedule[teacher_id][(day, period)] = section_id
-        self.section_schedule[section_id][(day, period)] = subject_id
-        if room_id:
-            self.room_schedule[room_id][(day, period)] = section_id
-
-    def unassign(
-        self,
-        teacher_id: str,
-        section_id: str,
-        day: int,
-        period: int,
-        room_id: Optional[str] = None
-    ):
-        """Remove an assignment"""
-        if (day, period) in self.teacher_schedule[teacher_id]:
-            del self.teacher_schedule[teacher_id][(day, period)]
-        if (day, period) in self.section_schedule[section_id]:
-            del self.section_schedule[section_id][(day, period)]
-        if room_id and (day, period) in self.room_schedule[room_id]:
-            del self.room_schedule[room_id][(day, period)]
-
-
-class TimetableGenerator:
-    """
-    Main timetable generation engine.
-
-    Uses a deterministic heuristic approach:
-    1. Sort sections by constraint severity
-    2. For each section, fill assignments iteratively
-    3. Use backtracking when stuck
-    """
+class TimetableGenerator(engine.TimetableGenerator):
+    """Generator that loads its problem from the database when not given one"""
 
     def __init__(
         self,
@@ -158,311 +39,149 @@ class TimetableGenerator:
         session_id: str,
         shift_id: str,
         season_id: Optional[str] = None,
-        working_days: list = None,
-        max_iterations: int = 1000,
+        **options,
     ):
+        super().__init__(**options)
         self.branch_id = branch_id
         self.session_id = session_id
         self.shift_id = shift_id
         self.season_id = season_id
-        self.working_days = working_days or [0, 1, 2, 3, 4, 5]  # Mon-Sat
-        self.max_iterations = max_iterations
-
-        self.conflict_detector = ConflictDetector()
-        self.schedule = {}  # {(section_id, day, period): ScheduleEntry}
-        self.all_conflicts = []
-
-    def get_period_slots(self) -> list[PeriodSlot]:
-        """Get period slots for the shift"""
-        template = PeriodTemplate.objects.filter(
-            branch_id=self.branch_id,
-            shift_id=self.shift_id,
-            is_active=True,
-        )
-        if self.season_id:
-            template = template.filter(season_id=self.season_id)
-
-        template = template.first()
-        if not template:
-            return []
 
-        return list(template.slots.filter(is_break=False).order_by("period_number"))
-
-    def get_sections(self) -> list[Section]:
-        """Get sections for the shift"""
-        return list(
-            Section.objects.filter(
-                grade__branch_id=self.branch_id,
-                shift_id=self.shift_id,
-                is_active=True,
-            ).select_related("grade")
-        )
-
-    def get_assignments(self, section_id: str) -> list[Assignment]:
-        """Get assignments for a section"""
-        return list(
-            Assignment.objects.filter(
-                section_id=section_id,
+    def load_problem(self):
+        if self.problem is None:
+            self.problem = load_problem(
+                branch_id=self.branch_id,
                 session_id=self.session_id,
-                is_active=True,
-            ).select_related("subject", "teacher")
-        )
-
-    def get_teacher_daily_load(self, teacher_id: str, day: int) -> int:
-        """Get current periods assigned to teacher on a day"""
-        count = 0
-        for (sec, d, p), entry in self.schedule.items():
-            if entry.teacher_id == teacher_id and d == day:
-                count += 1
-        return count
-
-    def get_section_subject_count(self, section_id: str, subject_id: str) -> int:
-        """Get current periods for subject in a section"""
-        count = 0
-        for (sec, d, p), entry in self.schedule.items():
-            if sec == section_id and entry.subject_id == subject_id:
-                count += 1
-        return count
-
-    def get_available_slots(
-        self,
-        section_id: str,
-        teacher_id: str,
-        subject_id: str,
-        period_slots: list[PeriodSlot],
-    ) -> list[tuple]:
-        """Get available slots for an assignment"""
-        available = []
-
-        for day in self.working_days:
-            for slot in period_slots:
-                can_assign, _ = self.conflict_detector.can_assign(
-                    teacher_id=teacher_id,
-                    section_id=section_id,
-                    day=day,
-                    period=slot.period_number,
-                )
-                if can_assign:
-                    available.append((day, slot))
-
-        return available
-
-    def try_assign(
-        self,
-        section_id: str,
-        subject_id: str,
-        teacher_id: str,
-        day: int,
-        period_slot: PeriodSlot,
-        room_id: Optional[str] = None,
-    ) -> bool:
-        """Try to make an assignment"""
-        can_assign, conflicts = self.conflict_detector.can_assign(
-            teacher_id=teacher_id,
-            section_id=section_id,
-            day=day,
-            period=period_slot.period_number,
-            room_id=room_id,
-        )
-
-        if not can_assign:
-            return False
-
-        # Record the assignment
-        self.conflict_detector.assign(
-            teacher_id=teacher_id,
-            section_id=section_id,
-            subject_id=subject_id,
-            day=day,
-            period=period_slot.period_number,
-            room_id=room_id,
-        )
-
-        self.schedule[(str(section_id), day, period_slot.period_number)] = ScheduleEntry(
-            section_id=str(section_id),
-            subject_id=str(subject_id),
-            teacher_id=str(teacher_id),
-            room_id=str(room_id) if room_id else None,
-        )
-
-        return True
-
-    def generate(self) -> GenerationResult:
-        """Generate the timetable"""
-        self.conflict_detector.reset()
-        self.schedule.clear()
-        self.all_conflicts.clear()
-
-        period_slots = self.get_period_slots()
-        if not period_slots:
-            return GenerationResult(
-                success=False,
-                errors=["No period template found for the given configuration"]
-            )
-
-        sections = self.get_sections()
-        if not sections:
-            return GenerationResult(
-                success=False,
-                errors=["No sections found for the given configuration"]
+                shift_id=self.shift_id,
+                season_id=self.season_id,
+                working_days=self.working_days,
             )
+        return super().load_problem()
 
-        # Build assignment requirements
-        requirements = []
-        for section in sections:
-            assignments = self.get_assignments(str(section.id))
-            for assignment in assignments:
-                for _ in range(assignment.weekly_periods):
-                    requirements.append({
-                        "section": section,
-                        "assignment": assignment,
-                        "priority": assignment.weekly_periods,  # Higher periods = higher priority
-                    })
-
-        # Sort by priority (most constrained first)
-        requirements.sort(key=lambda x: -x["priority"])
 
-        # Shuffle within same priority for randomization
-        random.shuffle(requirements)
-        requirements.sort(key=lambda x: -x["priority"])
-
-        # Try to fill all requirements
-        filled = 0
-        failed = []
-
-        for req in requirements:
-            section = req["section"]
-            assignment = req["assignment"]
+def validate_timetable(timetable_id: str) -> list:
+    """
+    Validate an existing timetable for conflicts.
+    Returns list of conflicts.
 
-            # Check if we already have enough periods for this subject
-            current_count = self.get_section_subject_count(
-                str(section.id),
-                str(assignment.subject_id)
+    The result is stored on the timetable. Later calls recheck only the
+    slots recorded by mark_slots_dirty since then, and return the stored
+    conflicts without scanning when there are none. invalidate_validation
+    makes the next call scan every entry again.
+    """
+    with transaction.atomic():
+        # Locked so an invalidation waits instead of being overwritten
+        stored = Timetable.objects.select_for_update().filter(
+            id=timetable_id
+        ).values_list("validated_conflicts", flat=True).first()
+        dirty = list(
+            DirtySlot.objects.filter(timetable_id=timetable_id).values_list(
+                "id", "day_of_week", "period_slot_id"
             )
-            if current_count >= assignment.weekly_periods:
-                filled += 1
-                continue
+        )
+        entries = TimetableEntry.objects.filter(timetable_id=timetable_id)
 
-            # Get available slots
-            available_slots = self.get_available_slots(
-                str(section.id),
-                str(assignment.teacher_id),
-                str(assignment.subject_id),
-                period_slots,
+        if stored is None:
+            conflicts = find_conflicts(entries)
+        elif not dirty:
+            return stored
+        else:
+            slots = Q()
+            for _, day, period_slot_id in dirty:
+                slots |= Q(day_of_week=day, period_slot_id=period_slot_id)
+            periods = dict(
+                PeriodSlot.objects.filter(
+                    id__in={period_slot_id for _, _, period_slot_id in dirty}
+                ).values_list("id", "period_number")
             )
+            changed = {(day, periods.get(period_slot_id)) for _, day, period_slot_id in dirty}
+            conflicts = [
+                conflict for conflict in stored
+                if (conflict["day"], conflict["period"]) not in changed
+            ] + find_conflicts(entries.filter(slots))
 
-            if not available_slots:
-                failed.append({
-                    "section": str(section),
-                    "subject": assignment.subject.name,
-                    "teacher": assignment.teacher.full_name,
-                    "reason": "No available slots",
-                })
-                continue
+        Timetable.objects.filter(id=timetable_id).update(validated_conflicts=conflicts)
+        DirtySlot.objects.filter(id__in=[row[0] for row in dirty]).delete()
 
-            # Score slots (prefer distributed schedule)
-            scored_slots = []
-            for day, slot in available_slots:
-                # Prefer days where this subject hasn't been assigned yet
-                day_subject_count = sum(
-                    1 for (sec, d, p), entry in self.schedule.items()
-                    if sec == str(section.id) and d == day and entry.subject_id == str(assignment.subject_id)
-                )
-                # Prefer days where teacher has fewer classes
-                teacher_day_load = self.get_teacher_daily_load(str(assignment.teacher_id), day)
+    return conflicts
 
-                score = day_subject_count * 10 + teacher_day_load
-                scored_slots.append((score, day, slot))
 
-            scored_slots.sort(key=lambda x: x[0])
+def mark_slots_dirty(timetable_id: str, slots):
+    """
+    Record (day_of_week, period_slot_id) slots whose entries changed.
+    Timetables edited often without being validated are invalidated once
+    MAX_DIRTY_SLOTS rows pile up, which also clears the rows.
+    """
+    slots = set(slots)
+    pending = DirtySlot.objects.filter(timetable_id=timetable_id).count()
+    if pending + len(slots) > MAX_DIRTY_SLOTS:
+        invalidate_validation(Timetable.objects.filter(id=timetable_id))
+        return
 
-            # Try best slot
-            assigned = False
-            for _, day, slot in scored_slots:
-                if self.try_assign(
-                    section_id=str(section.id),
-                    subject_id=str(assignment.subject_id),
-                    teacher_id=str(assignment.teacher_id),
-                    day=day,
-                    period_slot=slot,
-                ):
-                    assigned = True
-                    filled += 1
-                    break
+    DirtySlot.objects.bulk_create([
+        DirtySlot(timetable_id=timetable_id, day_of_week=day, period_slot_id=period_slot_id)
+        for day, period_slot_id in slots
+    ])
 
-            if not assigned:
-                failed.append({
-                    "section": str(section),
-                    "subject": assignment.subject.name,
-                    "teacher": assignment.teacher.full_name,
-                    "reason": "Could not find valid slot",
-                })
 
-        # Convert schedule to output format
-        schedule_output = {}
-        for (section_id, day, period), entry in self.schedule.items():
-            key = f"{section_id}_{day}_{period}"
-            schedule_output[key] = {
-                "section_id": entry.section_id,
-                "subject_id": entry.subject_id,
-                "teacher_id": entry.teacher_id,
-                "room_id": entry.room_id,
-                "day_of_week": day,
-                "period_number": period,
-            }
+def invalidate_validation(timetables):
+    """Make the next validation of the given Timetable queryset scan every entry"""
+    timetables.update(validated_conflicts=None)
+    # A full scan covers every slot; run after the update, which waits for
+    # a validation in progress
+    DirtySlot.objects.filter(timetable__in=timetables).delete()
 
-        success = len(failed) == 0
 
-        return GenerationResult(
-            success=success,
-            schedule=schedule_output,
-            conflicts=failed,
-            statistics={
-                "total_requirements": len(requirements),
-                "filled": filled,
-                "failed": len(failed),
-                "sections": len(sections),
-                "working_days": len(self.working_days),
-                "periods_per_day": len(period_slots),
-            },
-        )
-
-
-def validate_timetable(timetable_id: str) -> list:
+def find_conflicts(entries) -> list:
     """
-    Validate an existing timetable for conflicts.
-    Returns list of conflicts.
-    """
-    from .models import TimetableEntry
-
-    entries = TimetableEntry.objects.filter(
-        timetable_id=timetable_id
-    ).select_related("teacher", "section", "subject", "room", "period_slot")
+    Conflicts among a TimetableEntry queryset.
 
-    detector = ConflictDetector()
+    Clashing slots are found with one GROUP BY ... HAVING COUNT(*) > 1 query
+    per resource, each covered by its conflict index; only the clashing
+    entries are then loaded. Within a slot the earliest created entry is the
+    existing one and every later entry is reported against it.
+    """
     conflicts = []
 
-    for entry in entries:
-        can_assign, entry_conflicts = detector.can_assign(
-            teacher_id=str(entry.teacher_id),
-            section_id=str(entry.section_id),
-            day=entry.day_of_week,
-            period=entry.period_slot.period_number,
-            room_id=str(entry.room_id) if entry.room else None,
+    for conflict_type, field, existing_field, existing_key in VALIDATION_CHECKS:
+        clashes = set(
+            entries.filter(**{f"{field}__isnull": False})
+            .order_by()
+            .values(field, "day_of_week", "period_slot_id")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .values_list(field, "day_of_week", "period_slot_id")
+        )
+        if not clashes:
+            continue
+
+        rows = entries.filter(
+            **{f"{field}__in": {key[0] for key in clashes}},
+            day_of_week__in={key[1] for key in clashes},
+            period_slot_id__in={key[2] for key in clashes},
+        ).order_by("created_at", "id").values(
+            "id", field, existing_field, "day_of_week", "period_slot_id", "period_slot__period_number"
         )
 
-        if not can_assign:
-            for c in entry_conflicts:
-                c["entry_id"] = str(entry.id)
-                conflicts.append(c)
-        else:
-            detector.assign(
-                teacher_id=str(entry.teacher_id),
-                section_id=str(entry.section_id),
-                subject_id=str(entry.subject_id),
-                day=entry.day_of_week,
-                period=entry.period_slot.period_number,
-                room_id=str(entry.room_id) if entry.room else None,
-            )
+        existing = {}  # {clash key: first entry in that slot}
+        for row in rows:
+            key = (row[field], row["day_of_week"], row["period_slot_id"])
+            if key not in clashes:
+                continue
+            if key not in existing:
+                existing[key] = row
+                continue
+
+            conflict = {
+                "type": conflict_type,
+                field: str(row[field]),
+                "day": row["day_of_week"],
+                "period": row["period_slot__period_number"],
+                existing_key: str(existing[key][existing_field]),
+            }
+            if conflict_type == "teacher_overlap":
+                conflict["new_section"] = str(row["section_id"])
+            conflict["entry_id"] = str(row["id"])
+            conflicts.append(conflict)
 
     return conflicts
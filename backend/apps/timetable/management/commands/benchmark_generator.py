@@ -0,0 +1,337 @@
+"""
+Management command to benchmark the timetable generator on a synthetic branch.
+
+The synthetic branch is built in memory, so no database rows are created.
+A problem exported with export_problem can be replayed with --problem.
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from solver import (
+    MODES,
+    ORDERINGS,
+    Problem,
+    ProblemAssignment,
+    ProblemRoom,
+    ProblemSection,
+    ProblemSlot,
+    ProblemSubject,
+    ProblemTeacher,
+    TimetableGenerator,
+)
+
+SUBJECT_PLAN = [
+    ("Mathematics", 7),
+    ("English", 6),
+    ("Science", 6),
+    ("Social Studies", 5),
+    ("Hindi", 5),
+    ("Computer Science", 4),
+    ("Physical Education", 3),
+    ("Art", 2),
+    ("Music", 2),
+]
+
+
+def build_synthetic_branch(
+    num_sections, num_teachers, periods_per_day, seed=0, working_days=6, wings=1, labs=0
+):
+    """
+    Build an in-memory generation problem. With several wings, sections
+    and staff are split into groups that share no teachers. With labs,
+    Computer Science is taught in a shared pool of lab rooms.
+    """
+    rng = random.Random(seed)
+    weekly_capacity = periods_per_day * working_days
+
+    slots = tuple(
+        ProblemSlot(period_number=p, period_slot_id=f"slot-{p}")
+        for p in range(1, periods_per_day + 1)
+    )
+
+    subjects = tuple(
+        ProblemSubject(
+            id=f"subject-{i}",
+            name=name,
+            room_type="lab" if labs and name == "Computer Science" else "",
+        )
+        for i, (name, _) in enumerate(SUBJECT_PLAN)
+    )
+
+    rooms = tuple(
+        ProblemRoom(id=f"lab-{i}", name=f"Lab {i}", room_type="lab", capacity=40)
+        for i in range(labs)
+    )
+
+    # Spread each wing's staff across subjects in proportion to weekly demand
+    total_weight = sum(periods for _, periods in SUBJECT_PLAN)
+    wing_teachers = max(1, num_teachers // wings)
+    teachers = []
+    wing_subject_teachers = []
+    for _ in range(wings):
+        wing_start = len(teachers)
+        subject_teachers = []
+        for i, (_, periods) in enumerate(SUBJECT_PLAN):
+            share = max(1, round(wing_teachers * periods / total_weight))
+            if i == len(SUBJECT_PLAN) - 1:
+                share = max(1, wing_teachers - (len(teachers) - wing_start))
+            staff = []
+            for _ in range(share):
+                staff.append(len(teachers))
+                teachers.append(ProblemTeacher(
+                    id=f"teacher-{len(teachers)}",
+                    name=f"Teacher {len(teachers)}",
+                    max_periods_per_day=periods_per_day,
+                    max_periods_per_week=weekly_capacity,
+                ))
+            subject_teachers.append(staff)
+        wing_subject_teachers.append(subject_teachers)
+
+    teacher_load = [0] * len(teachers)
+    sections = []
+    assignments = []
+    for s in range(num_sections):
+        sections.append(ProblemSection(id=f"section-{s}", name=f"Section {s}"))
+        subject_teachers = wing_subject_teachers[s * wings // num_sections]
+
+        for i, (_, periods) in enumerate(SUBJECT_PLAN):
+            # Random teacher for the subject, without exceeding a teacher's week
+            staff = [
+                t for t in subject_teachers[i]
+                if teacher_load[t] + periods <= weekly_capacity
+            ] or subject_teachers[i]
+            teacher = rng.choice(staff)
+            teacher_load[teacher] += periods
+            assignments.append(ProblemAssignment(
+                section=s,
+                subject=i,
+                teacher=teacher,
+                weekly_periods=periods,
+            ))
+
+    return Problem(
+        working_days=tuple(range(working_days)),
+        slots=slots,
+        sections=tuple(sections),
+        subjects=subjects,
+        teachers=tuple(teachers),
+        assignments=tuple(assignments),
+        rooms=rooms,
+    )
+
+
+class RescanGenerator(TimetableGenerator):
+    """Reference generator that recomputes occupancy by scanning the schedule"""
+
+    def get_teacher_daily_load(self, teacher_id, day):
+        return sum(
+            1 for (sec, d, p), entry in self.schedule.items()
+            if entry.teacher_id == teacher_id and d == day
+        )
+
+    def get_section_subject_count(self, section_id, subject_id):
+        return sum(
+            1 for (sec, d, p), entry in self.schedule.items()
+            if sec == section_id and entry.subject_id == subject_id
+        )
+
+    def get_section_subject_day_count(self, section_id, subject_id, day):
+        return sum(
+            1 for (sec, d, p), entry in self.schedule.items()
+            if sec == section_id and d == day and entry.subject_id == subject_id
+        )
+
+
+class Command(BaseCommand):
+    help = 'Benchmark timetable generation on a synthetic branch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sections',
+            type=int,
+            help='Number of sections (default: 80)',
+            default=80
+        )
+        parser.add_argument(
+            '--teachers',
+            type=int,
+            help='Number of teachers (default: 150)',
+            default=150
+        )
+        parser.add_argument(
+            '--periods',
+            type=int,
+            help='Teaching periods per day (default: 8)',
+            default=8
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Seed for the synthetic branch (default: 0)',
+            default=0
+        )
+        parser.add_argument(
+            '--wings',
+            type=int,
+            help='Split sections and staff into this many independent wings (default: 1)',
+            default=1
+        )
+        parser.add_argument(
+            '--labs',
+            type=int,
+            help='Lab rooms Computer Science lessons must be booked into (default: 0)',
+            default=0
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Worker processes for independent section clusters (default: 1)',
+            default=1
+        )
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            help='Seeded runs to pick the best schedule from (default: 1)',
+            default=1
+        )
+        parser.add_argument(
+            '--stop-on-success',
+            action='store_true',
+            help='End the portfolio at the first run that places every lesson'
+        )
+        parser.add_argument(
+            '--problem',
+            type=str,
+            help='Replay a problem JSON file written by export_problem instead'
+        )
+        parser.add_argument(
+            '--ordering',
+            choices=ORDERINGS,
+            help='Greedy pass ordering (default: mrv)',
+            default='mrv'
+        )
+        parser.add_argument(
+            '--compare-ordering',
+            action='store_true',
+            help='Also run every other greedy ordering and report failures and time'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=MODES,
+            help='Solver mode (default: greedy)',
+            default='greedy'
+        )
+        parser.add_argument(
+            '--compare-mode',
+            action='store_true',
+            help='Also run every other solver mode and report failures and time'
+        )
+        parser.add_argument(
+            '--optimize',
+            type=float,
+            help='Seconds of soft-constraint optimization after solving (default: 0, off)',
+            default=0.0
+        )
+        parser.add_argument(
+            '--trace',
+            type=str,
+            help='Write a replayable decision trace of the largest run to this file'
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Also run the schedule-rescanning reference implementation'
+        )
+
+    def handle(self, *args, **options):
+        if options['problem']:
+            problem = Problem.load(options['problem'])
+            self.stdout.write(
+                f'Problem {options["problem"]}: {len(problem.sections)} sections, '
+                f'{len(problem.teachers)} teachers, {len(problem.slots)} periods/day'
+            )
+            self.run_problem(problem, len(problem.sections), options)
+            return
+
+        num_sections = options['sections']
+        num_teachers = options['teachers']
+
+        self.stdout.write(
+            f'Synthetic branch: {num_sections} sections, {num_teachers} teachers, '
+            f'{options["periods"]} periods/day, {options["wings"]} wing(s), '
+            f'{options["workers"]} worker(s)'
+        )
+
+        # Run at increasing sizes so the growth rate is visible
+        for fraction in (0.25, 0.5, 1.0):
+            sections_count = max(1, int(num_sections * fraction))
+            teachers_count = max(len(SUBJECT_PLAN), int(num_teachers * fraction))
+            problem = build_synthetic_branch(
+                sections_count, teachers_count, options['periods'], options['seed'],
+                wings=options['wings'], labs=options['labs'],
+            )
+            self.run_problem(problem, sections_count, options)
+
+    def run_problem(self, problem, sections_count, options):
+        settings = {
+            'workers': options['workers'],
+            'ordering': options['ordering'],
+            'mode': options['mode'],
+            'optimize_time_limit': options['optimize'],
+        }
+        elapsed, result = self.run_once(
+            TimetableGenerator, problem, trace=options['trace'],
+            portfolio_size=options['portfolio'], stop_on_success=options['stop_on_success'],
+            **settings
+        )
+        quality = result.statistics["quality"]
+        line = (
+            f'  {sections_count:>4} sections: {elapsed * 1000:9.1f} ms '
+            f'({result.statistics["filled"]}/{result.statistics["total_requirements"]} placed, '
+            f'{result.statistics["repair"]["recovered"]} by repair, '
+            f'{quality["teacher_gaps"]} gaps, {quality["subject_repeats"]} repeats)'
+        )
+        if "optimize" in result.statistics:
+            optimize = result.statistics["optimize"]
+            line += (
+                f' [objective {optimize["objective_before"]} -> {optimize["objective_after"]}'
+                f' in {optimize["iterations"]} iterations]'
+            )
+        if "portfolio" in result.statistics:
+            portfolio = result.statistics["portfolio"]
+            line += f' [best of {portfolio["completed"]}/{portfolio["size"]}: seed {portfolio["seed"]}]'
+
+        for option, choices in (('ordering', ORDERINGS), ('mode', MODES)):
+            if not options[f'compare_{option}']:
+                continue
+            for choice in choices:
+                if choice == options[option]:
+                    continue
+                other_elapsed, other = self.run_once(
+                    TimetableGenerator, problem, **{**settings, option: choice}
+                )
+                line += (
+                    f' | {choice}: {other_elapsed * 1000:9.1f} ms '
+                    f'({other.statistics["failed"]} failed, '
+                    f'{other.statistics["repair"]["unplaced_before"]} before repair)'
+                )
+
+        if options['compare']:
+            rescan_elapsed, _ = self.run_once(RescanGenerator, problem)
+            speedup = rescan_elapsed / elapsed if elapsed else float('inf')
+            line += f' | rescan: {rescan_elapsed * 1000:9.1f} ms ({speedup:.1f}x slower)'
+
+        self.stdout.write(line)
+
+    def run_once(self, generator_class, problem, trace=None, **generator_options):
+        generator = generator_class(
+            problem=problem, seed=0, trace=bool(trace), **generator_options
+        )
+        start = time.perf_counter()
+        result = generator.generate()
+        elapsed = time.perf_counter() - start
+        if trace:
+            generator.dump_trace(trace, result)
+        return elapsed, result
@@ -0,0 +1,42 @@
+"""
+Management command to export the generation inputs of a branch as JSON.
+
+The file can be replayed offline with benchmark_generator --problem.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.timetable.problem import load_problem
+
+
+class Command(BaseCommand):
+    help = 'Export the timetable generation problem for a branch/session/shift to JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=str, required=True, help='Branch ID')
+        parser.add_argument('--session', type=str, required=True, help='Session ID')
+        parser.add_argument('--shift', type=str, required=True, help='Shift ID')
+        parser.add_argument('--season', type=str, help='Season ID (optional)')
+        parser.add_argument(
+            '--working-days',
+            type=str,
+            help='Comma-separated working days, 0=Monday (default: 0,1,2,3,4,5)',
+            default='0,1,2,3,4,5'
+        )
+        parser.add_argument('--output', type=str, required=True, help='Output file path')
+
+    def handle(self, *args, **options):
+        problem = load_problem(
+            branch_id=options['branch'],
+            session_id=options['session'],
+            shift_id=options['shift'],
+            season_id=options['season'],
+            working_days=[int(d) for d in options['working_days'].split(',') if d.strip()],
+        )
+        if problem is None:
+            raise CommandError('No period template found for the given configuration')
+
+        problem.dump(options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(problem.sections)} sections, {len(problem.assignments)} assignments '
+            f'to {options["output"]}'
+        ))
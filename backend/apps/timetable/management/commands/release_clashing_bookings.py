@@ -0,0 +1,96 @@
+"""
+Management command to release teacher and room bookings that clash.
+
+Migration 0007 will not add the unique teacher and room constraints while
+timetable entries double-book either. For every clashing slot this keeps
+the booking of the earliest created entry and clears the teacher or room
+of the others, which stay in the timetable as unstaffed or roomless
+lessons to reassign. Nothing changes unless --apply is given.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from apps.timetable.engine import invalidate_validation
+from apps.timetable.models import Timetable, TimetableEntry
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Only columns that exist before migration 0007 are read, so this runs
+# against a database that is waiting to migrate
+ENTRY_FIELDS = (
+    'id', 'timetable_id', 'timetable__name', 'day_of_week', 'period_slot__period_number',
+    'section__grade__name', 'section__name',
+)
+
+
+class Command(BaseCommand):
+    help = 'Clear the teacher or room of timetable entries that double-book one'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Clear the clashing bookings (default: only list them)',
+        )
+
+    def handle(self, *args, **options):
+        released = 0
+        timetable_ids = set()
+
+        with transaction.atomic():
+            for field in ('teacher', 'room'):
+                entries = self.clashing_entries(field)
+                released += len(entries)
+                if options['apply'] and entries:
+                    TimetableEntry.objects.filter(
+                        id__in=[entry['id'] for entry in entries]
+                    ).update(**{field: None})
+                    timetable_ids |= {entry['timetable_id'] for entry in entries}
+
+            if timetable_ids:
+                invalidate_validation(Timetable.objects.filter(id__in=timetable_ids))
+
+        if not released:
+            self.stdout.write(self.style.SUCCESS('No teacher or room is double-booked'))
+        elif options['apply']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Released {released} bookings; run migrate again'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{released} bookings would be released; run again with --apply'
+            ))
+
+    def clashing_entries(self, field):
+        """List each clash on field and return the entries whose booking to release"""
+        clashes = (
+            TimetableEntry.objects.filter(**{f'{field}__isnull': False})
+            .order_by()
+            .values('timetable_id', f'{field}_id', 'day_of_week', 'period_slot_id')
+            .annotate(count=Count('id'))
+            .filter(count__gt=1)
+        )
+
+        released = []
+        for clash in clashes:
+            kept, *others = TimetableEntry.objects.filter(
+                timetable_id=clash['timetable_id'],
+                day_of_week=clash['day_of_week'],
+                period_slot_id=clash['period_slot_id'],
+                **{f'{field}_id': clash[f'{field}_id']},
+            ).order_by('created_at', 'id').values(*ENTRY_FIELDS)
+
+            self.stdout.write(
+                f"{kept['timetable__name']}: {field} {clash[f'{field}_id']} on "
+                f"{DAY_NAMES[kept['day_of_week']]}, Period {kept['period_slot__period_number']}"
+            )
+            self.stdout.write(f'  keeps {self.describe(kept)}')
+            for entry in others:
+                self.stdout.write(f'  releases {self.describe(entry)}')
+                released.append(entry)
+
+        return released
+
+    def describe(self, entry):
+        return f"{entry['section__grade__name']} - {entry['section__name']} ({entry['id']})"
@@ -0,0 +1,65 @@
+"""
+Management command to reproduce a generation from a decision trace.
+
+Traces are written by benchmark_generator --trace or, when
+TIMETABLE_GENERATION_TRACE_DIR is set, by every API generation.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from solver import TimetableGenerator, load_trace, replay_trace
+
+
+class Command(BaseCommand):
+    help = 'Replay or re-run a recorded timetable generation trace'
+
+    def add_arguments(self, parser):
+        parser.add_argument('trace', type=str, help='Trace file path')
+        parser.add_argument(
+            '--rerun',
+            action='store_true',
+            help='Run the generator again with the recorded seed and compare its decisions'
+        )
+
+    def handle(self, *args, **options):
+        trace = load_trace(options['trace'])
+        problem = trace['problem']
+        decisions = trace['decisions']
+        self.stdout.write(
+            f'Trace {options["trace"]}: seed {trace["seed"]}, {len(decisions)} decisions, '
+            f'{len(problem.sections)} sections, {len(problem.assignments)} assignments'
+        )
+
+        if not options['rerun']:
+            start = time.perf_counter()
+            try:
+                generator = replay_trace(trace)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            elapsed = time.perf_counter() - start
+            self.stdout.write(self.style.SUCCESS(
+                f'Replayed to {len(generator.schedule)} placed lessons in {elapsed * 1000:.1f} ms'
+            ))
+            return
+
+        generator = TimetableGenerator(
+            problem=problem, seed=trace['seed'], trace=True, **trace['options'],
+        )
+        start = time.perf_counter()
+        result = generator.generate()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Re-ran in {elapsed * 1000:.1f} ms: '
+            f'{result.statistics["filled"]}/{result.statistics["total_requirements"]} placed'
+        )
+
+        for step, (recorded, rerun) in enumerate(zip(decisions, generator.trace)):
+            if recorded != rerun:
+                raise CommandError(f'Decisions diverge at step {step}: {recorded} != {rerun}')
+        if len(decisions) != len(generator.trace):
+            raise CommandError(
+                f'Decision counts differ: {len(decisions)} recorded, {len(generator.trace)} re-run'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Re-run matches the recorded decisions'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_subject_room_type'),
+        ('timetable', '0003_generation_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timetableentry',
+            name='teacher',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='timetable_entries', to='academics.teacher'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0004_allow_null_entry_teacher'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('result', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'timetable_generation_cache',
+            },
+        ),
+    ]
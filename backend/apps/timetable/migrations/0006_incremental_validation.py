@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_subject_room_type'),
+        ('timetable', '0005_generation_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timetable',
+            name='validated_conflicts',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DirtySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.IntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('period_slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='academics.periodslot')),
+                ('timetable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dirty_slots', to='timetable.timetable')),
+            ],
+            options={
+                'db_table': 'timetable_dirty_slots',
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:13
+
+from django.db import migrations, models
+
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+REPORT_LIMIT = 50
+
+
+def check_clashing_bookings(apps, schema_editor):
+    """
+    Refuse to add the unique constraints while entries double-book a teacher
+    or room. Which booking to keep is an operator decision, so the clashing
+    entries are reported instead of being changed here; the
+    release_clashing_bookings command resolves them.
+    """
+    TimetableEntry = apps.get_model('timetable', 'TimetableEntry')
+
+    lines = []
+    for field in ('teacher', 'room'):
+        clashes = (
+            TimetableEntry.objects.filter(**{f'{field}__isnull': False})
+            .order_by()
+            .values('timetable_id', f'{field}_id', 'day_of_week', 'period_slot_id')
+            .annotate(count=models.Count('id'))
+            .filter(count__gt=1)
+        )
+        for clash in clashes:
+            entries = TimetableEntry.objects.filter(
+                timetable_id=clash['timetable_id'],
+                day_of_week=clash['day_of_week'],
+                period_slot_id=clash['period_slot_id'],
+                **{f'{field}_id': clash[f'{field}_id']},
+            ).select_related('timetable', 'period_slot', 'section', 'section__grade', field)
+            first = entries[0]
+            # Historical models have no __str__
+            booked = getattr(first, field)
+            name = (
+                f'{booked.first_name} {booked.last_name}' if field == 'teacher' else booked.name
+            )
+            sections = ', '.join(
+                f'{entry.section.grade.name} - {entry.section.name} ({entry.id})'
+                for entry in entries
+            )
+            lines.append(
+                f'{first.timetable.name}: {field} {name} on '
+                f'{DAY_NAMES[first.day_of_week]}, Period {first.period_slot.period_number}: {sections}'
+            )
+
+    if lines:
+        shown = '\n'.join(f'  {line}' for line in lines[:REPORT_LIMIT])
+        more = f'\n  ... and {len(lines) - REPORT_LIMIT} more' if len(lines) > REPORT_LIMIT else ''
+        raise RuntimeError(
+            f'{len(lines)} teacher or room slots are booked by more than one timetable entry. '
+            f'Reassign the clashing entries, or run "python manage.py '
+            f'release_clashing_bookings --apply" to keep the earliest booking of each and '
+            f'clear the teacher or room of the rest, then run migrate again.\n{shown}{more}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0004_subject_room_type'),
+        ('timetable', '0006_incremental_validation'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_clashing_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='timetableentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('teacher__isnull', False)), fields=('timetable', 'teacher', 'day_of_week', 'period_slot'), name='timetable_entry_unique_teacher_slot'),
+        ),
+        migrations.AddConstraint(
+            model_name='timetableentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('room__isnull', False)), fields=('timetable', 'room', 'day_of_week', 'period_slot'), name='timetable_entry_unique_room_slot'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:50
+
+import apps.timetable.models
+from django.db import migrations, models
+
+
+def infer_working_days(apps, schema_editor):
+    """
+    Existing timetables did not record the days they were generated for;
+    use the days their entries are on, keeping Mon-Sat for empty ones
+    """
+    Timetable = apps.get_model('timetable', 'Timetable')
+    TimetableEntry = apps.get_model('timetable', 'TimetableEntry')
+
+    days = {}
+    for timetable_id, day in TimetableEntry.objects.values_list('timetable_id', 'day_of_week').distinct():
+        days.setdefault(timetable_id, set()).add(day)
+
+    for timetable_id, timetable_days in days.items():
+        Timetable.objects.filter(id=timetable_id).update(working_days=sorted(timetable_days))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timetable', '0007_unique_teacher_room_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timetable',
+            name='working_days',
+            field=models.JSONField(default=apps.timetable.models.default_working_days),
+        ),
+        migrations.RunPython(infer_working_days, migrations.RunPython.noop),
+    ]
@@ -15,6 +15,10 @@ from apps.academics.models import (
 from apps.org.models import Branch, Season, Session, Shift
 
 
+def default_working_days():
+    return [0, 1, 2, 3, 4, 5]  # Mon-Sat
+
+
 class TimetableStatus(models.TextChoices):
     DRAFT = "draft", "Draft"
     PUBLISHED = "published", "Published"
@@ -78,6 +82,14 @@ class Timetable(models.Model):
     published_at = models.DateTimeField(null=True, blank=True)
 
     current_version = models.IntegerField(default=0)
+
+    # Days the timetable was generated for; regeneration and edits stay on them
+    working_days = models.JSONField(default=default_working_days)
+
+    # Conflicts found by the last validation, patched for DirtySlot changes;
+    # None makes the next validation scan every entry
+    validated_conflicts = models.JSONField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -152,6 +164,8 @@ class TimetableEntry(models.Model):
     teacher = models.ForeignKey(
         Teacher,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,  # Unstaffed lesson, kept as a placeholder until a teacher is assigned
         related_name="timetable_entries"
     )
     room = models.ForeignKey(
@@ -168,6 +182,20 @@ class TimetableEntry(models.Model):
         db_table = "timetable_entries"
         ordering = ["day_of_week", "period_slot__period_number"]
         unique_together = [["timetable", "section", "day_of_week", "period_slot"]]
+        constraints = [
+            # A teacher or room is booked at most once per slot; unstaffed
+            # and roomless entries are not constrained
+            models.UniqueConstraint(
+                fields=["timetable", "teacher", "day_of_week", "period_slot"],
+                condition=models.Q(teacher__isnull=False),
+                name="timetable_entry_unique_teacher_slot",
+            ),
+            models.UniqueConstraint(
+                fields=["timetable", "room", "day_of_week", "period_slot"],
+                condition=models.Q(room__isnull=False),
+                name="timetable_entry_unique_room_slot",
+            ),
+        ]
         indexes = [
             # Index for teacher conflict detection
             models.Index(fields=["timetable", "teacher", "day_of_week", "period_slot"]),
@@ -182,6 +210,150 @@ class TimetableEntry(models.Model):
     def __str__(self):
         return f"{self.section} - {self.get_day_of_week_display()} P{self.period_slot.period_number}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_slot = instance.slot_key()
+        return instance
+
+    def slot_key(self):
+        """(timetable_id, day_of_week, period_slot_id), or None if any is deferred"""
+        try:
+            return tuple(
+                self.__dict__[name] for name in ("timetable_id", "day_of_week", "period_slot_id")
+            )
+        except KeyError:
+            return None
+
+    # Single-entry writes (API, admin) mark their slots for revalidation here;
+    # bulk paths in services mark theirs and cascades invalidate via signals.
+    # The slot a moved entry leaves is the one it was loaded from (from_db).
+    def save(self, *args, **kwargs):
+        from .engine import invalidate_validation, mark_slots_dirty  # engine imports this module
+
+        adding = self._state.adding
+        previous = None if adding else getattr(self, "_stored_slot", None)
+        super().save(*args, **kwargs)
+        self._stored_slot = current = self.slot_key()
+
+        if current is None or (previous is None and not adding):
+            # Loaded with deferred slot fields, so the slot it left is unknown
+            invalidate_validation(Timetable.objects.filter(id=self.timetable_id))
+            return
+        if previous and previous[0] != current[0]:
+            mark_slots_dirty(previous[0], [previous[1:]])
+            previous = None
+        mark_slots_dirty(current[0], [
+            slot for slot in (previous and previous[1:], current[1:]) if slot
+        ])
+
+    def delete(self, *args, **kwargs):
+        from .engine import mark_slots_dirty
+
+        timetable_id, day_of_week, period_slot_id = getattr(self, "_stored_slot", None) or (
+            self.timetable_id, self.day_of_week, self.period_slot_id
+        )
+        result = super().delete(*args, **kwargs)
+        mark_slots_dirty(timetable_id, [(day_of_week, period_slot_id)])
+        return result
+
+
+class DirtySlot(models.Model):
+    """
+    A day/period of a timetable whose entries changed since its conflicts
+    were last validated. One row per change; validation rechecks the slot
+    and deletes the rows it has seen.
+    """
+    timetable = models.ForeignKey(
+        Timetable,
+        on_delete=models.CASCADE,
+        related_name="dirty_slots"
+    )
+    day_of_week = models.IntegerField(choices=DayOfWeek.choices)
+    period_slot = models.ForeignKey(
+        PeriodSlot,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+
+    class Meta:
+        db_table = "timetable_dirty_slots"
+
+    def __str__(self):
+        return f"{self.timetable_id} - {self.get_day_of_week_display()} {self.period_slot_id}"
+
+
+class GenerationJobStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    RUNNING = "running", "Running"
+    COMPLETED = "completed", "Completed"
+    FAILED = "failed", "Failed"
+
+
+class GenerationJob(models.Model):
+    """
+    A timetable generation run executed in the background.
+    Tracks progress while the engine runs and links the resulting timetable.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.CASCADE,
+        related_name="generation_jobs"
+    )
+    parameters = models.JSONField(default=dict)  # Validated generate request
+    status = models.CharField(
+        max_length=20,
+        choices=GenerationJobStatus.choices,
+        default=GenerationJobStatus.PENDING
+    )
+    progress_placed = models.IntegerField(default=0)
+    progress_total = models.IntegerField(default=0)
+    timetable = models.ForeignKey(
+        Timetable,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="generation_jobs"
+    )
+    result = models.JSONField(default=dict)  # Statistics and conflicts
+    errors = models.JSONField(default=list)
+    celery_task_id = models.CharField(max_length=255, blank=True)
+
+    created_by = models.ForeignKey(
+        "accounts.User",
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="generation_jobs"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "timetable_generation_jobs"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Generation job {self.id} ({self.status})"
+
+
+class GenerationCacheEntry(models.Model):
+    """
+    A generation result stored under the fingerprint of its inputs.
+    Database fallback for the generation cache when Redis is not in use.
+    """
+    fingerprint = models.CharField(max_length=64, unique=True)
+    result = models.JSONField(default=dict)  # Serialized GenerationResult
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_used_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "timetable_generation_cache"
+
+    def __str__(self):
+        return f"Generation cache {self.fingerprint[:12]}"
+
 
 class SubstitutionType(models.TextChoices):
     SINGLE_PERIOD = "single_period", "Single Period"
@@ -241,7 +413,9 @@ class Substitution(models.Model):
         ordering = ["-created_at"]
 
     def __str__(self):
-        return f"Substitution: {self.original_entry.teacher.full_name} -> {self.substitute_teacher.full_name}"
+        original = self.original_entry.teacher
+        original_name = original.full_name if original else "Unassigned"
+        return f"Substitution: {original_name} -> {self.substitute_teacher.full_name}"
 
 
 class Conflict(models.Model):
@@ -0,0 +1,188 @@
+"""
+Generation problem loader.
+
+Builds a solver Problem for a branch/session/shift from the database.
+"""
+
+from typing import Optional
+
+from apps.academics.models import (
+    Assignment,
+    PeriodSlot,
+    PeriodTemplate,
+    Room,
+    Section,
+    Teacher,
+    TeacherAvailability,
+)
+from solver.problem import (
+    Problem,
+    ProblemAssignment,
+    ProblemAvailability,
+    ProblemRoom,
+    ProblemSection,
+    ProblemSlot,
+    ProblemSubject,
+    ProblemTeacher,
+)
+
+
+def _minutes(value) -> int:
+    return value.hour * 60 + value.minute if value else 0
+
+
+def find_period_template_id(
+    branch_id: str,
+    shift_id: str,
+    season_id: Optional[str] = None,
+):
+    """ID of the active period template used for a branch/shift/season"""
+    template = PeriodTemplate.objects.filter(
+        branch_id=branch_id,
+        shift_id=shift_id,
+        is_active=True,
+    )
+    if season_id:
+        template = template.filter(season_id=season_id)
+
+    return template.values_list("id", flat=True).first()
+
+
+def load_problem(
+    branch_id: str,
+    session_id: str,
+    shift_id: str,
+    season_id: Optional[str] = None,
+    working_days: Optional[list] = None,
+) -> Optional[Problem]:
+    """
+    Load the generation inputs for a branch/session/shift in a constant
+    number of queries. Returns None if there is no active period template.
+    """
+    template_id = find_period_template_id(branch_id, shift_id, season_id)
+    if not template_id:
+        return None
+
+    slots = tuple(
+        ProblemSlot(
+            period_number=row["period_number"],
+            period_slot_id=str(row["id"]),
+            start_minute=_minutes(row["start_time"]),
+            end_minute=_minutes(row["end_time"]),
+        )
+        for row in PeriodSlot.objects.filter(
+            template_id=template_id, is_break=False
+        ).order_by("period_number").values("id", "period_number", "start_time", "end_time")
+    )
+
+    section_rows = Section.objects.filter(
+        grade__branch_id=branch_id,
+        shift_id=shift_id,
+        is_active=True,
+    ).values("id", "name", "grade__name", "capacity")
+
+    sections = []
+    section_index = {}
+    for row in section_rows:
+        section_index[row["id"]] = len(sections)
+        sections.append(ProblemSection(
+            id=str(row["id"]),
+            name=f"{row['grade__name']} - {row['name']}",
+            capacity=row["capacity"],
+        ))
+
+    assignment_rows = list(
+        Assignment.objects.filter(
+            section_id__in=section_index.keys(),
+            session_id=session_id,
+            is_active=True,
+        ).values(
+            "section_id", "subject_id", "subject__name", "subject__room_type",
+            "teacher_id", "weekly_periods",
+        )
+    )
+
+    subjects = []
+    subject_index = {}
+    teacher_ids = []
+    for row in assignment_rows:
+        if row["subject_id"] not in subject_index:
+            subject_index[row["subject_id"]] = len(subjects)
+            subjects.append(ProblemSubject(
+                id=str(row["subject_id"]),
+                name=row["subject__name"],
+                room_type=row["subject__room_type"],
+            ))
+        if row["teacher_id"] is not None and row["teacher_id"] not in teacher_ids:
+            teacher_ids.append(row["teacher_id"])
+
+    teacher_rows = {
+        row["id"]: row
+        for row in Teacher.objects.filter(id__in=teacher_ids).values(
+            "id", "first_name", "last_name", "max_periods_per_day", "max_periods_per_week"
+        )
+    }
+
+    teachers = []
+    teacher_index = {}
+    for teacher_id in teacher_ids:
+        row = teacher_rows[teacher_id]
+        teacher_index[teacher_id] = len(teachers)
+        teachers.append(ProblemTeacher(
+            id=str(teacher_id),
+            name=f"{row['first_name']} {row['last_name']}",
+            max_periods_per_day=row["max_periods_per_day"],
+            max_periods_per_week=row["max_periods_per_week"],
+        ))
+
+    assignments = tuple(
+        ProblemAssignment(
+            section=section_index[row["section_id"]],
+            subject=subject_index[row["subject_id"]],
+            teacher=teacher_index.get(row["teacher_id"]),
+            weekly_periods=row["weekly_periods"],
+        )
+        for row in assignment_rows
+    )
+
+    availability = tuple(
+        ProblemAvailability(
+            teacher=teacher_index[row["teacher_id"]],
+            day=row["day_of_week"],
+            start_minute=_minutes(row["start_time"]),
+            end_minute=_minutes(row["end_time"]),
+            is_available=row["is_available"],
+        )
+        for row in TeacherAvailability.objects.filter(teacher_id__in=teacher_ids).values(
+            "teacher_id", "day_of_week", "start_time", "end_time", "is_available"
+        )
+    )
+
+    rooms = tuple(
+        ProblemRoom(
+            id=str(row["id"]),
+            name=row["name"],
+            room_type=row["room_type"],
+            capacity=row["capacity"],
+        )
+        for row in Room.objects.filter(branch_id=branch_id, is_active=True).values(
+            "id", "name", "room_type", "capacity"
+        )
+    )
+
+    return Problem(
+        working_days=tuple(working_days or [0, 1, 2, 3, 4, 5]),
+        slots=slots,
+        sections=tuple(sections),
+        subjects=tuple(subjects),
+        teachers=tuple(teachers),
+        assignments=assignments,
+        availability=availability,
+        rooms=rooms,
+        meta={
+            "branch_id": str(branch_id),
+            "session_id": str(session_id),
+            "shift_id": str(shift_id),
+            "season_id": str(season_id) if season_id else None,
+        },
+    )
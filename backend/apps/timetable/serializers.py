@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
 from apps.academics.serializers import (
@@ -6,9 +7,11 @@ from apps.academics.serializers import (
     SubjectSerializer,
     TeacherListSerializer,
 )
+from solver import MODES
 
 from .models import (
     Conflict,
+    GenerationJob,
     Substitution,
     SubstitutionType,
     Timetable,
@@ -112,95 +115,95 @@ class TimetableEntryCreateSerializer(serializers.ModelSerializer):
             "period_slot", "subject", "teacher", "room",
         ]
         read_only_fields = ["id"]
+        # Teacher, section and room clashes are rejected by the unique
+        # constraints on TimetableEntry, so edits need no pre-check queries
+        validators = []
 
-    def validate(self, data):
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            error = self.slot_conflict_error(validated_data)
+            if error is None:
+                raise
+            raise error
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            # super().update() has already applied validated_data to instance
+            values = {field: getattr(instance, field) for field in self.Meta.fields}
+            error = self.slot_conflict_error(values, exclude_id=instance.id)
+            if error is None:
+                raise
+            raise error
+
+    def slot_conflict_error(self, values, exclude_id=None):
         """
-        Optimized conflict detection - only check relevant entries instead of all entries.
-        For updates: only validate if teacher, section, day, or period is changing.
+        Describe the entry that the rejected teacher, section or room
+        booking clashes with. Only runs after the database refused a write.
+        Returns None if no clash is found, e.g. when another constraint failed.
         """
-        # For partial updates, check if critical fields are changing
-        if self.instance:
-            teacher = data.get("teacher", self.instance.teacher)
-            section = data.get("section", self.instance.section)
-            day_of_week = data.get("day_of_week", self.instance.day_of_week)
-            period_slot = data.get("period_slot", self.instance.period_slot)
-
-            # If only subject is changing, no conflict check needed
-            critical_fields_changed = (
-                data.get("teacher") and data["teacher"] != self.instance.teacher or
-                data.get("section") and data["section"] != self.instance.section or
-                data.get("day_of_week") is not None and data["day_of_week"] != self.instance.day_of_week or
-                data.get("period_slot") and data["period_slot"] != self.instance.period_slot
-            )
-
-            if not critical_fields_changed:
-                # Only subject/room changing - no conflict possible
-                return data
-        else:
-            teacher = data.get("teacher")
-            section = data.get("section")
-            day_of_week = data.get("day_of_week")
-            period_slot = data.get("period_slot")
-
-        timetable = data.get("timetable") or (self.instance.timetable if self.instance else None)
-
-        if timetable and teacher and section and period_slot:
-            day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            day_name = day_names[day_of_week] if day_of_week < len(day_names) else f"Day {day_of_week}"
-            period_num = period_slot.period_number
-
-            # Optimized conflict check - only query potentially conflicting entries
-            # Check teacher conflict: same teacher, same day, same period
-            teacher_conflict_entry = TimetableEntry.objects.filter(
-                timetable=timetable,
-                teacher=teacher,
-                day_of_week=day_of_week,
-                period_slot=period_slot
-            ).exclude(id=self.instance.id if self.instance else None).select_related(
+        timetable = values["timetable"]
+        teacher = values.get("teacher")
+        section = values["section"]
+        day_of_week = values["day_of_week"]
+        period_slot = values["period_slot"]
+        room = values.get("room")
+
+        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        day_name = day_names[day_of_week] if day_of_week < len(day_names) else f"Day {day_of_week}"
+        period_num = period_slot.period_number
+        slot_entries = TimetableEntry.objects.filter(
+            timetable=timetable,
+            day_of_week=day_of_week,
+            period_slot=period_slot,
+        ).exclude(id=exclude_id)
+
+        # Check teacher conflict: same teacher, same day, same period
+        # (unstaffed placeholders have no teacher to clash)
+        if teacher:
+            teacher_conflict_entry = slot_entries.filter(teacher=teacher).select_related(
                 "section", "section__grade", "subject"
             ).first()
 
             if teacher_conflict_entry:
                 conflict_section = f"{teacher_conflict_entry.section.grade.name} - {teacher_conflict_entry.section.name}"
-                raise serializers.ValidationError({
+                return serializers.ValidationError({
                     "message": f"{teacher.full_name} is already teaching {teacher_conflict_entry.subject.name} to {conflict_section} on {day_name}, Period {period_num}. Please select a different teacher or time slot.",
                 })
 
-            # Check section conflict: same section, same day, same period
-            section_conflict_entry = TimetableEntry.objects.filter(
-                timetable=timetable,
-                section=section,
-                day_of_week=day_of_week,
-                period_slot=period_slot
-            ).exclude(id=self.instance.id if self.instance else None).select_related(
-                "subject", "teacher"
+        # Check section conflict: same section, same day, same period
+        section_conflict_entry = slot_entries.filter(section=section).select_related(
+            "subject", "teacher"
+        ).first()
+
+        if section_conflict_entry:
+            section_name = f"{section.grade.name} - {section.name}"
+            existing_teacher = (
+                section_conflict_entry.teacher.full_name
+                if section_conflict_entry.teacher else "no teacher assigned"
+            )
+            return serializers.ValidationError({
+                "message": f"{section_name} already has {section_conflict_entry.subject.name} with {existing_teacher} on {day_name}, Period {period_num}. This section cannot have two classes at the same time.",
+            })
+
+        # Check room conflict if room is provided
+        if room:
+            room_conflict_entry = slot_entries.filter(room=room).select_related(
+                "section", "section__grade", "subject"
             ).first()
 
-            if section_conflict_entry:
-                section_name = f"{section.grade.name} - {section.name}"
-                raise serializers.ValidationError({
-                    "message": f"{section_name} already has {section_conflict_entry.subject.name} with {section_conflict_entry.teacher.full_name} on {day_name}, Period {period_num}. This section cannot have two classes at the same time.",
+            if room_conflict_entry:
+                conflict_section = f"{room_conflict_entry.section.grade.name} - {room_conflict_entry.section.name}"
+                return serializers.ValidationError({
+                    "message": f"{room.name} is already booked for {conflict_section} ({room_conflict_entry.subject.name}) on {day_name}, Period {period_num}. Please select a different room.",
                 })
 
-            # Check room conflict if room is provided
-            room = data.get("room")
-            if room:
-                room_conflict_entry = TimetableEntry.objects.filter(
-                    timetable=timetable,
-                    room=room,
-                    day_of_week=day_of_week,
-                    period_slot=period_slot
-                ).exclude(id=self.instance.id if self.instance else None).select_related(
-                    "section", "section__grade", "subject"
-                ).first()
-
-                if room_conflict_entry:
-                    conflict_section = f"{room_conflict_entry.section.grade.name} - {room_conflict_entry.section.name}"
-                    raise serializers.ValidationError({
-                        "message": f"{room.name} is already booked for {conflict_section} ({room_conflict_entry.subject.name}) on {day_name}, Period {period_num}. Please select a different room.",
-                    })
-
-        return data
+        return None
 
 
 class TimetableVersionSerializer(serializers.ModelSerializer):
@@ -430,6 +433,62 @@ class GenerateTimetableSerializer(serializers.Serializer):
         required=False,
         default=[0, 1, 2, 3, 4, 5]  # Mon-Sat
     )
+    portfolio_size = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=16,
+        default=1  # Seeded runs to pick the best timetable from
+    )
+    stop_on_success = serializers.BooleanField(required=False, default=False)
+    seed = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+    mode = serializers.ChoiceField(choices=MODES, required=False, default="greedy")
+    optimize_time_limit = serializers.FloatField(
+        required=False,
+        min_value=0,
+        max_value=60,
+        default=0  # Seconds of soft-constraint optimization after solving; 0 skips it
+    )
+    allow_partial = serializers.BooleanField(
+        required=False,
+        # Search even when the feasibility analysis proves some lessons cannot fit;
+        # false answers 400 with the feasibility report instead
+        default=True
+    )
+    warm_start_timetable_id = serializers.UUIDField(required=False, allow_null=True)
+    use_cache = serializers.BooleanField(
+        required=False,
+        # Return a stored result for identical inputs; false always searches,
+        # giving unseeded runs a fresh draw
+        default=True
+    )
+
+    def validate(self, data):
+        warm_start = data.get("warm_start_timetable_id")
+        if warm_start and not Timetable.objects.filter(id=warm_start, branch_id=data["branch_id"]).exists():
+            raise serializers.ValidationError({
+                "warm_start_timetable_id": "Timetable not found in this branch"
+            })
+        return data
+
+
+class GenerationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.UUIDField(source="id", read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GenerationJob
+        fields = [
+            "job_id", "branch", "status", "progress",
+            "progress_placed", "progress_total",
+            "timetable", "result", "errors",
+            "created_by", "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        if not obj.progress_total:
+            return 0
+        return round(obj.progress_placed / obj.progress_total * 100, 1)
 
 
 class PublishTimetableSerializer(serializers.Serializer):
@@ -440,3 +499,57 @@ class PublishTimetableSerializer(serializers.Serializer):
 
 class RestoreVersionSerializer(serializers.Serializer):
     change_note = serializers.CharField()
+
+
+class RegenerateTimetableSerializer(serializers.Serializer):
+    section_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        default=list  # Sections to re-solve besides those whose assignments changed
+    )
+    working_days = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        required=False  # Must match the timetable's stored working days if sent
+    )
+    seed = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+
+
+# Fields each batch entry operation requires
+ENTRY_OPERATION_FIELDS = {
+    "create": ("section_id", "subject_id", "day_of_week", "period_slot_id"),
+    "move": ("entry_id", "day_of_week", "period_slot_id"),
+    "swap": ("entry_id", "other_entry_id"),
+    "delete": ("entry_id",),
+}
+
+
+class EntryOperationSerializer(serializers.Serializer):
+    """
+    One grid edit: create an entry, move an entry to another slot, swap the
+    slots of two entries, or delete an entry.
+    """
+    op = serializers.ChoiceField(choices=list(ENTRY_OPERATION_FIELDS))
+    entry_id = serializers.UUIDField(required=False)
+    other_entry_id = serializers.UUIDField(required=False)  # Swap partner
+    section_id = serializers.UUIDField(required=False)
+    subject_id = serializers.UUIDField(required=False)
+    teacher_id = serializers.UUIDField(required=False, allow_null=True)
+    room_id = serializers.UUIDField(required=False, allow_null=True)
+    day_of_week = serializers.IntegerField(required=False, min_value=0, max_value=6)
+    period_slot_id = serializers.UUIDField(required=False)
+
+    def validate(self, data):
+        missing = [field for field in ENTRY_OPERATION_FIELDS[data["op"]] if field not in data]
+        if missing:
+            raise serializers.ValidationError({
+                field: f"This field is required for {data['op']}." for field in missing
+            })
+        return data
+
+
+class BatchEntryEditSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=EntryOperationSerializer(),
+        min_length=1,
+        max_length=500  # Applied in order, all or nothing
+    )
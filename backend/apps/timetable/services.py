@@ -0,0 +1,649 @@
+"""
+Timetable generation services shared by the API views and background tasks.
+"""
+
+import os
+import uuid
+from collections import defaultdict
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.academics.models import PeriodSlot
+from solver import ConflictDetector, GenerationResult, Problem, ScheduleEntry
+
+from .engine import TimetableGenerator, mark_slots_dirty
+from .models import Conflict, Timetable, TimetableEntry, TimetableStatus, default_working_days
+from .problem import find_period_template_id, load_problem
+
+# Rows per INSERT when bulk creating entries
+ENTRY_BATCH_SIZE = 500
+
+# TimetableEntry columns written when creating entries, in row order
+ENTRY_COPY_COLUMNS = (
+    "id", "timetable_id", "section_id", "day_of_week", "period_slot_id",
+    "subject_id", "teacher_id", "room_id", "created_at", "updated_at",
+)
+
+# TimetableEntry values a batch edit reads and writes
+BATCH_ENTRY_FIELDS = (
+    "id", "section_id", "subject_id", "teacher_id", "room_id", "day_of_week", "period_slot_id",
+)
+
+# Bytes psycopg2 reads per chunk when streaming entries with COPY
+COPY_CHUNK_SIZE = 64 * 1024
+
+# TimetableEntry values read to turn entries back into engine placements
+ENTRY_HINT_FIELDS = (
+    "id", "section_id", "day_of_week", "period_slot__period_number",
+    "subject_id", "teacher_id", "room_id",
+)
+
+
+def generation_parameters(data: dict) -> dict:
+    """JSON-safe copy of validated GenerateTimetableSerializer data"""
+    return {
+        "branch_id": str(data["branch_id"]),
+        "session_id": str(data["session_id"]),
+        "shift_id": str(data["shift_id"]),
+        "season_id": str(data["season_id"]) if data.get("season_id") else None,
+        "name": data["name"],
+        "description": data.get("description", ""),
+        "working_days": data.get("working_days", [0, 1, 2, 3, 4, 5]),
+        "portfolio_size": data.get("portfolio_size", 1),
+        "stop_on_success": data.get("stop_on_success", False),
+        "seed": data.get("seed"),
+        "mode": data.get("mode", "greedy"),
+        "optimize_time_limit": data.get("optimize_time_limit", 0),
+        "allow_partial": data.get("allow_partial", True),
+        "warm_start_timetable_id": (
+            str(data["warm_start_timetable_id"]) if data.get("warm_start_timetable_id") else None
+        ),
+        "use_cache": data.get("use_cache", True),
+    }
+
+
+def build_generator(params: dict, progress_callback=None) -> TimetableGenerator:
+    """Create a generator from generation parameters"""
+    generator = TimetableGenerator(
+        branch_id=params["branch_id"],
+        session_id=params["session_id"],
+        shift_id=params["shift_id"],
+        season_id=params.get("season_id"),
+        working_days=params.get("working_days", [0, 1, 2, 3, 4, 5]),
+        progress_callback=progress_callback,
+        workers=settings.TIMETABLE_GENERATION_WORKERS,
+        portfolio_size=params.get("portfolio_size", 1),
+        stop_on_success=params.get("stop_on_success", False),
+        seed=params.get("seed"),
+        mode=params.get("mode", "greedy"),
+        optimize_time_limit=params.get("optimize_time_limit", 0),
+        fail_fast=not params.get("allow_partial", True),
+        trace=bool(settings.TIMETABLE_GENERATION_TRACE_DIR),
+    )
+
+    if params.get("warm_start_timetable_id"):
+        problem = generator.load_problem()
+        if problem is not None:
+            generator.warm_start = load_warm_start(params["warm_start_timetable_id"], problem)
+
+    return generator
+
+
+def entry_hints(rows: list, problem: Problem) -> list:
+    """
+    Convert TimetableEntry rows (values of ENTRY_HINT_FIELDS) to
+    ((section_id, day, period), ScheduleEntry) pairs in problem indices.
+    Rows of sections outside the problem are skipped.
+    """
+    section_index = {section.id: i for i, section in enumerate(problem.sections)}
+    subject_index = {subject.id: i for i, subject in enumerate(problem.subjects)}
+    teacher_index = {teacher.id: i for i, teacher in enumerate(problem.teachers)}
+    room_index = {room.id: i for i, room in enumerate(problem.rooms)}
+
+    hints = []
+    for row in rows:
+        section = section_index.get(str(row["section_id"]))
+        if section is None:
+            continue
+        hints.append((
+            (section, row["day_of_week"], row["period_slot__period_number"]),
+            ScheduleEntry(
+                section_id=section,
+                subject_id=subject_index.get(str(row["subject_id"])),
+                teacher_id=teacher_index.get(str(row["teacher_id"])),
+                room_id=room_index.get(str(row["room_id"])),
+            ),
+        ))
+    return hints
+
+
+def load_warm_start(timetable_id: str, problem: Problem) -> list:
+    """Entries of an earlier timetable as warm-start placements for problem"""
+    rows = TimetableEntry.objects.filter(timetable_id=timetable_id).values(*ENTRY_HINT_FIELDS)
+    return entry_hints(rows, problem)
+
+
+def save_generation_trace(generator: TimetableGenerator, result: GenerationResult, name: str):
+    """Write the generator's decision trace to TIMETABLE_GENERATION_TRACE_DIR, if enabled"""
+    if generator.trace is None or generator.problem is None:
+        return None
+    if result.statistics.get("cache", {}).get("hit"):
+        return None  # Served from the cache; nothing was searched
+
+    os.makedirs(settings.TIMETABLE_GENERATION_TRACE_DIR, exist_ok=True)
+    path = os.path.join(settings.TIMETABLE_GENERATION_TRACE_DIR, f"{name}.json")
+    generator.dump_trace(path, result)
+    return path
+
+
+def get_period_slot_map(branch_id: str, shift_id: str, season_id: Optional[str] = None) -> dict:
+    """
+    Map period numbers to PeriodSlot IDs for the template a branch/shift/season
+    generates from. Resolved in two queries however many entries use it.
+    """
+    template_id = find_period_template_id(branch_id, shift_id, season_id)
+    if not template_id:
+        return {}
+
+    return dict(
+        PeriodSlot.objects.filter(template_id=template_id).values_list("period_number", "id")
+    )
+
+
+def schedule_entry_rows(timetable: Timetable, schedule: dict, slot_map: dict):
+    """Yield ENTRY_COPY_COLUMNS value tuples for schedule entries with a known period slot"""
+    now = timezone.now()
+    for entry_data in schedule.values():
+        period_slot_id = slot_map.get(entry_data["period_number"])
+        if period_slot_id:
+            yield (
+                uuid.uuid4(),
+                timetable.id,
+                entry_data["section_id"],
+                entry_data["day_of_week"],
+                period_slot_id,
+                entry_data["subject_id"],
+                entry_data["teacher_id"],
+                entry_data.get("room_id"),
+                now,
+                now,
+            )
+
+
+class CopyReader:
+    """
+    File-like reader over rows in COPY text format, producing lines only as
+    psycopg2 asks for them so the whole payload is never held in memory.
+    Values must not contain tabs, newlines or backslashes (UUIDs, integers
+    and timestamps); None is written as NULL.
+    """
+
+    def __init__(self, rows):
+        self.lines = (
+            "\t".join("\\N" if value is None else str(value) for value in row) + "\n"
+            for row in rows
+        )
+        self.buffer = ""
+        self.count = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self.buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self.buffer += line
+            self.count += 1
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def copy_schedule_entries(rows) -> int:
+    """Stream entry rows into timetable_entries with COPY FROM STDIN"""
+    sql = (
+        f"COPY {TimetableEntry._meta.db_table} ({', '.join(ENTRY_COPY_COLUMNS)}) FROM STDIN"
+    )
+    with connection.cursor() as cursor:
+        if hasattr(cursor.cursor, "copy_expert"):  # psycopg2
+            reader = CopyReader(rows)
+            cursor.copy_expert(sql, reader, size=COPY_CHUNK_SIZE)
+            return reader.count
+
+        count = 0
+        with cursor.copy(sql) as copy:  # psycopg 3
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+        return count
+
+
+def create_schedule_entries(timetable: Timetable, schedule: dict, slot_map: dict) -> int:
+    """
+    Create TimetableEntry rows from schedule data. On PostgreSQL the rows
+    are streamed with COPY, other databases use bulk_create. Returns the
+    number of rows created.
+    """
+    rows = schedule_entry_rows(timetable, schedule, slot_map)
+    if connection.vendor == "postgresql":
+        return copy_schedule_entries(rows)
+
+    entries = TimetableEntry.objects.bulk_create(
+        (TimetableEntry(**dict(zip(ENTRY_COPY_COLUMNS, row))) for row in rows),
+        batch_size=ENTRY_BATCH_SIZE,
+    )
+    return len(entries)
+
+
+def regenerate_timetable(
+    timetable: Timetable,
+    working_days: Optional[list] = None,
+    section_ids: Optional[list] = None,
+    seed: Optional[int] = None,
+) -> dict:
+    """
+    Re-solve only the sections of a timetable affected by assignment changes.
+
+    A section is dirty when its entries no longer match its active
+    assignments (subject, teacher and weekly periods), when one of its
+    entries sits outside the timetable's working days or the template's
+    teaching periods, or when it is listed in section_ids. Every other
+    entry stays pinned.
+
+    working_days, when given, must be the days the timetable was generated
+    with; the stored days are always used. If the dirty sections
+    cannot be completed around them, sections sharing a teacher with the
+    changed assignments are re-solved too. Only rows that differ are written.
+    """
+    if working_days is not None and sorted(set(working_days)) != sorted(timetable.working_days):
+        return {"errors": [
+            f"working_days must be the days this timetable was generated with: {timetable.working_days}"
+        ]}
+
+    problem = load_problem(
+        branch_id=timetable.branch_id,
+        session_id=timetable.session_id,
+        shift_id=timetable.shift_id,
+        season_id=timetable.season_id,
+        working_days=timetable.working_days,
+    )
+    if problem is None:
+        return {"errors": ["No period template found for the given configuration"]}
+
+    section_index = {section.id: i for i, section in enumerate(problem.sections)}
+    rows = list(timetable.entries.values(*ENTRY_HINT_FIELDS))
+    entries = entry_hints(rows, problem)
+
+    # Compare what each section is taught with what its assignments require
+    expected = defaultdict(lambda: defaultdict(int))  # {section: {(subject, teacher): n}}
+    for assignment in problem.assignments:
+        teacher = problem.teachers[assignment.teacher].id if assignment.teacher is not None else None
+        expected[problem.sections[assignment.section].id][
+            (problem.subjects[assignment.subject].id, teacher)
+        ] += assignment.weekly_periods
+
+    actual = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        actual[str(row["section_id"])][
+            (str(row["subject_id"]), str(row["teacher_id"]) if row["teacher_id"] else None)
+        ] += 1
+
+    dirty = {str(section_id) for section_id in section_ids or []} & section_index.keys()
+
+    # Lessons on a day or period no longer in use are re-placed
+    periods = {slot.period_number for slot in problem.slots}
+    dirty.update(
+        str(row["section_id"]) for row in rows
+        if row["day_of_week"] not in problem.working_days
+        or row["period_slot__period_number"] not in periods
+    )
+    dirty &= section_index.keys()
+    affected_teachers = set()
+    for section_id in section_index:
+        if expected[section_id] != actual[section_id]:
+            dirty.add(section_id)
+            changed = expected[section_id].keys() ^ actual[section_id].keys() | {
+                key for key in expected[section_id].keys() & actual[section_id].keys()
+                if expected[section_id][key] != actual[section_id][key]
+            }
+            affected_teachers.update(teacher for _, teacher in changed if teacher)
+
+    if not dirty:
+        return {"dirty_sections": [], "affected_teachers": [], "result": None, "changes": {}}
+
+    def solve(dirty_sections):
+        dirty_indices = {section_index[s] for s in dirty_sections}
+        pinned = []
+        hints = []
+        for key, entry in entries:
+            (hints if key[0] in dirty_indices else pinned).append((key, entry))
+
+        generator = TimetableGenerator(
+            branch_id=str(timetable.branch_id),
+            session_id=str(timetable.session_id),
+            shift_id=str(timetable.shift_id),
+            problem=problem,
+            seed=seed,
+        )
+        return generator.regenerate(pinned, dirty_indices, hints)
+
+    result = solve(dirty)
+    if not result.success and not result.errors:
+        # Let the affected teachers' other sections move to make room
+        expanded = set(dirty)
+        for assignment in problem.assignments:
+            if (
+                assignment.teacher is not None
+                and problem.teachers[assignment.teacher].id in affected_teachers
+            ):
+                expanded.add(problem.sections[assignment.section].id)
+        if expanded != dirty:
+            retry = solve(expanded)
+            if retry.statistics["failed"] < result.statistics["failed"]:
+                dirty, result = expanded, retry
+
+    if result.errors:
+        return {"errors": result.errors}
+
+    changes = save_regenerated_entries(timetable, rows, result, dirty)
+    return {
+        "dirty_sections": sorted(dirty),
+        "affected_teachers": sorted(affected_teachers),
+        "result": result,
+        "changes": changes,
+    }
+
+
+def save_regenerated_entries(timetable: Timetable, rows: list, result: GenerationResult, dirty: set) -> dict:
+    """Write back only the entries of the dirty sections that changed"""
+    slot_map = get_period_slot_map(timetable.branch_id, timetable.shift_id, timetable.season_id)
+
+    existing = {
+        f"{row['section_id']}_{row['day_of_week']}_{row['period_slot__period_number']}": row
+        for row in rows if str(row["section_id"]) in dirty
+    }
+    wanted = {
+        key: entry for key, entry in result.schedule.items()
+        if entry["section_id"] in dirty
+    }
+
+    now = timezone.now()
+    to_delete = []
+    to_update = []
+    to_create = {}
+    changed_slots = []  # (day_of_week, period_number) of every written entry
+    for key, row in existing.items():
+        if key not in wanted:
+            to_delete.append(row["id"])
+            changed_slots.append((row["day_of_week"], row["period_slot__period_number"]))
+    for key, entry in wanted.items():
+        row = existing.get(key)
+        if row is None:
+            to_create[key] = entry
+            changed_slots.append((entry["day_of_week"], entry["period_number"]))
+        elif (
+            str(row["subject_id"]) != entry["subject_id"]
+            or str(row["teacher_id"]) != str(entry["teacher_id"])
+            or (str(row["room_id"]) if row["room_id"] else None) != entry["room_id"]
+        ):
+            to_update.append(TimetableEntry(
+                id=row["id"],
+                subject_id=entry["subject_id"],
+                teacher_id=entry["teacher_id"],
+                room_id=entry["room_id"],
+                updated_at=now,
+            ))
+            changed_slots.append((entry["day_of_week"], entry["period_number"]))
+
+    with transaction.atomic():
+        TimetableEntry.objects.filter(id__in=to_delete).delete()
+        # Release the old teacher and room bookings first: the unique slot
+        # constraints are checked row by row, so swapping them in one
+        # UPDATE could clash midway
+        TimetableEntry.objects.filter(id__in=[entry.id for entry in to_update]).update(
+            teacher=None, room=None
+        )
+        TimetableEntry.objects.bulk_update(
+            to_update, ["subject", "teacher", "room", "updated_at"], batch_size=ENTRY_BATCH_SIZE
+        )
+        create_schedule_entries(timetable, to_create, slot_map)
+        mark_slots_dirty(timetable.id, [
+            (day, slot_map[period]) for day, period in changed_slots if period in slot_map
+        ])
+
+        timetable.schedule_data = result.schedule
+        timetable.save(update_fields=["schedule_data", "updated_at"])
+
+        # Generation failures are recomputed for the whole timetable
+        timetable.conflicts.filter(conflict_type="generation_failure").delete()
+        create_generation_conflicts(timetable, result, slot_map)
+
+    return {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "deleted": len(to_delete),
+        "unchanged": len(wanted) - len(to_create) - len(to_update),
+    }
+
+
+def create_generation_conflicts(timetable: Timetable, result: GenerationResult, slot_map: dict):
+    """Record unplaced lessons as conflicts, filed under the first period"""
+    if not result.conflicts or not slot_map:
+        return
+    first_slot_id = slot_map[min(slot_map)]
+    Conflict.objects.bulk_create([
+        Conflict(
+            timetable=timetable,
+            conflict_type="generation_failure",
+            day_of_week=0,
+            period_slot_id=first_slot_id,
+            description=f"{conflict['section']} - {conflict['subject']}: {conflict['reason']}",
+        )
+        for conflict in result.conflicts
+    ], batch_size=ENTRY_BATCH_SIZE)
+
+
+def save_generated_timetable(params: dict, result: GenerationResult, user) -> Timetable:
+    """Create a draft timetable with its entries and generation conflicts"""
+    slot_map = get_period_slot_map(
+        params["branch_id"], params["shift_id"], params.get("season_id")
+    )
+
+    with transaction.atomic():
+        timetable = Timetable.objects.create(
+            branch_id=params["branch_id"],
+            session_id=params["session_id"],
+            shift_id=params["shift_id"],
+            season_id=params.get("season_id"),
+            name=params["name"],
+            description=params.get("description", ""),
+            status=TimetableStatus.DRAFT,
+            schedule_data=result.schedule,
+            working_days=sorted(set(params.get("working_days", default_working_days()))),
+            created_by=user,
+        )
+
+        create_schedule_entries(timetable, result.schedule, slot_map)
+
+        # Generation failures have no slot of their own; file them under the first period
+        create_generation_conflicts(timetable, result, slot_map)
+
+    return timetable
+
+
+def apply_entry_batch(timetable: Timetable, operations: list) -> dict:
+    """
+    Apply validated EntryOperationSerializer operations to a timetable's
+    entries, in order, as one change. Entries can only be placed on the
+    timetable's working days and in the period slots of its template.
+
+    The final slot of every created or changed entry is checked in a
+    ConflictDetector loaded once with the other entries of the sections,
+    teachers and rooms involved, so cells can trade places without a
+    temporary clash. Nothing is written if a clash remains. Returns
+    {"errors": [...]} for invalid operations, otherwise the changes and
+    the clashes found.
+    """
+    referenced = {
+        op[key] for op in operations for key in ("entry_id", "other_entry_id") if key in op
+    }
+    original = {
+        row["id"]: row
+        for row in timetable.entries.filter(id__in=referenced).values(*BATCH_ENTRY_FIELDS)
+    }
+
+    state = {entry_id: dict(row) for entry_id, row in original.items()}
+    created = []
+    deleted = []
+    errors = []
+    for index, op in enumerate(operations):
+        missing = [
+            op[key] for key in ("entry_id", "other_entry_id") if key in op and op[key] not in state
+        ]
+        if missing:
+            errors.append(f"Operation {index}: entry {missing[0]} not found in this timetable")
+            continue
+
+        if "day_of_week" in op and op["day_of_week"] not in timetable.working_days:
+            errors.append(f"Operation {index}: day {op['day_of_week']} is not a working day")
+            continue
+
+        if op["op"] == "create":
+            entry_id = uuid.uuid4()
+            state[entry_id] = {
+                "id": entry_id,
+                "section_id": op["section_id"],
+                "subject_id": op["subject_id"],
+                "teacher_id": op.get("teacher_id"),
+                "room_id": op.get("room_id"),
+                "day_of_week": op["day_of_week"],
+                "period_slot_id": op["period_slot_id"],
+            }
+            created.append(entry_id)
+        elif op["op"] == "move":
+            entry = state[op["entry_id"]]
+            entry["day_of_week"] = op["day_of_week"]
+            entry["period_slot_id"] = op["period_slot_id"]
+            for field in ("teacher_id", "room_id"):
+                if field in op:
+                    entry[field] = op[field]
+        elif op["op"] == "swap":
+            entry, other = state[op["entry_id"]], state[op["other_entry_id"]]
+            for field in ("day_of_week", "period_slot_id"):
+                entry[field], other[field] = other[field], entry[field]
+        else:
+            entry_id = op["entry_id"]
+            del state[entry_id]
+            if entry_id in created:
+                created.remove(entry_id)
+            else:
+                deleted.append(entry_id)
+
+    if errors:
+        return {"errors": errors}
+
+    updated = [
+        entry_id for entry_id in original
+        if entry_id in state and state[entry_id] != original[entry_id]
+    ]
+    changed = [state[entry_id] for entry_id in updated + created]
+
+    periods = {
+        slot_id: period_number
+        for period_number, slot_id in get_period_slot_map(
+            timetable.branch_id, timetable.shift_id, timetable.season_id
+        ).items()
+    }
+    unknown_slots = {entry["period_slot_id"] for entry in changed} - periods.keys()
+    if unknown_slots:
+        return {"errors": [
+            f"Period slot {slot_id} is not part of this timetable's period template"
+            for slot_id in unknown_slots
+        ]}
+
+    def as_key(value):
+        return str(value) if value is not None else None
+
+    involved = (
+        Q(section_id__in={entry["section_id"] for entry in changed})
+        | Q(teacher_id__in={entry["teacher_id"] for entry in changed if entry["teacher_id"]})
+        | Q(room_id__in={entry["room_id"] for entry in changed if entry["room_id"]})
+    )
+    unchanged = list(timetable.entries.filter(involved).exclude(id__in=updated + deleted).values(
+        *BATCH_ENTRY_FIELDS, "period_slot__period_number"
+    ))
+    # Slot bits must not overlap the next day's, however many periods the template has
+    detector = ConflictDetector(period_stride=max(
+        [*periods.values(), *(row["period_slot__period_number"] for row in unchanged)], default=0
+    ) + 1)
+    for row in unchanged:
+        detector.assign(
+            teacher_id=as_key(row["teacher_id"]),
+            section_id=as_key(row["section_id"]),
+            subject_id=as_key(row["subject_id"]),
+            day=row["day_of_week"],
+            period=row["period_slot__period_number"],
+            room_id=as_key(row["room_id"]),
+        )
+
+    conflicts = []
+    for entry in changed:
+        slot = {
+            "teacher_id": as_key(entry["teacher_id"]),
+            "section_id": as_key(entry["section_id"]),
+            "day": entry["day_of_week"],
+            "period": periods[entry["period_slot_id"]],
+            "room_id": as_key(entry["room_id"]),
+        }
+        can_assign, entry_conflicts = detector.can_assign(**slot)
+        if not can_assign:
+            for conflict in entry_conflicts:
+                conflict["entry_id"] = str(entry["id"])
+                conflicts.append(conflict)
+        else:
+            detector.assign(subject_id=as_key(entry["subject_id"]), **slot)
+
+    changes = {
+        "created": [str(entry_id) for entry_id in created],
+        "updated": [str(entry_id) for entry_id in updated],
+        "deleted": [str(entry_id) for entry_id in deleted],
+    }
+    if conflicts:
+        return {"changes": changes, "conflicts": conflicts}
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            TimetableEntry.objects.filter(id__in=deleted).delete()
+            # Park updated entries on distinct negative days first: the unique
+            # slot constraints are checked row by row, so entries trading
+            # slots would otherwise clash midway
+            TimetableEntry.objects.bulk_update(
+                [TimetableEntry(id=entry_id, day_of_week=-1 - i) for i, entry_id in enumerate(updated)],
+                ["day_of_week"],
+                batch_size=ENTRY_BATCH_SIZE,
+            )
+            TimetableEntry.objects.bulk_update(
+                [TimetableEntry(**state[entry_id], updated_at=now) for entry_id in updated],
+                [field for field in BATCH_ENTRY_FIELDS if field != "id"] + ["updated_at"],
+                batch_size=ENTRY_BATCH_SIZE,
+            )
+            TimetableEntry.objects.bulk_create(
+                [TimetableEntry(timetable=timetable, **state[entry_id]) for entry_id in created],
+                batch_size=ENTRY_BATCH_SIZE,
+            )
+            mark_slots_dirty(timetable.id, [
+                (entry["day_of_week"], entry["period_slot_id"])
+                for entry in [original[entry_id] for entry_id in updated + deleted] + changed
+            ])
+    except IntegrityError:
+        return {"errors": [
+            "A referenced section, subject, teacher or room does not exist, "
+            "or the timetable changed meanwhile"
+        ]}
+
+    return {"changes": changes, "conflicts": []}
@@ -0,0 +1,36 @@
+"""
+Keep stored timetable validation honest when entries change outside the
+entry API: deleting a referenced teacher, room, section, subject or period
+slot cascades to (or detaches) entries without calling their delete().
+"""
+
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from apps.academics.models import PeriodSlot, Room, Section, Subject, Teacher
+
+from .engine import invalidate_validation
+from .models import Timetable, TimetableEntry
+
+# {referenced model: TimetableEntry field}
+ENTRY_REFERENCES = {
+    Teacher: "teacher",
+    Room: "room",
+    Section: "section",
+    Subject: "subject",
+    PeriodSlot: "period_slot",
+}
+
+
+@receiver(pre_delete, sender=Teacher)
+@receiver(pre_delete, sender=Room)
+@receiver(pre_delete, sender=Section)
+@receiver(pre_delete, sender=Subject)
+@receiver(pre_delete, sender=PeriodSlot)
+def invalidate_on_reference_delete(sender, instance, **kwargs):
+    """Rescan timetables whose entries lose the deleted object"""
+    invalidate_validation(Timetable.objects.filter(
+        id__in=TimetableEntry.objects.filter(
+            **{ENTRY_REFERENCES[sender]: instance}
+        ).values("timetable_id")
+    ))
@@ -0,0 +1,112 @@
+"""
+Background tasks for timetable generation.
+"""
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import generate_cached
+from .models import GenerationJob, GenerationJobStatus
+from .services import build_generator, save_generated_timetable, save_generation_trace
+
+logger = logging.getLogger(__name__)
+
+# Short publish retries, so an unreachable broker falls back to running
+# in-process within a second instead of blocking the request
+PUBLISH_RETRY_POLICY = {
+    "max_retries": 2,
+    "interval_start": 0,
+    "interval_step": 0.2,
+    "interval_max": 0.2,
+}
+
+
+@shared_task(bind=True, ignore_result=True)
+def run_generation_job(self, job_id: str):
+    """Run the generation engine for a job and save the resulting timetable"""
+    job = GenerationJob.objects.select_related("created_by").get(id=job_id)
+    if job.status != GenerationJobStatus.PENDING:
+        return
+
+    job.status = GenerationJobStatus.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    def report_progress(placed, total):
+        GenerationJob.objects.filter(id=job.id).update(
+            progress_placed=placed,
+            progress_total=total,
+        )
+
+    try:
+        generator = build_generator(job.parameters, progress_callback=report_progress)
+        result = generate_cached(
+            generator, job.parameters.get("seed"), job.parameters.get("use_cache", True)
+        )
+        save_generation_trace(generator, result, f"job-{job.id}")
+
+        if not result.success and result.errors:
+            job.status = GenerationJobStatus.FAILED
+            job.errors = result.errors
+            job.result = {"statistics": result.statistics}
+        else:
+            job.timetable = save_generated_timetable(job.parameters, result, job.created_by)
+            job.status = GenerationJobStatus.COMPLETED
+            job.result = {
+                "success": result.success,
+                "statistics": result.statistics,
+                "conflicts": result.conflicts,
+            }
+            job.progress_placed = result.statistics["filled"]
+            job.progress_total = result.statistics["total_requirements"]
+    except Exception as exc:
+        logger.exception("Timetable generation job %s failed", job.id)
+        job.status = GenerationJobStatus.FAILED
+        job.errors = [str(exc)]
+
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def enqueue_generation_job(job: GenerationJob):
+    """
+    Dispatch a job to the Celery workers.
+    Runs it in-process instead when tasks are eager, no broker is
+    configured or the job cannot be published.
+
+    The task ignores its result (progress and outcome live on the job),
+    so publishing never waits on the result backend.
+    """
+    if settings.CELERY_TASK_ALWAYS_EAGER or not settings.CELERY_BROKER_URL:
+        run_generation_job_in_process(job)
+        return
+
+    try:
+        async_result = run_generation_job.apply_async(
+            args=[str(job.id)], retry=True, retry_policy=PUBLISH_RETRY_POLICY
+        )
+    except Exception:
+        logger.warning(
+            "Could not publish generation job %s, running it in-process", job.id, exc_info=True
+        )
+        run_generation_job_in_process(job)
+        return
+
+    GenerationJob.objects.filter(id=job.id).update(celery_task_id=async_result.id)
+
+
+def run_generation_job_in_process(job: GenerationJob):
+    """Run a job in this process, marking it failed if the task itself errors"""
+    outcome = run_generation_job.apply(args=[str(job.id)])
+    if outcome.failed():
+        logger.error("Generation job %s failed in-process: %s", job.id, outcome.result)
+        GenerationJob.objects.filter(id=job.id).exclude(
+            status=GenerationJobStatus.COMPLETED
+        ).update(
+            status=GenerationJobStatus.FAILED,
+            errors=[str(outcome.result)],
+            finished_at=timezone.now(),
+        )
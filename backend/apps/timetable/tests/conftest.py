@@ -0,0 +1,134 @@
+from datetime import date, time
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.academics.models import (
+    Assignment,
+    Grade,
+    PeriodSlot,
+    PeriodTemplate,
+    Room,
+    Section,
+    Subject,
+    Teacher,
+    TeacherAvailability,
+)
+from apps.accounts.models import User, UserRole
+from apps.org.models import Branch, School, Session, Shift
+from apps.timetable.models import Timetable
+
+SUBJECT_NAMES = ("Mathematics", "English", "Science")
+
+
+@pytest.fixture
+def make_branch(db):
+    """
+    Build a branch with num_sections sections of one grade, each taught
+    every subject by its own teacher, on a template of num_periods periods
+    """
+
+    def make(num_sections=2, num_periods=6, weekly_periods=4, code="MAIN"):
+        school = School.objects.create(name=f"School {code}", code=code)
+        branch = Branch.objects.create(school=school, name=code.title(), code=code)
+        session = Session.objects.create(
+            branch=branch, name="2026-27", start_date=date(2026, 4, 1), end_date=date(2027, 3, 31)
+        )
+        shift = Shift.objects.create(
+            branch=branch, name="Morning", start_time=time(8, 0), end_time=time(14, 0)
+        )
+        template = PeriodTemplate.objects.create(branch=branch, shift=shift, name="Morning")
+        slots = [
+            PeriodSlot.objects.create(
+                template=template,
+                period_number=number,
+                name=f"Period {number}",
+                start_time=time(7 + number, 0),
+                end_time=time(7 + number, 45),
+                duration_minutes=45,
+            )
+            for number in range(1, num_periods + 1)
+        ]
+        room = Room.objects.create(branch=branch, name="Lab", code="LAB", room_type="lab")
+
+        grade = Grade.objects.create(branch=branch, name="Grade 1", code="G1")
+        subjects = [
+            Subject.objects.create(branch=branch, name=name, code=name[:3].upper())
+            for name in SUBJECT_NAMES
+        ]
+        sections = []
+        teachers = []
+        for i in range(num_sections):
+            section = Section.objects.create(grade=grade, shift=shift, name=f"S{i}", code=f"S{i}")
+            sections.append(section)
+            for subject in subjects:
+                teacher = Teacher.objects.create(
+                    branch=branch,
+                    employee_code=f"T{i}-{subject.code}",
+                    first_name=subject.name,
+                    last_name=f"Teacher {i}",
+                )
+                teachers.append(teacher)
+                TeacherAvailability.objects.create(
+                    teacher=teacher, day_of_week=0, start_time=time(8, 0), end_time=time(14, 0)
+                )
+                Assignment.objects.create(
+                    section=section,
+                    subject=subject,
+                    session=session,
+                    teacher=teacher,
+                    weekly_periods=weekly_periods,
+                )
+
+        return SimpleNamespace(
+            school=school,
+            branch=branch,
+            session=session,
+            shift=shift,
+            template=template,
+            slots=slots,
+            room=room,
+            grade=grade,
+            subjects=subjects,
+            sections=sections,
+            teachers=teachers,
+        )
+
+    return make
+
+
+@pytest.fixture
+def admin_user(db):
+    return User.objects.create_user(
+        email="admin@example.com",
+        password="Admin@123",
+        first_name="Admin",
+        last_name="User",
+        role=UserRole.SUPER_ADMIN,
+    )
+
+
+@pytest.fixture
+def api_client(admin_user):
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    return client
+
+
+@pytest.fixture
+def generate(api_client):
+    """Generate a timetable for a make_branch branch through the API"""
+
+    def run(data, **params):
+        response = api_client.post("/api/v1/timetables/generate/", {
+            "branch_id": str(data.branch.id),
+            "session_id": str(data.session.id),
+            "shift_id": str(data.shift.id),
+            "name": "Test timetable",
+            **params,
+        }, format="json")
+        assert response.status_code == 201, response.data
+        return Timetable.objects.get(id=response.data["timetable_id"])
+
+    return run
@@ -0,0 +1,144 @@
+import pytest
+
+from apps.timetable.models import TimetableEntry
+
+
+@pytest.fixture
+def data(make_branch):
+    return make_branch(2)
+
+
+@pytest.fixture
+def timetable(data, generate):
+    return generate(data, working_days=[0, 1, 2, 3, 4])
+
+
+def batch(api_client, timetable, *operations):
+    return api_client.post(
+        f"/api/v1/timetables/{timetable.id}/entries/batch/",
+        {"operations": list(operations)},
+        format="json",
+    )
+
+
+def cells(timetable):
+    return set(timetable.entries.values_list("id", "day_of_week", "period_slot_id", "teacher_id"))
+
+
+def free_cell(timetable, data, section):
+    """A working day and period slot where the section has no lesson"""
+    taken = set(timetable.entries.filter(section=section).values_list("day_of_week", "period_slot_id"))
+    return next(
+        (day, slot) for day in timetable.working_days for slot in data.slots
+        if (day, slot.id) not in taken
+    )
+
+
+def move(entry, day, slot):
+    return {"op": "move", "entry_id": str(entry.id), "day_of_week": day, "period_slot_id": str(slot.id)}
+
+
+@pytest.mark.django_db
+def test_swap_trades_slots(api_client, timetable, data):
+    # Each teacher teaches one section, so two lessons of a section can always trade places
+    first, second = timetable.entries.filter(section=data.sections[0])[:2]
+
+    response = batch(api_client, timetable, {
+        "op": "swap", "entry_id": str(first.id), "other_entry_id": str(second.id),
+    })
+
+    assert response.status_code == 200, response.data
+    assert set(response.data["changes"]["updated"]) == {str(first.id), str(second.id)}
+    first_now = TimetableEntry.objects.get(id=first.id)
+    second_now = TimetableEntry.objects.get(id=second.id)
+    assert (first_now.day_of_week, first_now.period_slot_id) == (second.day_of_week, second.period_slot_id)
+    assert (second_now.day_of_week, second_now.period_slot_id) == (first.day_of_week, first.period_slot_id)
+
+
+@pytest.mark.django_db
+def test_move_to_a_free_cell(api_client, timetable, data):
+    entry = timetable.entries.filter(section=data.sections[0]).first()
+    day, slot = free_cell(timetable, data, data.sections[0])
+
+    response = batch(api_client, timetable, move(entry, day, slot))
+
+    assert response.status_code == 200, response.data
+    entry.refresh_from_db()
+    assert (entry.day_of_week, entry.period_slot_id) == (day, slot.id)
+
+
+@pytest.mark.django_db
+def test_move_into_an_occupied_cell_is_rejected(api_client, timetable, data):
+    entry, occupant = timetable.entries.filter(section=data.sections[0])[:2]
+    before = cells(timetable)
+
+    response = batch(api_client, timetable, move(entry, occupant.day_of_week, occupant.period_slot))
+
+    assert response.status_code == 400
+    assert {conflict["type"] for conflict in response.data["conflicts"]} == {"section_overlap"}
+    assert cells(timetable) == before
+
+
+@pytest.mark.django_db
+def test_delete_and_create_in_the_same_cell(api_client, timetable, data):
+    entry = timetable.entries.filter(section=data.sections[0]).first()
+    count = timetable.entries.count()
+
+    response = batch(api_client, timetable, {"op": "delete", "entry_id": str(entry.id)}, {
+        "op": "create",
+        "section_id": str(entry.section_id),
+        "subject_id": str(entry.subject_id),
+        "teacher_id": None,
+        "day_of_week": entry.day_of_week,
+        "period_slot_id": str(entry.period_slot_id),
+    })
+
+    assert response.status_code == 200, response.data
+    assert not TimetableEntry.objects.filter(id=entry.id).exists()
+    replacement = timetable.entries.get(id=response.data["changes"]["created"][0])
+    assert (replacement.day_of_week, replacement.period_slot_id) == (entry.day_of_week, entry.period_slot_id)
+    assert replacement.teacher_id is None
+    assert timetable.entries.count() == count
+
+
+@pytest.mark.django_db
+def test_batch_with_a_conflict_changes_nothing(api_client, timetable, data):
+    entry, other, occupant = timetable.entries.filter(section=data.sections[0])[:3]
+    day, slot = free_cell(timetable, data, data.sections[0])
+    before = cells(timetable)
+
+    response = batch(
+        api_client, timetable,
+        move(entry, day, slot),
+        {"op": "delete", "entry_id": str(other.id)},
+        move(occupant, day, slot),  # Lands on the first move
+    )
+
+    assert response.status_code == 400
+    assert response.data["conflicts"]
+    assert cells(timetable) == before
+
+
+@pytest.mark.django_db
+def test_move_to_a_day_outside_the_working_days_is_rejected(api_client, timetable, data):
+    entry = timetable.entries.first()
+    before = cells(timetable)
+
+    response = batch(api_client, timetable, move(entry, 5, data.slots[0]))
+
+    assert response.status_code == 400
+    assert response.data["errors"] == ["Operation 0: day 5 is not a working day"]
+    assert cells(timetable) == before
+
+
+@pytest.mark.django_db
+def test_move_to_another_templates_slot_is_rejected(api_client, timetable, make_branch):
+    other = make_branch(1, code="OTHER")
+    entry = timetable.entries.first()
+    before = cells(timetable)
+
+    response = batch(api_client, timetable, move(entry, entry.day_of_week, other.slots[0]))
+
+    assert response.status_code == 400
+    assert "not part of this timetable's period template" in response.data["errors"][0]
+    assert cells(timetable) == before
@@ -0,0 +1,79 @@
+import pytest
+
+from apps.timetable.cache import generate_cached
+from apps.timetable.models import GenerationCacheEntry
+from apps.timetable.services import build_generator, generation_parameters
+
+
+@pytest.fixture(autouse=True)
+def database_cache(settings):
+    settings.TIMETABLE_GENERATION_CACHE_URL = ""
+    settings.TIMETABLE_GENERATION_CACHE_MAX_ENTRIES = 10
+
+
+def parameters(data, **overrides):
+    return generation_parameters({
+        "branch_id": data.branch.id,
+        "session_id": data.session.id,
+        "shift_id": data.shift.id,
+        "name": "Cached",
+        **overrides,
+    })
+
+
+@pytest.mark.django_db
+def test_complete_result_is_reused(make_branch):
+    params = parameters(make_branch(), seed=1)
+
+    first = generate_cached(build_generator(params), params["seed"])
+    second = generate_cached(build_generator(params), params["seed"])
+
+    assert first.success
+    assert first.statistics["cache"]["hit"] is False
+    assert second.statistics["cache"]["hit"] is True
+    assert second.schedule == first.schedule
+
+
+@pytest.mark.django_db
+def test_partial_result_is_not_stored(make_branch):
+    # 3 subjects x 13 periods do not fit in 6 days x 6 periods
+    params = parameters(make_branch(num_sections=1, weekly_periods=13), seed=1)
+
+    result = generate_cached(build_generator(params), params["seed"])
+
+    assert not result.success
+    assert result.conflicts
+    assert not GenerationCacheEntry.objects.exists()
+    again = generate_cached(build_generator(params), params["seed"])
+    assert again.statistics["cache"]["hit"] is False
+
+
+@pytest.mark.django_db
+def test_use_cache_false_searches_again(make_branch):
+    params = parameters(make_branch())
+    generate_cached(build_generator(params))
+
+    result = generate_cached(build_generator(params), use_cache=False)
+
+    assert result.statistics["cache"]["hit"] is False
+    assert GenerationCacheEntry.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_generate_endpoint_passes_use_cache(make_branch, api_client):
+    data = make_branch()
+    body = {
+        "branch_id": str(data.branch.id),
+        "session_id": str(data.session.id),
+        "shift_id": str(data.shift.id),
+        "name": "Fresh",
+    }
+    api_client.post("/api/v1/timetables/generate/", body, format="json")
+
+    cached = api_client.post("/api/v1/timetables/generate/", body, format="json")
+    fresh = api_client.post(
+        "/api/v1/timetables/generate/", {**body, "use_cache": False}, format="json"
+    )
+
+    assert cached.data["statistics"]["cache"]["hit"] is True
+    assert fresh.data["statistics"]["cache"]["hit"] is False
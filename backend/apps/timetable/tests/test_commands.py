@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from apps.timetable.models import Timetable, TimetableEntry
+
+
+@pytest.fixture
+def double_booked(make_branch):
+    """Two sections sharing a teacher and the lab on Monday, Period 1, as before migration 0007"""
+    with connection.cursor() as cursor:
+        # Partial unique constraints are unique indexes; dropped for this test's transaction
+        cursor.execute("DROP INDEX timetable_entry_unique_teacher_slot")
+        cursor.execute("DROP INDEX timetable_entry_unique_room_slot")
+
+    data = make_branch()
+    data.timetable = Timetable.objects.create(
+        branch=data.branch, session=data.session, shift=data.shift, name="Legacy",
+        validated_conflicts=[],
+    )
+    data.entries = [
+        TimetableEntry.objects.create(
+            timetable=data.timetable,
+            section=section,
+            day_of_week=0,
+            period_slot=data.slots[0],
+            subject=data.subjects[0],
+            teacher=data.teachers[0],
+            room=data.room,
+        )
+        for section in data.sections
+    ]
+    TimetableEntry.objects.filter(id=data.entries[1].id).update(
+        created_at=data.entries[0].created_at + timedelta(seconds=1)
+    )
+    return data
+
+
+@pytest.mark.django_db
+def test_release_clashing_bookings_lists_without_apply(double_booked):
+    call_command("release_clashing_bookings")
+
+    assert TimetableEntry.objects.filter(teacher__isnull=False, room__isnull=False).count() == 2
+
+
+@pytest.mark.django_db
+def test_release_clashing_bookings_keeps_the_earliest_booking(double_booked):
+    kept, released = double_booked.entries
+
+    call_command("release_clashing_bookings", "--apply")
+
+    kept.refresh_from_db()
+    released.refresh_from_db()
+    assert (kept.teacher, kept.room) == (double_booked.teachers[0], double_booked.room)
+    assert (released.teacher, released.room) == (None, None)
+    assert Timetable.objects.get(id=double_booked.timetable.id).validated_conflicts is None
@@ -0,0 +1,84 @@
+import pytest
+
+from apps.timetable.models import Timetable, TimetableEntry
+
+ENTRIES_URL = "/api/v1/timetables/entries/"
+
+
+@pytest.fixture
+def booked(make_branch):
+    """A timetable with Grade 1 - S0's Mathematics in the lab on Monday, Period 1"""
+    data = make_branch()
+    data.timetable = Timetable.objects.create(
+        branch=data.branch, session=data.session, shift=data.shift, name="Edited"
+    )
+    data.entry = TimetableEntry.objects.create(
+        timetable=data.timetable,
+        section=data.sections[0],
+        day_of_week=0,
+        period_slot=data.slots[0],
+        subject=data.subjects[0],
+        teacher=data.teachers[0],
+        room=data.room,
+    )
+    return data
+
+
+def entry_body(data, section, subject, teacher, room=None, period=0):
+    return {
+        "timetable": str(data.timetable.id),
+        "section": str(data.sections[section].id),
+        "day_of_week": 0,
+        "period_slot": str(data.slots[period].id),
+        "subject": str(data.subjects[subject].id),
+        "teacher": str(data.teachers[teacher].id),
+        "room": str(data.room.id) if room else None,
+    }
+
+
+# (section, subject, teacher index, room) of the clashing entry, and the message
+CLASHES = {
+    "teacher": (
+        (1, 0, 0, False),
+        "Mathematics Teacher 0 is already teaching Mathematics to Grade 1 - S0 on Monday, "
+        "Period 1. Please select a different teacher or time slot.",
+    ),
+    "section": (
+        (0, 1, 1, False),
+        "Grade 1 - S0 already has Mathematics with Mathematics Teacher 0 on Monday, Period 1. "
+        "This section cannot have two classes at the same time.",
+    ),
+    "room": (
+        (1, 1, 4, True),
+        "Lab is already booked for Grade 1 - S0 (Mathematics) on Monday, Period 1. "
+        "Please select a different room.",
+    ),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("clash", CLASHES)
+def test_creating_a_clashing_entry_is_rejected(booked, api_client, clash):
+    fields, message = CLASHES[clash]
+
+    response = api_client.post(ENTRIES_URL, entry_body(booked, *fields), format="json")
+
+    assert response.status_code == 400
+    assert response.data["details"]["message"] == message
+    assert TimetableEntry.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("clash", CLASHES)
+def test_moving_an_entry_into_a_clash_is_rejected(booked, api_client, clash):
+    fields, message = CLASHES[clash]
+    free = api_client.post(ENTRIES_URL, entry_body(booked, *fields, period=1), format="json")
+    assert free.status_code == 201, free.data
+
+    response = api_client.patch(
+        f"{ENTRIES_URL}{free.data['id']}/", {"period_slot": str(booked.slots[0].id)}, format="json"
+    )
+
+    assert response.status_code == 400
+    assert response.data["details"]["message"] == message
+    assert TimetableEntry.objects.get(id=free.data["id"]).period_slot == booked.slots[1]
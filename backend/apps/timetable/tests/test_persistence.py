@@ -0,0 +1,81 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+
+from apps.timetable.engine import TimetableGenerator
+from apps.timetable.models import Timetable, TimetableVersion
+from apps.timetable.services import generation_parameters, save_generated_timetable
+
+# Entries go in one COPY on PostgreSQL, which psycopg2 does not log, and
+# in one bulk INSERT elsewhere for up to 99 rows (SQLite's 999 parameters)
+ENTRY_INSERTS = 0 if connection.vendor == "postgresql" else 1
+
+SECTION_COUNTS = [1, 4, 8]  # 12, 48 and 96 entries
+
+
+@pytest.fixture(autouse=True)
+def warm_content_types(db):
+    """Audit logging caches content types; load them before counting"""
+    ContentType.objects.get_for_models(Timetable, TimetableVersion)
+
+
+def generated(data):
+    params = generation_parameters({
+        "branch_id": data.branch.id,
+        "session_id": data.session.id,
+        "shift_id": data.shift.id,
+        "name": "Persisted",
+    })
+    generator = TimetableGenerator(
+        branch_id=params["branch_id"],
+        session_id=params["session_id"],
+        shift_id=params["shift_id"],
+        seed=1,
+    )
+    result = generator.generate()
+    assert result.success
+    return params, result
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_sections", SECTION_COUNTS)
+def test_save_generated_timetable_query_count_is_constant(
+    make_branch, admin_user, django_assert_num_queries, num_sections
+):
+    params, result = generated(make_branch(num_sections))
+
+    # Template, slot map, the timetable and its audit log (with the branch,
+    # session, shift, school and duplicate-id lookups), savepoint pair
+    with django_assert_num_queries(11 + ENTRY_INSERTS):
+        timetable = save_generated_timetable(params, result, admin_user)
+
+    assert timetable.entries.count() == num_sections * 12
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_sections", SECTION_COUNTS)
+def test_restore_version_query_count_is_constant(
+    make_branch, admin_user, api_client, django_assert_num_queries, num_sections
+):
+    params, result = generated(make_branch(num_sections))
+    timetable = save_generated_timetable(params, result, admin_user)
+    version = TimetableVersion.objects.create(
+        timetable=timetable,
+        version_number=1,
+        schedule_data=timetable.schedule_data,
+        created_by=admin_user,
+    )
+    Timetable.objects.filter(id=timetable.id).update(current_version=1)
+
+    # Timetable, version, template and slot map; the new version and the
+    # timetable save with their audit logs; collecting the old entries with
+    # their substitutions, deleting them, and a savepoint pair
+    with django_assert_num_queries(19 + ENTRY_INSERTS):
+        response = api_client.post(
+            f"/api/v1/timetables/{timetable.id}/restore/{version.id}/",
+            {"change_note": "Back to v1"},
+            format="json",
+        )
+
+    assert response.status_code == 200, response.data
+    assert timetable.entries.count() == num_sections * 12
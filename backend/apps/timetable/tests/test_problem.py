@@ -0,0 +1,21 @@
+import pytest
+
+from apps.timetable.problem import load_problem
+
+# Template, slots, sections, assignments, teachers, availability, rooms
+LOAD_PROBLEM_QUERIES = 7
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("num_sections", [1, 5, 25])
+def test_load_problem_query_count_is_constant(make_branch, django_assert_num_queries, num_sections):
+    data = make_branch(num_sections)
+
+    with django_assert_num_queries(LOAD_PROBLEM_QUERIES):
+        problem = load_problem(data.branch.id, data.session.id, data.shift.id)
+
+    assert len(problem.sections) == num_sections
+    assert len(problem.assignments) == num_sections * 3
+    assert len(problem.teachers) == num_sections * 3
+    assert len(problem.availability) == num_sections * 3
+    assert len(problem.slots) == 6
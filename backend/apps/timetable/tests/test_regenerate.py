@@ -0,0 +1,68 @@
+import pytest
+
+from apps.timetable.problem import load_problem
+from solver import ScheduleEntry, TimetableGenerator
+
+
+def regenerate(api_client, timetable, **body):
+    return api_client.post(f"/api/v1/timetables/{timetable.id}/regenerate/", body, format="json")
+
+
+@pytest.mark.django_db
+def test_entries_on_a_removed_period_are_replaced(make_branch, generate, api_client):
+    data = make_branch(2)
+    timetable = generate(data, working_days=[0, 1, 2, 3, 4])
+    last = data.slots[-1]
+    # Each teacher has one section, so any free cell of the section is clash-free
+    section = data.sections[0]
+    day = next(
+        day for day in range(5)
+        if not timetable.entries.filter(section=section, day_of_week=day, period_slot=last).exists()
+    )
+    entry = timetable.entries.filter(section=section).exclude(period_slot=last).first()
+    entry.day_of_week = day
+    entry.period_slot = last
+    entry.save()
+
+    last.is_break = True
+    last.save()
+    response = regenerate(api_client, timetable)
+
+    assert response.status_code == 200, response.data
+    assert not timetable.entries.filter(period_slot=last).exists()
+    assert timetable.entries.count() == 2 * 3 * 4
+
+
+@pytest.mark.django_db
+def test_regenerate_keeps_the_stored_working_days(make_branch, generate, api_client):
+    data = make_branch(2)
+    timetable = generate(data, working_days=[0, 1, 2, 3, 4])
+    assert timetable.working_days == [0, 1, 2, 3, 4]
+
+    response = regenerate(api_client, timetable, section_ids=[str(data.sections[0].id)])
+    assert response.status_code == 200, response.data
+    assert not timetable.entries.filter(day_of_week=5).exists()
+
+    response = regenerate(api_client, timetable, working_days=[0, 1, 2, 3, 4, 5])
+    assert response.status_code == 400
+    assert not timetable.entries.filter(day_of_week=5).exists()
+
+
+@pytest.mark.django_db
+def test_clashing_pinned_entries_are_reported(make_branch):
+    data = make_branch(2)
+    problem = load_problem(data.branch.id, data.session.id, data.shift.id)
+    first, second = (
+        next(a for a in problem.assignments if a.section == section) for section in (0, 1)
+    )
+    # Both sections' lessons pinned to one teacher in the same slot
+    pinned = [
+        ((assignment.section, 0, 1), ScheduleEntry(assignment.section, assignment.subject, first.teacher))
+        for assignment in (first, second)
+    ]
+
+    result = TimetableGenerator(problem=problem, seed=1).regenerate(pinned, dirty_sections=set())
+
+    assert not result.success
+    assert len(result.errors) == 1
+    assert "S1" in result.errors[0]
@@ -0,0 +1,49 @@
+from unittest import mock
+
+import pytest
+from kombu.exceptions import OperationalError
+
+from apps.timetable.models import GenerationJob, GenerationJobStatus
+from apps.timetable.services import generation_parameters
+from apps.timetable.tasks import enqueue_generation_job, run_generation_job
+
+
+@pytest.fixture
+def job(make_branch, admin_user, settings):
+    settings.CELERY_TASK_ALWAYS_EAGER = False
+    settings.CELERY_BROKER_URL = "redis://broker.invalid:6379/0"
+    data = make_branch(2)
+    params = generation_parameters({
+        "branch_id": data.branch.id,
+        "session_id": data.session.id,
+        "shift_id": data.shift.id,
+        "name": "Background",
+    })
+    return GenerationJob.objects.create(branch=data.branch, parameters=params, created_by=admin_user)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("error", [
+    OperationalError("Error 111 connecting to broker. Connection refused."),
+    RuntimeError("Retry limit exceeded while trying to reconnect to the Celery redis result store backend."),
+])
+def test_unreachable_broker_runs_job_in_process(job, error):
+    with mock.patch.object(run_generation_job, "apply_async", side_effect=error):
+        enqueue_generation_job(job)
+
+    job.refresh_from_db()
+    assert job.status == GenerationJobStatus.COMPLETED
+    assert job.timetable is not None
+    assert job.celery_task_id in ("", None)
+
+
+@pytest.mark.django_db
+def test_in_process_failure_marks_job_failed(job):
+    with mock.patch.object(run_generation_job, "apply_async", side_effect=OperationalError("down")), \
+            mock.patch("apps.timetable.tasks.GenerationJob.save", side_effect=RuntimeError("disk full")):
+        enqueue_generation_job(job)
+
+    job.refresh_from_db()
+    assert job.status == GenerationJobStatus.FAILED
+    assert job.errors == ["disk full"]
+    assert job.finished_at is not None
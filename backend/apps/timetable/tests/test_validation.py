@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.timetable.engine import find_conflicts, validate_timetable
+from apps.timetable.models import DirtySlot, Timetable, TimetableEntry
+
+
+def empty_cell(data, timetable):
+    """A (day, period slot) with no entries at all"""
+    used = set(timetable.entries.values_list("day_of_week", "period_slot_id"))
+    return next(
+        (day, slot) for day in range(6) for slot in data.slots if (day, slot.id) not in used
+    )
+
+
+def planted_conflict(entry):
+    """A stored conflict in entry's slot, as an earlier validation might have found"""
+    return {
+        "type": "teacher_overlap",
+        "teacher_id": str(entry.teacher_id),
+        "day": entry.day_of_week,
+        "period": entry.period_slot.period_number,
+        "existing_section": str(entry.section_id),
+        "new_section": str(entry.section_id),
+        "entry_id": str(entry.id),
+    }
+
+
+@pytest.mark.django_db
+def test_moving_an_entry_marks_both_slots_without_reading_it_back(make_branch, generate):
+    data = make_branch()
+    timetable = generate(data)
+    validate_timetable(timetable.id)
+    entry = timetable.entries.first()
+    left = (entry.day_of_week, entry.period_slot_id)
+    day, slot = empty_cell(data, timetable)
+
+    entry.day_of_week, entry.period_slot = day, slot
+    with CaptureQueriesContext(connection) as queries:
+        entry.save()
+
+    assert not [
+        query for query in queries.captured_queries
+        if query["sql"].startswith('SELECT') and '"timetable_entries"' in query["sql"]
+    ]
+    assert set(DirtySlot.objects.values_list("day_of_week", "period_slot_id")) == {left, (day, slot.id)}
+
+
+@pytest.mark.django_db
+def test_incremental_validation_rechecks_only_dirty_slots(make_branch, generate):
+    data = make_branch()
+    timetable = generate(data)
+    assert validate_timetable(timetable.id) == []
+    entries = timetable.entries.select_related("period_slot")
+    moved = entries.first()
+    untouched = entries.exclude(day_of_week=moved.day_of_week, period_slot=moved.period_slot).first()
+    stale, kept = planted_conflict(moved), planted_conflict(untouched)
+    Timetable.objects.filter(id=timetable.id).update(validated_conflicts=[stale, kept])
+
+    day, slot = empty_cell(data, timetable)
+    moved.day_of_week, moved.period_slot = day, slot
+    moved.save()
+
+    # The dirty slot is rescanned and its stale conflict dropped; the clean
+    # slot is not, so what was stored for it is returned as it was
+    assert validate_timetable(timetable.id) == [kept]
+    assert not DirtySlot.objects.filter(timetable=timetable).exists()
+
+
+@pytest.mark.django_db
+def test_incremental_validation_matches_full_scan_after_edits(make_branch, generate):
+    data = make_branch()
+    timetable = generate(data)
+    validate_timetable(timetable.id)
+
+    entry = timetable.entries.first()
+    day, slot = empty_cell(data, timetable)
+    entry.day_of_week, entry.period_slot = day, slot
+    entry.save()
+    timetable.entries.exclude(id=entry.id).first().delete()
+
+    incremental = validate_timetable(timetable.id)
+    full = find_conflicts(TimetableEntry.objects.filter(timetable=timetable))
+    assert incremental == full
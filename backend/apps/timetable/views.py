@@ -9,10 +9,13 @@ from rest_framework.views import APIView
 from apps.accounts.models import UserRole
 from apps.accounts.permissions import IsCoordinator, IsBranchAdmin
 from apps.academics.models import PeriodSlot, Section
+from solver import analyze_feasibility
 
-from .engine import TimetableGenerator, validate_timetable
+from .cache import generate_cached
+from .engine import validate_timetable
 from .models import (
     Conflict,
+    GenerationJob,
     Substitution,
     Timetable,
     TimetableEntry,
@@ -20,9 +23,12 @@ from .models import (
     TimetableVersion,
 )
 from .serializers import (
+    BatchEntryEditSerializer,
     ConflictSerializer,
     GenerateTimetableSerializer,
+    GenerationJobSerializer,
     PublishTimetableSerializer,
+    RegenerateTimetableSerializer,
     RestoreVersionSerializer,
     SubstitutionSerializer,
     TimetableCreateSerializer,
@@ -32,6 +38,17 @@ from .serializers import (
     TimetableListSerializer,
     TimetableVersionSerializer,
 )
+from .services import (
+    apply_entry_batch,
+    build_generator,
+    create_schedule_entries,
+    generation_parameters,
+    get_period_slot_map,
+    regenerate_timetable,
+    save_generated_timetable,
+    save_generation_trace,
+)
+from .tasks import enqueue_generation_job
 
 
 class TimetableViewSet(viewsets.ModelViewSet):
@@ -65,6 +82,21 @@ class TimetableViewSet(viewsets.ModelViewSet):
 
         return queryset.none()
 
+    def get_job_queryset(self):
+        user = self.request.user
+        queryset = GenerationJob.objects.select_related("timetable")
+
+        if user.role == UserRole.SUPER_ADMIN:
+            return queryset
+
+        if user.role == UserRole.SCHOOL_ADMIN and user.school:
+            return queryset.filter(branch__school=user.school)
+
+        if user.branch:
+            return queryset.filter(branch=user.branch)
+
+        return queryset.none()
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
@@ -75,74 +107,49 @@ class TimetableViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
+        params = generation_parameters(data)
+
+        # Dry run: report whether the inputs can be scheduled without searching
+        if request.query_params.get("check") in ("1", "true"):
+            problem = build_generator(params).load_problem()
+            if problem is None:
+                return Response({
+                    "success": False,
+                    "errors": ["No period template found for the given configuration"],
+                }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(analyze_feasibility(problem))
+
+        # Long-running generation goes to a background job
+        if request.query_params.get("async") in ("1", "true"):
+            job = GenerationJob.objects.create(
+                branch_id=params["branch_id"],
+                parameters=params,
+                created_by=request.user,
+            )
+            enqueue_generation_job(job)
+            job.refresh_from_db()
+            return Response(
+                GenerationJobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+
         # Generate timetable
-        generator = TimetableGenerator(
-            branch_id=str(data["branch_id"]),
-            session_id=str(data["session_id"]),
-            shift_id=str(data["shift_id"]),
-            season_id=str(data.get("season_id")) if data.get("season_id") else None,
-            working_days=data.get("working_days", [0, 1, 2, 3, 4, 5]),
+        generator = build_generator(params)
+        result = generate_cached(
+            generator, params.get("seed"), params.get("use_cache", True)
         )
 
-        result = generator.generate()
-
         if not result.success and result.errors:
-            return Response({
+            response = {
                 "success": False,
                 "errors": result.errors,
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        # Create timetable record
-        with transaction.atomic():
-            timetable = Timetable.objects.create(
-                branch_id=data["branch_id"],
-                session_id=data["session_id"],
-                shift_id=data["shift_id"],
-                season_id=data.get("season_id"),
-                name=data["name"],
-                description=data.get("description", ""),
-                status=TimetableStatus.DRAFT,
-                schedule_data=result.schedule,
-                created_by=request.user,
-            )
-
-            # Create entries from schedule
-            entries_to_create = []
-            for key, entry_data in result.schedule.items():
-                period_slot = PeriodSlot.objects.filter(
-                    template__branch_id=data["branch_id"],
-                    template__shift_id=data["shift_id"],
-                    period_number=entry_data["period_number"],
-                ).first()
-
-                if period_slot:
-                    entries_to_create.append(TimetableEntry(
-                        timetable=timetable,
-                        section_id=entry_data["section_id"],
-                        day_of_week=entry_data["day_of_week"],
-                        period_slot=period_slot,
-                        subject_id=entry_data["subject_id"],
-                        teacher_id=entry_data["teacher_id"],
-                        room_id=entry_data.get("room_id"),
-                    ))
-
-            TimetableEntry.objects.bulk_create(entries_to_create)
-
-            # Create conflicts if any
-            for conflict in result.conflicts:
-                period_slot = PeriodSlot.objects.filter(
-                    template__branch_id=data["branch_id"],
-                    template__shift_id=data["shift_id"],
-                ).first()
+            }
+            if "feasibility" in result.statistics:
+                response["feasibility"] = result.statistics["feasibility"]
+            return Response(response, status=status.HTTP_400_BAD_REQUEST)
 
-                if period_slot:
-                    Conflict.objects.create(
-                        timetable=timetable,
-                        conflict_type="generation_failure",
-                        day_of_week=0,
-                        period_slot=period_slot,
-                        description=f"{conflict['section']} - {conflict['subject']}: {conflict['reason']}",
-                    )
+        timetable = save_generated_timetable(params, result, request.user)
+        save_generation_trace(generator, result, f"timetable-{timetable.id}")
 
         return Response({
             "success": result.success,
@@ -151,6 +158,17 @@ class TimetableViewSet(viewsets.ModelViewSet):
             "conflicts": result.conflicts,
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["get"], url_path="jobs/(?P<job_id>[^/.]+)")
+    def job_detail(self, request, job_id=None):
+        """Get the status and progress of a background generation job"""
+        job = self.get_job_queryset().filter(id=job_id).first()
+        if not job:
+            return Response(
+                {"error": "Job not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(GenerationJobSerializer(job).data)
+
     @action(detail=True, methods=["post"])
     def publish(self, request, pk=None):
         """Publish a timetable (creates a new version)"""
@@ -188,7 +206,11 @@ class TimetableViewSet(viewsets.ModelViewSet):
                 timetable.effective_from = data["effective_from"]
             if data.get("effective_to"):
                 timetable.effective_to = data["effective_to"]
-            timetable.save()
+            # Not a full save: validated_conflicts was just updated in the database
+            timetable.save(update_fields=[
+                "status", "current_version", "published_by", "published_at",
+                "effective_from", "effective_to", "updated_at",
+            ])
 
         return Response({
             "message": "Timetable published successfully",
@@ -230,6 +252,10 @@ class TimetableViewSet(viewsets.ModelViewSet):
         serializer = RestoreVersionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        slot_map = get_period_slot_map(
+            timetable.branch_id, timetable.shift_id, timetable.season_id
+        )
+
         with transaction.atomic():
             # Create new version from restored data
             new_version_number = timetable.current_version + 1
@@ -241,37 +267,88 @@ class TimetableViewSet(viewsets.ModelViewSet):
                 created_by=request.user,
             )
 
-            # Update timetable
+            # Update timetable; every entry is replaced, so revalidate from scratch
             timetable.schedule_data = version.schedule_data
             timetable.current_version = new_version_number
+            timetable.validated_conflicts = None
             timetable.save()
 
             # Recreate entries
             timetable.entries.all().delete()
-            entries_to_create = []
-            for key, entry_data in version.schedule_data.items():
-                period_slot = PeriodSlot.objects.filter(
-                    period_number=entry_data["period_number"],
-                ).first()
-
-                if period_slot:
-                    entries_to_create.append(TimetableEntry(
-                        timetable=timetable,
-                        section_id=entry_data["section_id"],
-                        day_of_week=entry_data["day_of_week"],
-                        period_slot=period_slot,
-                        subject_id=entry_data["subject_id"],
-                        teacher_id=entry_data["teacher_id"],
-                        room_id=entry_data.get("room_id"),
-                    ))
-
-            TimetableEntry.objects.bulk_create(entries_to_create)
+            create_schedule_entries(timetable, version.schedule_data, slot_map)
 
         return Response({
             "message": f"Restored to version {version.version_number}",
             "new_version": new_version_number,
         })
 
+    @action(detail=True, methods=["post"])
+    def regenerate(self, request, pk=None):
+        """Re-solve only the sections affected by assignment changes"""
+        timetable = self.get_object()
+
+        serializer = RegenerateTimetableSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        outcome = regenerate_timetable(
+            timetable,
+            working_days=data.get("working_days"),
+            section_ids=data["section_ids"],
+            seed=data.get("seed"),
+        )
+        if outcome.get("errors"):
+            return Response({
+                "success": False,
+                "errors": outcome["errors"],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        result = outcome["result"]
+        if result is None:
+            return Response({
+                "success": True,
+                "message": "No sections are affected by assignment changes",
+                "dirty_sections": [],
+                "affected_teachers": [],
+            })
+
+        return Response({
+            "success": result.success,
+            "dirty_sections": outcome["dirty_sections"],
+            "affected_teachers": outcome["affected_teachers"],
+            "changes": outcome["changes"],
+            "statistics": result.statistics,
+            "conflicts": result.conflicts,
+        })
+
+    @action(detail=True, methods=["post"], url_path="entries/batch")
+    def batch_entries(self, request, pk=None):
+        """Create, move, swap and delete several entries in one transaction"""
+        timetable = self.get_object()
+
+        serializer = BatchEntryEditSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        outcome = apply_entry_batch(timetable, serializer.validated_data["operations"])
+        if outcome.get("errors"):
+            return Response({
+                "success": False,
+                "errors": outcome["errors"],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if outcome["conflicts"]:
+            return Response({
+                "success": False,
+                "error": "The edits would leave conflicts; nothing was changed",
+                "conflicts": outcome["conflicts"],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "success": True,
+            "changes": outcome["changes"],
+            "conflicts": [],
+        })
+
     @action(detail=True, methods=["get"])
     def validate(self, request, pk=None):
         """Validate timetable for conflicts"""
@@ -201,6 +201,20 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+# Run tasks in-process (e.g. local development without a broker)
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False").lower() == "true"
+
+# Timetable generation
+# Worker processes for solving independent section clusters in parallel
+TIMETABLE_GENERATION_WORKERS = int(os.getenv("TIMETABLE_GENERATION_WORKERS", "1"))
+# Directory to write a replayable decision trace of every generation to (disabled if empty)
+TIMETABLE_GENERATION_TRACE_DIR = os.getenv("TIMETABLE_GENERATION_TRACE_DIR", "")
+# Cache of generation results by input fingerprint: Redis at this URL, or the
+# database if empty or unreachable. Entries expire after TTL seconds and the
+# least recently used are dropped beyond MAX_ENTRIES (0 disables the cache).
+TIMETABLE_GENERATION_CACHE_URL = os.getenv("TIMETABLE_GENERATION_CACHE_URL", "")
+TIMETABLE_GENERATION_CACHE_TTL = int(os.getenv("TIMETABLE_GENERATION_CACHE_TTL", str(7 * 24 * 3600)))
+TIMETABLE_GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("TIMETABLE_GENERATION_CACHE_MAX_ENTRIES", "200"))
 
 # Logging
 LOGGING = {
@@ -0,0 +1,49 @@
+"""
+Headless timetable solver.
+
+Generates timetables from a Problem without Django or a database, so worker
+processes and the command line (python -m solver) start in well under a
+second. The Django app wraps it in apps.timetable.engine.
+"""
+
+from .engine import (
+    MODES,
+    ORDERINGS,
+    ConflictDetector,
+    GenerationResult,
+    ScheduleEntry,
+    TimetableGenerator,
+    load_trace,
+    replay_trace,
+)
+from .feasibility import analyze_feasibility
+from .problem import (
+    Problem,
+    ProblemAssignment,
+    ProblemAvailability,
+    ProblemRoom,
+    ProblemSection,
+    ProblemSlot,
+    ProblemSubject,
+    ProblemTeacher,
+)
+
+__all__ = (
+    "MODES",
+    "ORDERINGS",
+    "ConflictDetector",
+    "GenerationResult",
+    "Problem",
+    "ProblemAssignment",
+    "ProblemAvailability",
+    "ProblemRoom",
+    "ProblemSection",
+    "ProblemSlot",
+    "ProblemSubject",
+    "ProblemTeacher",
+    "ScheduleEntry",
+    "TimetableGenerator",
+    "analyze_feasibility",
+    "load_trace",
+    "replay_trace",
+)
@@ -0,0 +1,96 @@
+"""
+Solve a problem JSON file without Django or a database.
+
+    python -m solver problem.json --seed 1 --output result.json
+
+Problem files are written by the export_problem management command. The
+result (or, with --check, the feasibility report) is written as JSON to
+--output or stdout, with a one-line summary on stderr. Exits with status 1
+if not every lesson was placed.
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+
+from .engine import MODES, ORDERINGS, TimetableGenerator
+from .feasibility import analyze_feasibility
+from .problem import Problem
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m solver", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("problem", help="Problem JSON file path")
+    parser.add_argument("--output", help="Result file path (default: stdout)")
+    parser.add_argument("--seed", type=int, help="Random seed (default: random)")
+    parser.add_argument("--mode", choices=MODES, default="greedy", help="Solver mode (default: greedy)")
+    parser.add_argument("--ordering", choices=ORDERINGS, default="mrv", help="Greedy pass ordering (default: mrv)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    parser.add_argument("--portfolio", type=int, default=1, help="Seeded runs to pick the best from (default: 1)")
+    parser.add_argument(
+        "--stop-on-success", action="store_true", help="End the portfolio at the first complete run"
+    )
+    parser.add_argument(
+        "--optimize", type=float, default=0.0, help="Seconds for the quality optimizer (default: 0, off)"
+    )
+    parser.add_argument(
+        "--allow-partial", action="store_true", help="Search even if the feasibility analysis finds errors"
+    )
+    parser.add_argument("--trace", help="Write a decision trace to this path")
+    parser.add_argument("--check", action="store_true", help="Only run the feasibility analysis")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    problem = Problem.load(args.problem)
+
+    start = time.perf_counter()
+    if args.check:
+        output = analyze_feasibility(problem)
+        ok = output["feasible"]
+        summary = (
+            f"{'feasible' if ok else 'infeasible'}: "
+            f"{len(output['errors'])} errors, {len(output['warnings'])} warnings"
+        )
+    else:
+        generator = TimetableGenerator(
+            problem=problem,
+            seed=args.seed,
+            mode=args.mode,
+            ordering=args.ordering,
+            workers=args.workers,
+            portfolio_size=args.portfolio,
+            stop_on_success=args.stop_on_success,
+            optimize_time_limit=args.optimize,
+            fail_fast=not args.allow_partial,
+            trace=bool(args.trace),
+        )
+        result = generator.generate()
+        if args.trace:
+            generator.dump_trace(args.trace, result)
+        output = asdict(result)
+        ok = result.success
+        if result.errors:
+            summary = "; ".join(result.errors)
+        else:
+            summary = (
+                f"{result.statistics['filled']}/{result.statistics['total_requirements']} placed, "
+                f"seed {generator.seed}"
+            )
+    elapsed = time.perf_counter() - start
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    print(f"{summary} in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
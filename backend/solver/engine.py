@@ -0,0 +1,1907 @@
+"""
+Timetable Generation Engine
+
+This module implements the core timetable generation algorithm.
+It uses deterministic heuristics followed by a bounded repair
+search to create conflict-free schedules. It works on a Problem and
+imports nothing from Django; apps.timetable.engine loads problems from
+the database.
+"""
+
+import bisect
+import heapq
+import json
+import math
+import multiprocessing
+import random
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .feasibility import analyze_feasibility
+from .problem import Problem, ProblemSlot
+
+
+@dataclass
+class SlotInfo:
+    day: int
+    period_slot_id: str
+    period_number: int
+    is_break: bool = False
+
+
+@dataclass
+class ScheduleEntry:
+    # Indices into the generator's Problem
+    section_id: int
+    subject_id: int
+    teacher_id: Optional[int]
+    room_id: Optional[int] = None
+
+
+@dataclass
+class GenerationResult:
+    success: bool
+    schedule: dict = field(default_factory=dict)
+    conflicts: list = field(default_factory=list)
+    statistics: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+
+
+# Requirements between progress callbacks during the greedy pass
+PROGRESS_INTERVAL = 100
+
+# Greedy pass orderings: static by weekly periods, or dynamic fewest-feasible-slots first
+ORDERINGS = ("priority", "mrv")
+
+# Solver modes: greedy placement only, or per-period matching with greedy for leftovers
+MODES = ("greedy", "matching")
+
+# Iterations a lesson placed by the repair stage is protected from eviction
+REPAIR_TABU_TENURE = 8
+
+# Quality optimizer: weight of each soft-constraint metric in the objective
+OPTIMIZE_WEIGHTS = {"teacher_gaps": 1.0, "subject_repeats": 3.0, "load_imbalance": 0.5}
+
+# Quality optimizer annealing schedule: the temperature falls geometrically
+# from START to END over MAX_ITERATIONS steps
+OPTIMIZE_MAX_ITERATIONS = 50_000
+OPTIMIZE_START_TEMPERATURE = 0.2
+OPTIMIZE_END_TEMPERATURE = 0.01
+
+# Iterations a lesson moved by the quality optimizer stays put
+OPTIMIZE_TABU_TENURE = 16
+
+# Most lessons one Kempe-chain move may shift
+OPTIMIZE_MAX_CHAIN = 16
+
+# Bit positions per day in the occupancy masks; must exceed the largest
+# period number in use
+DEFAULT_PERIOD_STRIDE = 32
+
+
+class ConflictDetector:
+    """
+    Detects scheduling conflicts.
+
+    Teachers, sections, subjects and rooms are referred to by their index
+    in the generator's Problem. Occupancy is held as one integer bitmask
+    per teacher, section and room, where bit ``day * period_stride + period``
+    is set when that slot is taken. Availability checks and free-slot
+    searches are plain bitwise operations; the per-slot maps are only read
+    to describe a conflict. Unstaffed lessons (teacher None) are
+    placeholders for a teacher yet to be hired, so they only occupy their
+    section and room and never clash with each other.
+    """
+
+    def __init__(self, period_stride: int = DEFAULT_PERIOD_STRIDE):
+        self.period_stride = period_stride
+
+        self.teacher_mask = defaultdict(int)  # {teacher_id: bitmask}
+        self.section_mask = defaultdict(int)  # {section_id: bitmask}
+        self.room_mask = defaultdict(int)     # {room_id: bitmask}
+
+        self.teacher_schedule = defaultdict(dict)  # {teacher_id: {(day, period): section_id}}
+        self.section_schedule = defaultdict(dict)  # {section_id: {(day, period): subject_id}}
+        self.room_schedule = defaultdict(dict)     # {room_id: {(day, period): section_id}}
+
+    def reset(self, period_stride: Optional[int] = None):
+        if period_stride is not None:
+            self.period_stride = period_stride
+        self.teacher_mask.clear()
+        self.section_mask.clear()
+        self.room_mask.clear()
+        self.teacher_schedule.clear()
+        self.section_schedule.clear()
+        self.room_schedule.clear()
+
+    def slot_index(self, day: int, period: int) -> int:
+        """Bit position of a (day, period) slot"""
+        return day * self.period_stride + period
+
+    def slot_from_index(self, index: int) -> tuple[int, int]:
+        """(day, period) for a bit position"""
+        return divmod(index, self.period_stride)
+
+    def busy_mask(
+        self,
+        teacher_id: Optional[int],
+        section_id: int,
+        room_id: Optional[int] = None,
+    ) -> int:
+        """Slots where the teacher, the section or the room is already taken"""
+        mask = self.section_mask.get(section_id, 0)
+        if teacher_id is not None:
+            mask |= self.teacher_mask.get(teacher_id, 0)
+        if room_id is not None:
+            mask |= self.room_mask.get(room_id, 0)
+        return mask
+
+    def check_teacher_available(self, teacher_id: Optional[int], day: int, period: int) -> bool:
+        """Check if teacher is available at given slot"""
+        if teacher_id is None:
+            return True
+        return not (self.teacher_mask.get(teacher_id, 0) >> self.slot_index(day, period)) & 1
+
+    def check_section_available(self, section_id: int, day: int, period: int) -> bool:
+        """Check if section slot is available"""
+        return not (self.section_mask.get(section_id, 0) >> self.slot_index(day, period)) & 1
+
+    def check_room_available(self, room_id: Optional[int], day: int, period: int) -> bool:
+        """Check if room is available (if room allocation is enabled)"""
+        if room_id is None:
+            return True
+        return not (self.room_mask.get(room_id, 0) >> self.slot_index(day, period)) & 1
+
+    def can_assign(
+        self,
+        teacher_id: Optional[int],
+        section_id: int,
+        day: int,
+        period: int,
+        room_id: Optional[int] = None
+    ) -> tuple[bool, list]:
+        """Check if assignment is valid and return conflicts if any"""
+        conflicts = []
+
+        if not self.check_teacher_available(teacher_id, day, period):
+            existing = self.teacher_schedule[teacher_id][(day, period)]
+            conflicts.append({
+                "type": "teacher_overlap",
+                "teacher_id": teacher_id,
+                "day": day,
+                "period": period,
+                "existing_section": existing,
+                "new_section": section_id,
+            })
+
+        if not self.check_section_available(section_id, day, period):
+            existing = self.section_schedule[section_id][(day, period)]
+            conflicts.append({
+                "type": "section_overlap",
+                "section_id": section_id,
+                "day": day,
+                "period": period,
+                "existing_subject": existing,
+            })
+
+        if room_id is not None and not self.check_room_available(room_id, day, period):
+            existing = self.room_schedule[room_id][(day, period)]
+            conflicts.append({
+                "type": "room_overlap",
+                "room_id": room_id,
+                "day": day,
+                "period": period,
+                "existing_section": existing,
+            })
+
+        return len(conflicts) == 0, conflicts
+
+    def assign(
+        self,
+        teacher_id: Optional[int],
+        section_id: int,
+        subject_id: int,
+        day: int,
+        period: int,
+        room_id: Optional[int] = None
+    ):
+        """Record an assignment"""
+        bit = 1 << self.slot_index(day, period)
+        self.section_mask[section_id] |= bit
+        self.section_schedule[section_id][(day, period)] = subject_id
+        if teacher_id is not None:
+            self.teacher_mask[teacher_id] |= bit
+            self.teacher_schedule[teacher_id][(day, period)] = section_id
+        if room_id is not None:
+            self.room_mask[room_id] |= bit
+            self.room_schedule[room_id][(day, period)] = section_id
+
+    def unassign(
+        self,
+        teacher_id: Optional[int],
+        section_id: int,
+        day: int,
+        period: int,
+        room_id: Optional[int] = None
+    ):
+        """Remove an assignment"""
+        bit = 1 << self.slot_index(day, period)
+        if teacher_id is not None and (day, period) in self.teacher_schedule[teacher_id]:
+            del self.teacher_schedule[teacher_id][(day, period)]
+            self.teacher_mask[teacher_id] &= ~bit
+        if (day, period) in self.section_schedule[section_id]:
+            del self.section_schedule[section_id][(day, period)]
+            self.section_mask[section_id] &= ~bit
+        if room_id is not None and (day, period) in self.room_schedule[room_id]:
+            del self.room_schedule[room_id][(day, period)]
+            self.room_mask[room_id] &= ~bit
+
+
+class TimetableGenerator:
+    """
+    Main timetable generation engine.
+
+    Uses a deterministic heuristic approach:
+    1. Sort requirements by constraint severity
+    2. Greedily place each requirement in its best-scoring free slot
+    3. Repair what is left with a bounded min-conflicts search that
+       evicts blocking entries and re-places them
+    4. Optionally improve soft constraints with a time-boxed local search
+    """
+
+    def __init__(
+        self,
+        working_days: list = None,
+        max_iterations: int = 1000,
+        repair_time_limit: float = 10.0,
+        optimize_time_limit: float = 0.0,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        problem: Optional[Problem] = None,
+        workers: int = 1,
+        portfolio_size: int = 1,
+        stop_on_success: bool = False,
+        cancel_check: Optional[Callable[[], bool]] = None,
+        seed: Optional[int] = None,
+        trace: bool = False,
+        ordering: str = "mrv",
+        mode: str = "greedy",
+        fail_fast: bool = False,
+        warm_start: list = (),
+    ):
+        if ordering not in ORDERINGS:
+            raise ValueError(f"Unknown ordering {ordering!r}, expected one of {ORDERINGS}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+
+        self.working_days = working_days or [0, 1, 2, 3, 4, 5]  # Mon-Sat
+        self.max_iterations = max_iterations  # Repair stage step budget
+        self.repair_time_limit = repair_time_limit  # Repair stage wall-clock budget (seconds)
+        self.optimize_time_limit = optimize_time_limit  # Quality optimizer budget (seconds), 0 disables it
+        self.progress_callback = progress_callback  # Called with (placed, total)
+        self.problem = problem  # Loaded by load_problem() on generate() if not given
+        self.workers = workers  # Processes for solving independent section clusters
+        self.portfolio_size = portfolio_size  # Seeded runs to pick the best result from
+        self.stop_on_success = stop_on_success  # End the portfolio at the first complete run
+        self.cancel_check = cancel_check  # Returns True to abandon the run early
+        self.ordering = ordering  # Greedy pass requirement ordering, see ORDERINGS
+        self.mode = mode  # Solver mode, see MODES
+        self.fail_fast = fail_fast  # Skip the search when the feasibility analysis finds errors
+        # Earlier ((section_id, day, period), ScheduleEntry) placements, kept where still valid
+        self.warm_start = warm_start
+
+        # Private RNG so runs with the same seed and inputs are reproducible
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.rng = random.Random(self.seed)
+
+        # Placement decisions, recorded when trace is enabled:
+        #   ["R"]                                                schedule reset
+        #   ["A", section, subject, teacher, day, period, room]  lesson placed
+        #   ["U", section, day, period]                          lesson removed
+        self.trace = [] if trace else None
+
+        self.conflict_detector = ConflictDetector()
+        self.schedule = {}  # {(section_id, day, period): ScheduleEntry}
+        self.all_conflicts = []
+
+        # Bitmask of every schedulable (day, period) and the slot behind each bit
+        self.slot_grid_mask = 0
+        self.slot_grid = {}  # {bit_index: (day, ProblemSlot)}
+        self.day_masks = {}  # {day: bits of that day's slots}
+        self._grid_slots = None
+
+        # Slots each teacher may teach per TeacherAvailability; teachers
+        # without availability rows are missing and may use the whole grid
+        self.teacher_allowed_mask = {}  # {teacher_id: mask}
+
+        # {(section_id, subject_id): assignment index}, used to re-queue evicted lessons
+        self.requirement_index = {}
+
+        # Schedule keys the repair stage must not evict (kept entries on regenerate)
+        self.pinned = set()
+
+        # Rooms a lesson may use, for assignments whose subject needs a room
+        # type; smallest fitting room first. Missing means no room is booked.
+        self.assignment_rooms = {}  # {assignment index: (room_id, ...)}
+
+        # Occupancy counters, kept in step with self.schedule by
+        # try_assign/unassign so scoring never rescans the schedule
+        self.section_subject_count = defaultdict(int)      # {(section_id, subject_id): n}
+        self.section_subject_day_count = defaultdict(int)  # {(section_id, subject_id, day): n}
+        self.teacher_day_load = defaultdict(int)           # {(teacher_id, day): n}
+        self.teacher_week_load = defaultdict(int)          # {teacher_id: n}
+        self.teacher_full_days = defaultdict(int)          # {teacher_id: day bits at max_periods_per_day}
+
+    def reset(self):
+        """Clear the schedule, conflict state and occupancy counters"""
+        if self.trace is not None:
+            self.trace.append(["R"])
+        self.conflict_detector.reset()
+        self.schedule.clear()
+        self.all_conflicts.clear()
+        self.section_subject_count.clear()
+        self.section_subject_day_count.clear()
+        self.teacher_day_load.clear()
+        self.teacher_week_load.clear()
+        self.teacher_full_days.clear()
+
+    def load_problem(self) -> Optional[Problem]:
+        """
+        Get the generation inputs. Subclasses that build the problem from
+        another source load it here when it was not given.
+        """
+        if self.problem is not None:
+            self.working_days = list(self.problem.working_days)
+        return self.problem
+
+    def get_teacher_daily_load(self, teacher_id: Optional[int], day: int) -> int:
+        """Get current periods assigned to teacher on a day"""
+        return self.teacher_day_load.get((teacher_id, day), 0)
+
+    def get_section_subject_count(self, section_id: int, subject_id: int) -> int:
+        """Get current periods for subject in a section"""
+        return self.section_subject_count.get((section_id, subject_id), 0)
+
+    def get_section_subject_day_count(self, section_id: int, subject_id: int, day: int) -> int:
+        """Get current periods for subject in a section on a day"""
+        return self.section_subject_day_count.get((section_id, subject_id, day), 0)
+
+    def build_slot_grid(self, period_slots: list[ProblemSlot]):
+        """Index the working days x period slots by conflict detector bit"""
+        detector = self.conflict_detector
+        self.slot_grid_mask = 0
+        self.slot_grid = {}
+        self.day_masks = {}
+        for day in self.working_days:
+            self.day_masks[day] = 0
+            for slot in period_slots:
+                index = detector.slot_index(day, slot.period_number)
+                self.slot_grid_mask |= 1 << index
+                self.day_masks[day] |= 1 << index
+                self.slot_grid[index] = (day, slot)
+        self._grid_slots = period_slots
+
+    def build_teacher_masks(self):
+        """
+        Precompute the slots each teacher may teach from their availability.
+        On a day with available windows only slots inside one are allowed;
+        slots overlapping an unavailable window are never allowed.
+        """
+        windows = defaultdict(lambda: ([], []))  # {(teacher, day): (available, unavailable)}
+        for row in self.problem.availability:
+            windows[(row.teacher, row.day)][0 if row.is_available else 1].append(
+                (row.start_minute, row.end_minute)
+            )
+
+        self.teacher_allowed_mask = {}
+        for (teacher_id, day), (available, unavailable) in windows.items():
+            if day not in self.day_masks:
+                continue
+            mask = self.teacher_allowed_mask.get(teacher_id, self.slot_grid_mask)
+            for index in range(self.day_masks[day].bit_length()):
+                if not self.day_masks[day] >> index & 1:
+                    continue
+                slot = self.slot_grid[index][1]
+                inside = not available or any(
+                    start <= slot.start_minute and slot.end_minute <= end
+                    for start, end in available
+                )
+                overlaps = any(
+                    start < slot.end_minute and slot.start_minute < end
+                    for start, end in unavailable
+                )
+                if not inside or overlaps:
+                    mask &= ~(1 << index)
+            self.teacher_allowed_mask[teacher_id] = mask
+
+    def update_teacher_full_days(self, teacher_id: Optional[int], day: int):
+        """Mark or clear a day as full for a teacher after their load changed"""
+        if teacher_id is None or day not in self.day_masks:
+            return
+        if self.teacher_day_load[(teacher_id, day)] >= self.problem.teachers[teacher_id].max_periods_per_day:
+            self.teacher_full_days[teacher_id] |= self.day_masks[day]
+        else:
+            self.teacher_full_days[teacher_id] &= ~self.day_masks[day]
+
+    def build_room_index(self):
+        """
+        Index rooms by type and capacity, then resolve the rooms each
+        room-needing assignment's section fits in
+        """
+        problem = self.problem
+        by_type = defaultdict(list)  # {room_type: [(capacity, room_id), ...]}
+        for room_id, room in enumerate(problem.rooms):
+            by_type[room.room_type].append((room.capacity, room_id))
+        for rooms in by_type.values():
+            rooms.sort()
+
+        self.assignment_rooms = {}
+        for index, assignment in enumerate(problem.assignments):
+            room_type = problem.subjects[assignment.subject].room_type
+            if not room_type:
+                continue
+            rooms = by_type.get(room_type, [])
+            capacity = problem.sections[assignment.section].capacity
+            first = bisect.bisect_left(rooms, (capacity, -1))
+            self.assignment_rooms[index] = tuple(room_id for _, room_id in rooms[first:])
+
+    def room_busy_mask(self, assignment_index: Optional[int]) -> int:
+        """Slots where every room an assignment could use is taken"""
+        rooms = self.assignment_rooms.get(assignment_index)
+        if rooms is None:
+            return 0
+        busy = self.slot_grid_mask
+        for room_id in rooms:
+            busy &= self.conflict_detector.room_mask.get(room_id, 0)
+        return busy
+
+    def free_room(self, assignment_index: Optional[int], day: int, period: int) -> Optional[int]:
+        """Smallest fitting room free at (day, period), or None"""
+        detector = self.conflict_detector
+        for room_id in self.assignment_rooms.get(assignment_index, ()):
+            if detector.check_room_available(room_id, day, period):
+                return room_id
+        return None
+
+    def teacher_candidate_mask(self, teacher_id: Optional[int]) -> int:
+        """
+        Slots a teacher could take another lesson in: their availability,
+        minus days at max_periods_per_day, or nothing at max_periods_per_week
+        """
+        if teacher_id is None:
+            return self.slot_grid_mask
+
+        teacher = self.problem.teachers[teacher_id]
+        if self.teacher_week_load[teacher_id] >= teacher.max_periods_per_week:
+            return 0
+
+        return self.teacher_allowed_mask.get(teacher_id, self.slot_grid_mask) & ~self.teacher_full_days[teacher_id]
+
+    def get_available_slots(
+        self,
+        section_id: int,
+        teacher_id: Optional[int],
+        subject_id: int,
+        period_slots: list[ProblemSlot],
+    ) -> list[tuple]:
+        """Get available slots for an assignment"""
+        if period_slots is not self._grid_slots:
+            self.build_slot_grid(period_slots)
+
+        free = (
+            self.slot_grid_mask
+            & self.teacher_candidate_mask(teacher_id)
+            & ~self.conflict_detector.busy_mask(teacher_id, section_id)
+            & ~self.room_busy_mask(self.requirement_index.get((section_id, subject_id)))
+        )
+
+        available = []
+        while free:
+            low = free & -free
+            available.append(self.slot_grid[low.bit_length() - 1])
+            free ^= low
+
+        return available
+
+    def try_assign(
+        self,
+        section_id: int,
+        subject_id: int,
+        teacher_id: Optional[int],
+        day: int,
+        period_slot: ProblemSlot,
+        room_id: Optional[int] = None,
+    ) -> bool:
+        """Try to make an assignment"""
+        can_assign, conflicts = self.conflict_detector.can_assign(
+            teacher_id=teacher_id,
+            section_id=section_id,
+            day=day,
+            period=period_slot.period_number,
+            room_id=room_id,
+        )
+
+        if not can_assign:
+            return False
+
+        # Record the assignment
+        self.conflict_detector.assign(
+            teacher_id=teacher_id,
+            section_id=section_id,
+            subject_id=subject_id,
+            day=day,
+            period=period_slot.period_number,
+            room_id=room_id,
+        )
+
+        entry = ScheduleEntry(
+            section_id=section_id,
+            subject_id=subject_id,
+            teacher_id=teacher_id,
+            room_id=room_id,
+        )
+        self.schedule[(entry.section_id, day, period_slot.period_number)] = entry
+
+        self.section_subject_count[(entry.section_id, entry.subject_id)] += 1
+        self.section_subject_day_count[(entry.section_id, entry.subject_id, day)] += 1
+        if entry.teacher_id is not None:
+            self.teacher_day_load[(entry.teacher_id, day)] += 1
+            self.teacher_week_load[entry.teacher_id] += 1
+            self.update_teacher_full_days(entry.teacher_id, day)
+
+        if self.trace is not None:
+            self.trace.append(
+                ["A", section_id, subject_id, teacher_id, day, period_slot.period_number, room_id]
+            )
+
+        return True
+
+    def unassign(self, section_id: int, day: int, period: int) -> Optional[ScheduleEntry]:
+        """Remove a placed entry and roll back its counters"""
+        entry = self.schedule.pop((section_id, day, period), None)
+        if entry is None:
+            return None
+
+        self.conflict_detector.unassign(
+            teacher_id=entry.teacher_id,
+            section_id=entry.section_id,
+            day=day,
+            period=period,
+            room_id=entry.room_id,
+        )
+
+        self.section_subject_count[(entry.section_id, entry.subject_id)] -= 1
+        self.section_subject_day_count[(entry.section_id, entry.subject_id, day)] -= 1
+        if entry.teacher_id is not None:
+            self.teacher_day_load[(entry.teacher_id, day)] -= 1
+            self.teacher_week_load[entry.teacher_id] -= 1
+            self.update_teacher_full_days(entry.teacher_id, day)
+
+        if self.trace is not None:
+            self.trace.append(["U", section_id, day, period])
+
+        return entry
+
+    def feasible_slot_count(self, assignment_index: int) -> int:
+        """Number of slots one more lesson of an assignment could go in right now"""
+        assignment = self.problem.assignments[assignment_index]
+        free = (
+            self.slot_grid_mask
+            & self.teacher_candidate_mask(assignment.teacher)
+            & ~self.conflict_detector.busy_mask(assignment.teacher, assignment.section)
+            & ~self.room_busy_mask(assignment_index)
+        )
+        return free.bit_count()
+
+    def place_requirement(self, req: dict, period_slots: list[ProblemSlot]) -> Optional[str]:
+        """
+        Place one lesson of a requirement in its best-scoring free slot.
+        Returns None on success, otherwise the reason it could not be placed.
+        """
+        assignment = self.problem.assignments[req["assignment"]]
+        section_id = assignment.section
+        subject_id = assignment.subject
+        teacher_id = assignment.teacher
+
+        # Check if we already have enough periods for this subject
+        if self.get_section_subject_count(section_id, subject_id) >= assignment.weekly_periods:
+            return None
+
+        rooms = self.assignment_rooms.get(req["assignment"])
+        if rooms == ():
+            room_type = self.problem.subjects[subject_id].room_type
+            return f"No {room_type} room fits the section"
+
+        available_slots = self.get_available_slots(section_id, teacher_id, subject_id, period_slots)
+        if not available_slots:
+            if (
+                teacher_id is not None
+                and self.teacher_week_load[teacher_id] >= self.problem.teachers[teacher_id].max_periods_per_week
+            ):
+                return "Teacher has reached max periods per week"
+            return "No available slots"
+
+        # Score slots (prefer distributed schedule)
+        scored_slots = []
+        for day, slot in available_slots:
+            # Prefer days where this subject hasn't been assigned yet
+            day_subject_count = self.get_section_subject_day_count(section_id, subject_id, day)
+            # Prefer days where teacher has fewer classes
+            teacher_day_load = self.get_teacher_daily_load(teacher_id, day)
+
+            score = day_subject_count * 10 + teacher_day_load
+            scored_slots.append((score, day, slot))
+
+        scored_slots.sort(key=lambda x: x[0])
+
+        for _, day, slot in scored_slots:
+            if self.try_assign(
+                section_id=section_id,
+                subject_id=subject_id,
+                teacher_id=teacher_id,
+                day=day,
+                period_slot=slot,
+                room_id=self.free_room(req["assignment"], day, slot.period_number),
+            ):
+                return None
+
+        return "Could not find valid slot"
+
+    def get_blocking_entries(
+        self,
+        section_id: int,
+        teacher_id: Optional[int],
+        day: int,
+        period: int,
+        rooms: Optional[tuple] = None,
+    ) -> set:
+        """
+        Schedule keys that would have to move to free (day, period) for this
+        pair and, if it needs one of `rooms`, a room for it
+        """
+        blockers = set()
+        if (section_id, day, period) in self.schedule:
+            blockers.add((section_id, day, period))
+        if teacher_id is not None:
+            teacher_section = self.conflict_detector.teacher_schedule[teacher_id].get((day, period))
+            if teacher_section is not None:
+                blockers.add((teacher_section, day, period))
+
+        if rooms:
+            occupants = []
+            for room_id in rooms:
+                occupant = self.conflict_detector.room_schedule[room_id].get((day, period))
+                if occupant is None:
+                    return blockers
+                occupants.append((occupant, day, period))
+            # Every room is taken: free one, preferring one already being vacated
+            blockers.add(next((key for key in occupants if key in blockers), occupants[0]))
+        return blockers
+
+    def repair(
+        self,
+        pending: list[dict],
+        period_slots: list[ProblemSlot],
+        deadline: float,
+    ) -> tuple[list[dict], dict]:
+        """
+        Min-conflicts repair of requirements the greedy pass could not place.
+
+        Each step takes an unplaced lesson and either places it directly or
+        kicks out the fewest entries blocking one of its slots, queueing the
+        evicted lessons for re-placement. Recently placed entries are
+        tabu so the search does not undo its own moves, and the best schedule
+        seen is kept. Stops when nothing is pending, after max_iterations
+        steps or at the wall-clock deadline.
+        """
+        # Lessons needing a room type no room fits cannot be repaired
+        roomless = [req for req in pending if self.assignment_rooms.get(req["assignment"]) == ()]
+        queue = deque(req for req in pending if self.assignment_rooms.get(req["assignment"]) != ())
+        tabu = {}  # {(section_id, day, period): iteration the entry was placed}
+
+        best_schedule = dict(self.schedule)
+        best_pending = list(queue)
+        iterations = 0
+        stopped_by = "completed"
+
+        while queue:
+            if iterations >= self.max_iterations:
+                stopped_by = "max_iterations"
+                break
+            if time.perf_counter() >= deadline:
+                stopped_by = "deadline"
+                break
+            if self.cancel_check and self.cancel_check():
+                stopped_by = "cancelled"
+                break
+            iterations += 1
+
+            req = queue.popleft()
+            if self.place_requirement(req, period_slots) is None:
+                if len(queue) < len(best_pending):
+                    best_schedule = dict(self.schedule)
+                    best_pending = list(queue)
+                continue
+
+            assignment = self.problem.assignments[req["assignment"]]
+            section_id = assignment.section
+            teacher_id = assignment.teacher
+            teacher = self.problem.teachers[teacher_id] if teacher_id is not None else None
+            allowed = self.teacher_allowed_mask.get(teacher_id, self.slot_grid_mask)
+            rooms = self.assignment_rooms.get(req["assignment"])
+
+            # Find the slots needing the fewest evictions, skipping tabu entries
+            candidates = []
+            fewest = None
+            for index, (day, slot) in self.slot_grid.items():
+                if not allowed >> index & 1:
+                    continue
+                blockers = self.get_blocking_entries(section_id, teacher_id, day, slot.period_number, rooms)
+                if any(iterations - tabu.get(key, -REPAIR_TABU_TENURE) < REPAIR_TABU_TENURE for key in blockers):
+                    continue
+                if not blockers.isdisjoint(self.pinned):
+                    continue
+                if teacher is not None:
+                    # Evicting the teacher's own lesson frees one unit of their limits
+                    freed = sum(1 for key in blockers if self.schedule[key].teacher_id == teacher_id)
+                    if (
+                        self.teacher_day_load[(teacher_id, day)] - freed >= teacher.max_periods_per_day
+                        or self.teacher_week_load[teacher_id] - freed >= teacher.max_periods_per_week
+                    ):
+                        continue
+                if fewest is None or len(blockers) < fewest:
+                    fewest = len(blockers)
+                    candidates = []
+                if len(blockers) == fewest:
+                    candidates.append((day, slot, blockers))
+
+            if not candidates:
+                req["reason"] = "Could not find valid slot"
+                queue.append(req)
+                continue
+
+            day, slot, blockers = self.rng.choice(candidates)
+            for key in blockers:
+                evicted = self.unassign(*key)
+                evicted_assignment = self.requirement_index[(evicted.section_id, evicted.subject_id)]
+                queue.append({
+                    "assignment": evicted_assignment,
+                    "priority": self.problem.assignments[evicted_assignment].weekly_periods,
+                    "reason": "Displaced during repair and could not be re-placed",
+                })
+
+            self.try_assign(
+                section_id=section_id,
+                subject_id=assignment.subject,
+                teacher_id=teacher_id,
+                day=day,
+                period_slot=slot,
+                room_id=self.free_room(req["assignment"], day, slot.period_number),
+            )
+            tabu[(section_id, day, slot.period_number)] = iterations
+
+        if len(queue) >= len(best_pending):
+            self.restore_schedule(best_schedule, period_slots)
+            queue = deque(best_pending)
+
+        return list(queue) + roomless, {
+            "unplaced_before": len(pending),
+            "recovered": len(pending) - len(queue) - len(roomless),
+            "iterations": iterations,
+            "stopped_by": stopped_by,
+        }
+
+    def restore_schedule(self, snapshot: dict, period_slots: list[ProblemSlot]):
+        """Rebuild the schedule, conflict state and counters from a snapshot"""
+        self.reset()
+        self.place_entries(snapshot.items(), period_slots)
+
+    def place_entries(self, entries, period_slots: list[ProblemSlot]) -> list:
+        """
+        Record already-solved ((section_id, day, period), ScheduleEntry) pairs.
+        Returns the pairs that could not be placed: their period is not one
+        of period_slots, their day is not a working day, or they clash.
+        """
+        slots_by_number = {slot.period_number: slot for slot in period_slots}
+        rejected = []
+        for key, entry in entries:
+            _, day, period = key
+            slot = slots_by_number.get(period)
+            if (
+                slot is None
+                or day not in self.working_days
+                or not self.try_assign(
+                    section_id=entry.section_id,
+                    subject_id=entry.subject_id,
+                    teacher_id=entry.teacher_id,
+                    day=day,
+                    period_slot=slot,
+                    room_id=entry.room_id,
+                )
+            ):
+                rejected.append((key, entry))
+        return rejected
+
+    def failure_record(self, req: dict) -> dict:
+        """Describe an unplaced requirement for the result"""
+        problem = self.problem
+        assignment = problem.assignments[req["assignment"]]
+        return {
+            "section": problem.sections[assignment.section].name,
+            "subject": problem.subjects[assignment.subject].name,
+            "teacher": (
+                problem.teachers[assignment.teacher].name
+                if assignment.teacher is not None else "Unassigned"
+            ),
+            "reason": req.get("reason", "Could not find valid slot"),
+        }
+
+    def prepare(self) -> list[dict]:
+        """Set up the slot grid for the loaded problem and build its requirements"""
+        problem = self.problem
+        period_slots = list(problem.slots)
+
+        self.conflict_detector.reset(
+            period_stride=max(slot.period_number for slot in period_slots) + 1
+        )
+        self.build_slot_grid(period_slots)
+        self.build_teacher_masks()
+        self.build_room_index()
+
+        # Build assignment requirements
+        requirements = []
+        self.requirement_index = {}
+        for index, assignment in enumerate(problem.assignments):
+            self.requirement_index[(assignment.section, assignment.subject)] = index
+            for _ in range(assignment.weekly_periods):
+                requirements.append({
+                    "assignment": index,
+                    "priority": assignment.weekly_periods,  # Higher periods = higher priority
+                })
+
+        return requirements
+
+    def report_greedy_progress(self, placed: int, total: int) -> bool:
+        """Report greedy pass progress; returns True if the run should stop"""
+        if self.progress_callback:
+            self.progress_callback(placed, total)
+        return bool(self.cancel_check and self.cancel_check())
+
+    def greedy_by_priority(self, requirements: list[dict], period_slots: list[ProblemSlot]) -> list[dict]:
+        """Place requirements in a fixed order, most weekly periods first"""
+        # Sort by priority (most constrained first)
+        requirements.sort(key=lambda x: -x["priority"])
+
+        # Shuffle within same priority for randomization
+        self.rng.shuffle(requirements)
+        requirements.sort(key=lambda x: -x["priority"])
+
+        unplaced = []
+        for i, req in enumerate(requirements, start=1):
+            reason = self.place_requirement(req, period_slots)
+            if reason is not None:
+                req["reason"] = reason
+                unplaced.append(req)
+            if i % PROGRESS_INTERVAL == 0 and self.report_greedy_progress(i - len(unplaced), len(requirements)):
+                break
+
+        return unplaced
+
+    def greedy_mrv(self, requirements: list[dict], period_slots: list[ProblemSlot]) -> list[dict]:
+        """
+        Place requirements most-constrained first: a heap keyed by each
+        pending assignment's count of feasible slots. After a placement only
+        assignments sharing its section or teacher can lose slots, so only
+        those are re-keyed; superseded heap entries are skipped lazily.
+        """
+        problem = self.problem
+        pending = defaultdict(list)  # {assignment index: [requirement, ...]}
+        for req in requirements:
+            pending[req["assignment"]].append(req)
+
+        by_section = defaultdict(list)
+        by_teacher = defaultdict(list)  # Unstaffed assignments share no teacher
+        for index in pending:
+            assignment = problem.assignments[index]
+            by_section[assignment.section].append(index)
+            if assignment.teacher is not None:
+                by_teacher[assignment.teacher].append(index)
+
+        # Ties go to assignments with more lessons left, then at random
+        tiebreak = {index: self.rng.random() for index in pending}
+        counts = {}
+        heap = []
+
+        def push(index):
+            count = self.feasible_slot_count(index)
+            if counts.get(index) != count:
+                counts[index] = count
+                heapq.heappush(heap, (count, -len(pending[index]), tiebreak[index], index))
+
+        for index in pending:
+            push(index)
+
+        unplaced = []
+        attempted = 0
+        next_report = PROGRESS_INTERVAL
+        while heap:
+            count, _, _, index = heapq.heappop(heap)
+            if index not in pending or counts[index] != count:
+                continue  # Placed out or re-keyed since this entry was pushed
+
+            req = pending[index].pop()
+            attempted += 1
+            reason = self.place_requirement(req, period_slots)
+
+            if reason is not None:
+                # Slots only get scarcer, so the assignment's other lessons fail too
+                failed = [req] + pending.pop(index)
+                attempted += len(failed) - 1
+                for failed_req in failed:
+                    failed_req["reason"] = reason
+                    unplaced.append(failed_req)
+            else:
+                if not pending[index]:
+                    del pending[index]
+                assignment = problem.assignments[index]
+                for other in by_section[assignment.section] + by_teacher[assignment.teacher]:
+                    if other in pending:
+                        push(other)
+                if index in pending:
+                    # Its remaining-lessons tiebreak changed even if the count did not
+                    counts.pop(index)
+                    push(index)
+
+            if attempted >= next_report:
+                next_report = attempted + PROGRESS_INTERVAL
+                if self.report_greedy_progress(attempted - len(unplaced), len(requirements)):
+                    break
+
+        return unplaced
+
+    def solve(
+        self,
+        requirements: list[dict],
+        period_slots: list[ProblemSlot],
+    ) -> tuple[list[dict], dict, dict]:
+        """Run the greedy and repair passes; returns (unplaced, repair stats, timings)"""
+        started = time.perf_counter()
+        phase_timings = {}
+
+        # Matching pass: fill each period with a maximum section-teacher matching
+        if self.mode == "matching":
+            requirements = self.match_periods(requirements)
+            matched = time.perf_counter()
+            phase_timings["matching"] = round((matched - started) * 1000, 1)
+            started = matched
+
+        # Greedy pass: place every requirement in its best free slot
+        if self.ordering == "mrv":
+            unplaced = self.greedy_mrv(requirements, period_slots)
+        else:
+            unplaced = self.greedy_by_priority(requirements, period_slots)
+
+        greedy_done = time.perf_counter()
+
+        # Repair pass: kick blocking entries to recover what greedy missed
+        unplaced, repair_stats = self.repair(
+            unplaced, period_slots, deadline=greedy_done + self.repair_time_limit
+        )
+
+        finished = time.perf_counter()
+
+        phase_timings["greedy"] = round((greedy_done - started) * 1000, 1)
+        phase_timings["repair"] = round((finished - greedy_done) * 1000, 1)
+        return unplaced, repair_stats, phase_timings
+
+    def match_periods(self, requirements: list[dict]) -> list[dict]:
+        """
+        Fill the grid one (day, period) cell at a time with a maximum
+        matching between free sections and free teachers (Hopcroft-Karp).
+        Edges come from pending assignments whose subject is under its
+        per-day share, with each unstaffed assignment as its own teacher
+        vertex; sections and their edges are tried in order of remaining
+        demand, so the busiest assignments are matched first.
+        Returns the requirements left for the greedy pass.
+        """
+        problem = self.problem
+        detector = self.conflict_detector
+        remaining = defaultdict(int)  # {assignment index: lessons to place}
+        for req in requirements:
+            remaining[req["assignment"]] += 1
+
+        by_section = defaultdict(list)
+        for index in remaining:
+            by_section[problem.assignments[index].section].append(index)
+
+        # Lessons of a subject a section may take on one day
+        days = len(self.working_days)
+        day_share = {
+            index: -(-problem.assignments[index].weekly_periods // days)
+            for index in remaining
+        }
+
+        for bit in sorted(self.slot_grid, key=lambda b: detector.slot_from_index(b)):
+            day, slot = self.slot_grid[bit]
+            cell = 1 << bit
+
+            sections = []
+            adjacency = []
+            edge_assignment = []  # Per section: {teacher vertex: assignment index}
+            for section_id, indices in by_section.items():
+                if detector.section_mask[section_id] & cell:
+                    continue
+                edges = {}
+                for index in indices:
+                    assignment = problem.assignments[index]
+                    teacher_id = assignment.teacher
+                    if (
+                        remaining[index] <= 0
+                        or self.section_subject_day_count[(section_id, assignment.subject, day)] >= day_share[index]
+                        or not self.teacher_candidate_mask(teacher_id) & ~detector.busy_mask(teacher_id, section_id) & cell
+                        or self.room_busy_mask(index) & cell
+                    ):
+                        continue
+                    vertex = teacher_id if teacher_id is not None else ("unstaffed", index)
+                    if vertex not in edges or remaining[index] > remaining[edges[vertex]]:
+                        edges[vertex] = index
+                if edges:
+                    sections.append((max(remaining[i] for i in edges.values()), section_id))
+                    adjacency.append(sorted(edges, key=lambda t: -remaining[edges[t]]))
+                    edge_assignment.append(edges)
+
+            if not sections:
+                continue
+
+            order = sorted(range(len(sections)), key=lambda i: -sections[i][0])
+            matches = hopcroft_karp([adjacency[i] for i in order])
+
+            for position, vertex in enumerate(matches):
+                if vertex is None:
+                    continue
+                i = order[position]
+                index = edge_assignment[i][vertex]
+                room_id = self.free_room(index, day, slot.period_number)
+                if room_id is None and index in self.assignment_rooms:
+                    continue  # Sections matched earlier in this period took the fitting rooms
+                if self.try_assign(
+                    section_id=sections[i][1],
+                    subject_id=problem.assignments[index].subject,
+                    teacher_id=problem.assignments[index].teacher,
+                    day=day,
+                    period_slot=slot,
+                    room_id=room_id,
+                ):
+                    remaining[index] -= 1
+
+        return [
+            {"assignment": index, "priority": problem.assignments[index].weekly_periods}
+            for index, count in remaining.items()
+            for _ in range(count)
+        ]
+
+    def solve_parallel(
+        self,
+        components: list[Problem],
+        period_slots: list[ProblemSlot],
+        total: int,
+    ) -> tuple[list[dict], dict, dict]:
+        """
+        Solve independent sub-problems in worker processes and merge them.
+        Components share no teacher or section, so their schedules never
+        collide; merging in component order keeps the result deterministic.
+        """
+        started = time.perf_counter()
+        options = {
+            "max_iterations": self.max_iterations,
+            "repair_time_limit": self.repair_time_limit,
+            "ordering": self.ordering,
+            "mode": self.mode,
+        }
+
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(components)), mp_context=worker_context()
+        ) as pool:
+            futures = [
+                pool.submit(solve_component, component, options, self.rng.randrange(2 ** 31))
+                for component in components
+            ]
+
+            unplaced = []
+            repair_stats = {"unplaced_before": 0, "recovered": 0, "iterations": 0, "stopped_by": "completed"}
+            phase_timings = {}
+
+            for future in futures:
+                entries, component_unplaced, component_repair, component_timings = future.result()
+                self.place_entries(entries, period_slots)
+
+                for key, reason in component_unplaced:
+                    index = self.requirement_index[key]
+                    unplaced.append({
+                        "assignment": index,
+                        "priority": self.problem.assignments[index].weekly_periods,
+                        "reason": reason,
+                    })
+
+                for stat in ("unplaced_before", "recovered", "iterations"):
+                    repair_stats[stat] += component_repair[stat]
+                if component_repair["stopped_by"] != "completed":
+                    repair_stats["stopped_by"] = component_repair["stopped_by"]
+                for phase, ms in component_timings.items():
+                    phase_timings[phase] = round(phase_timings.get(phase, 0.0) + ms, 1)
+
+                if self.progress_callback:
+                    self.progress_callback(len(self.schedule), total)
+
+        # Greedy and repair are summed across workers; solve is wall-clock
+        phase_timings["solve"] = round((time.perf_counter() - started) * 1000, 1)
+        return unplaced, repair_stats, phase_timings
+
+    def quality_metrics(self) -> dict:
+        """Soft-constraint measures of the current schedule (lower is better)"""
+        position = {slot.period_number: i for i, slot in enumerate(self.problem.slots)}
+
+        teacher_day_positions = defaultdict(list)
+        for (section_id, day, period), entry in self.schedule.items():
+            if entry.teacher_id is not None:
+                teacher_day_positions[(entry.teacher_id, day)].append(position[period])
+
+        # Free periods between a teacher's first and last lesson of the day
+        teacher_gaps = sum(
+            max(positions) - min(positions) + 1 - len(positions)
+            for positions in teacher_day_positions.values()
+        )
+
+        # Extra lessons of a subject on a day that already has one
+        subject_repeats = sum(
+            count - 1 for count in self.section_subject_day_count.values() if count > 1
+        )
+
+        # Squared deviation of each teacher's daily loads from their mean
+        days = len(self.day_masks)
+        load_imbalance = sum(
+            sum(self.teacher_day_load[(teacher_id, day)] ** 2 for day in self.day_masks) - week ** 2 / days
+            for teacher_id, week in self.teacher_week_load.items()
+            if week
+        )
+
+        return {
+            "teacher_gaps": teacher_gaps,
+            "subject_repeats": subject_repeats,
+            "load_imbalance": round(load_imbalance, 2),
+        }
+
+    def objective(self, metrics: dict) -> float:
+        """Weighted sum of quality metrics minimised by the optimizer"""
+        return round(sum(OPTIMIZE_WEIGHTS[name] * metrics[name] for name in OPTIMIZE_WEIGHTS), 2)
+
+    def soft_cost(self, teacher_days: set, subject_days: set) -> float:
+        """
+        Objective terms of just the given (teacher, day) and (section,
+        subject, day) keys, so a move is scored by the keys it touches.
+        Load imbalance is counted as the sum of squared daily loads, which
+        differs from quality_metrics by a per-teacher constant.
+        """
+        detector = self.conflict_detector
+        gaps = 0
+        squares = 0
+        for teacher_id, day in teacher_days:
+            day_mask = self.day_masks[day]
+            lessons = detector.teacher_mask.get(teacher_id, 0) & day_mask
+            if lessons:
+                span = (1 << lessons.bit_length()) - (lessons & -lessons)
+                gaps += (span & day_mask).bit_count() - lessons.bit_count()
+            squares += self.teacher_day_load[(teacher_id, day)] ** 2
+
+        repeats = sum(max(self.section_subject_day_count[key] - 1, 0) for key in subject_days)
+
+        return (
+            OPTIMIZE_WEIGHTS["teacher_gaps"] * gaps
+            + OPTIMIZE_WEIGHTS["subject_repeats"] * repeats
+            + OPTIMIZE_WEIGHTS["load_imbalance"] * squares
+        )
+
+    def kempe_chain(self, section_id: int, a: tuple, b: tuple) -> Optional[list]:
+        """
+        Lessons that must trade places between (day, period) cells a and b
+        for section_id's lesson at a to move to b: the closure over the
+        section, teacher and room each moving lesson would collide with.
+        Returns (section_id, from_cell, to_cell) triples, or None if the
+        chain grows past OPTIMIZE_MAX_CHAIN.
+        """
+        detector = self.conflict_detector
+        cells = (a, b)
+        chain = set()  # {(section_id, side)}, side 0 moves a -> b
+        stack = [(section_id, 0)]
+        while stack:
+            section, side = stack.pop()
+            if (section, side) in chain:
+                continue
+            chain.add((section, side))
+            if len(chain) > OPTIMIZE_MAX_CHAIN:
+                return None
+
+            entry = self.schedule[(section, *cells[side])]
+            target = cells[1 - side]
+            if (section, *target) in self.schedule:
+                stack.append((section, 1 - side))
+            if entry.teacher_id is not None:
+                occupant = detector.teacher_schedule[entry.teacher_id].get(target)
+                if occupant is not None:
+                    stack.append((occupant, 1 - side))
+            if entry.room_id is not None:
+                occupant = detector.room_schedule[entry.room_id].get(target)
+                if occupant is not None:
+                    stack.append((occupant, 1 - side))
+
+        return [(section, cells[side], cells[1 - side]) for section, side in sorted(chain)]
+
+    def chain_allowed(self, chain: list, tabu: dict, iteration: int) -> bool:
+        """Whether a chain moves no pinned or tabu lesson and keeps teacher availability and limits"""
+        day_change = defaultdict(int)  # {(teacher_id, day): lessons gained}
+        for section_id, source, target in chain:
+            key = (section_id, *source)
+            if key in self.pinned or iteration - tabu.get(key, -OPTIMIZE_TABU_TENURE) < OPTIMIZE_TABU_TENURE:
+                return False
+            teacher_id = self.schedule[key].teacher_id
+            if teacher_id is None:
+                continue
+            allowed = self.teacher_allowed_mask.get(teacher_id, self.slot_grid_mask)
+            if not allowed >> self.conflict_detector.slot_index(*target) & 1:
+                return False
+            if source[0] != target[0]:
+                day_change[(teacher_id, target[0])] += 1
+                day_change[(teacher_id, source[0])] -= 1
+
+        return all(
+            self.teacher_day_load[(teacher_id, day)] + change
+            <= self.problem.teachers[teacher_id].max_periods_per_day
+            for (teacher_id, day), change in day_change.items()
+            if change > 0
+        )
+
+    def apply_chain(self, chain: list):
+        """Move every lesson of a chain to its target cell, keeping its room"""
+        moved = [(target, self.unassign(section_id, *source)) for section_id, source, target in chain]
+        for (day, period), entry in moved:
+            _, slot = self.slot_grid[self.conflict_detector.slot_index(day, period)]
+            self.try_assign(
+                section_id=entry.section_id,
+                subject_id=entry.subject_id,
+                teacher_id=entry.teacher_id,
+                day=day,
+                period_slot=slot,
+                room_id=entry.room_id,
+            )
+
+    def optimize(self, deadline: float) -> dict:
+        """
+        Improve the soft constraints of the placed schedule by simulated
+        annealing over Kempe-chain moves between two cells. A chain of one
+        lesson is a move to a free cell, two lessons of one section are a
+        swap. Every move keeps the schedule conflict-free and is scored from
+        the keys it touches only; recently moved lessons are tabu, and the
+        best schedule seen is kept. The annealing schedule is by iteration,
+        so a run that finishes within its deadline is reproducible.
+        """
+        detector = self.conflict_detector
+        before = self.quality_metrics()
+        grid_bits = sorted(self.slot_grid)
+        sections = sorted({section_id for section_id, _, _ in self.schedule})
+
+        current = best = 0.0  # Objective relative to the start
+        best_schedule = dict(self.schedule)
+        tabu = {}  # {(section_id, day, period): iteration the lesson arrived}
+        accepted = {"move": 0, "swap": 0, "kempe": 0}
+        iterations = 0
+        stopped_by = "max_iterations"
+        cooling = OPTIMIZE_END_TEMPERATURE / OPTIMIZE_START_TEMPERATURE
+
+        while sections and len(grid_bits) > 1 and iterations < OPTIMIZE_MAX_ITERATIONS:
+            if time.perf_counter() >= deadline:
+                stopped_by = "deadline"
+                break
+            if self.cancel_check and self.cancel_check():
+                stopped_by = "cancelled"
+                break
+            iterations += 1
+
+            section_id = self.rng.choice(sections)
+            a = detector.slot_from_index(self.rng.choice(grid_bits))
+            b = detector.slot_from_index(self.rng.choice(grid_bits))
+            if a == b or (section_id, *a) not in self.schedule:
+                continue
+            chain = self.kempe_chain(section_id, a, b)
+            if chain is None or not self.chain_allowed(chain, tabu, iterations):
+                continue
+
+            teacher_days = set()
+            subject_days = set()
+            for section, source, _ in chain:
+                entry = self.schedule[(section, *source)]
+                subject_days.update(((section, entry.subject_id, a[0]), (section, entry.subject_id, b[0])))
+                if entry.teacher_id is not None:
+                    teacher_days.update(((entry.teacher_id, a[0]), (entry.teacher_id, b[0])))
+
+            cost = self.soft_cost(teacher_days, subject_days)
+            self.apply_chain(chain)
+            delta = self.soft_cost(teacher_days, subject_days) - cost
+
+            temperature = OPTIMIZE_START_TEMPERATURE * cooling ** (iterations / OPTIMIZE_MAX_ITERATIONS)
+            if delta > 0 and self.rng.random() >= math.exp(-delta / temperature):
+                self.apply_chain([(section, target, source) for section, source, target in chain])
+                continue
+
+            current += delta
+            if len(chain) == 1:
+                accepted["move"] += 1
+            elif len({section for section, _, _ in chain}) == 1:
+                accepted["swap"] += 1
+            else:
+                accepted["kempe"] += 1
+            for section, _, target in chain:
+                tabu[(section, *target)] = iterations
+
+            if current < best - 1e-9:
+                best = current
+                best_schedule = dict(self.schedule)
+
+        if current > best + 1e-9:
+            self.restore_schedule(best_schedule, list(self.problem.slots))
+
+        after = self.quality_metrics()
+        return {
+            "objective_before": self.objective(before),
+            "objective_after": self.objective(after),
+            "before": before,
+            "after": after,
+            "iterations": iterations,
+            "accepted": accepted,
+            "stopped_by": stopped_by,
+        }
+
+    def generate(self) -> GenerationResult:
+        """Generate the timetable"""
+        started = time.perf_counter()
+        problem = self.load_problem()
+        if problem is None or not problem.slots or not problem.sections:
+            return self.generate_once()
+
+        feasibility = analyze_feasibility(problem)
+        feasibility["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if self.fail_fast and not feasibility["feasible"]:
+            return GenerationResult(
+                success=False,
+                errors=[error["message"] for error in feasibility["errors"]],
+                statistics={"feasibility": feasibility},
+            )
+
+        if self.portfolio_size > 1:
+            result = self.generate_portfolio()
+        else:
+            result = self.generate_once()
+        result.statistics["feasibility"] = feasibility
+        return result
+
+    def generate_portfolio(self) -> GenerationResult:
+        """
+        Run portfolio_size independently seeded generations and keep the best,
+        scored by (unplaced lessons, subject repeats, teacher gaps). Runs are
+        spread over `workers` processes; with stop_on_success the remaining
+        runs are cancelled once one places every lesson.
+        """
+        started = time.perf_counter()
+        problem = self.load_problem()
+        if problem is None or not problem.slots or not problem.sections:
+            return self.generate_once()
+
+        seeds = [self.rng.randrange(2 ** 31) for _ in range(self.portfolio_size)]
+        options = {
+            "max_iterations": self.max_iterations,
+            "repair_time_limit": self.repair_time_limit,
+            "optimize_time_limit": self.optimize_time_limit,
+            "ordering": self.ordering,
+            "mode": self.mode,
+            "warm_start": self.warm_start,
+        }
+
+        members = []
+        stopped_early = False
+
+        if self.workers > 1 and not multiprocessing.current_process().daemon:
+            context = worker_context()
+            stop_event = context.Event()
+            pool = ProcessPoolExecutor(
+                max_workers=min(self.workers, len(seeds)),
+                mp_context=context,
+                initializer=init_portfolio_worker,
+                initargs=(stop_event,),
+            )
+            try:
+                futures = [
+                    pool.submit(run_portfolio_member, problem, options, seed)
+                    for seed in seeds
+                ]
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    member = future.result()
+                    if member is None:
+                        continue  # Abandoned after another run succeeded
+                    members.append(member)
+                    self.report_portfolio_progress(members)
+                    if self.stop_on_success and member[1].success:
+                        stopped_early = len(members) < len(seeds)
+                        stop_event.set()
+                        for pending in futures:
+                            pending.cancel()
+                        break
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            for seed in seeds:
+                members.append(run_portfolio_member(problem, options, seed))
+                self.report_portfolio_progress(members)
+                if self.stop_on_success and members[-1][1].success:
+                    stopped_early = len(members) < len(seeds)
+                    break
+
+        def score(member):
+            _, result, _, metrics = member
+            return (result.statistics["failed"], metrics["subject_repeats"], metrics["teacher_gaps"])
+
+        best_seed, best_result, best_entries, _ = min(members, key=score)
+
+        # Mirror the winning schedule so the generator state matches the result
+        self.reset()
+        self.prepare()
+        self.place_entries(best_entries, list(problem.slots))
+
+        best_result.statistics["seed"] = self.seed
+        best_result.statistics["portfolio"] = {
+            "size": len(seeds),
+            "completed": len(members),
+            "seed": best_seed,
+            "stopped_early": stopped_early,
+            "members": [
+                {
+                    "seed": seed,
+                    "failed": result.statistics["failed"],
+                    **metrics,
+                }
+                for seed, result, _, metrics in members
+            ],
+        }
+        best_result.statistics["timings_ms"]["portfolio"] = round(
+            (time.perf_counter() - started) * 1000, 1
+        )
+        return best_result
+
+    def option_values(self) -> dict:
+        """JSON-safe search options; passing them back to the constructor reproduces the run"""
+        return {
+            "max_iterations": self.max_iterations,
+            "repair_time_limit": self.repair_time_limit,
+            "optimize_time_limit": self.optimize_time_limit,
+            "ordering": self.ordering,
+            "mode": self.mode,
+            "workers": self.workers,
+            "portfolio_size": self.portfolio_size,
+            "stop_on_success": self.stop_on_success,
+            "fail_fast": self.fail_fast,
+            "warm_start": [
+                [section_id, day, period, entry.subject_id, entry.teacher_id, entry.room_id]
+                for (section_id, day, period), entry in self.warm_start
+            ],
+        }
+
+    def dump_trace(self, path: str, result: Optional[GenerationResult] = None):
+        """
+        Write the recorded decisions with the problem, seed and options to a
+        JSON file that replay_trace or a re-run with the same seed can reproduce
+        """
+        if self.trace is None:
+            raise ValueError("Generator was created without trace=True")
+
+        data = {
+            "seed": self.seed,
+            "options": self.option_values(),
+            "problem": self.problem.to_dict(),
+            "decisions": self.trace,
+        }
+        if result is not None:
+            data["statistics"] = result.statistics
+
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    def report_portfolio_progress(self, members: list):
+        """Report the best placement count among finished portfolio runs"""
+        if self.progress_callback:
+            best = max(member[1].statistics["filled"] for member in members)
+            self.progress_callback(best, members[0][1].statistics["total_requirements"])
+
+    def schedule_output(self) -> dict:
+        """Convert the schedule to the output format, keyed by external IDs"""
+        problem = self.problem
+        output = {}
+        for (section_id, day, period), entry in self.schedule.items():
+            section_key = problem.sections[entry.section_id].id
+            key = f"{section_key}_{day}_{period}"
+            output[key] = {
+                "section_id": section_key,
+                "subject_id": problem.subjects[entry.subject_id].id,
+                "teacher_id": (
+                    problem.teachers[entry.teacher_id].id
+                    if entry.teacher_id is not None else None
+                ),
+                "room_id": (
+                    problem.rooms[entry.room_id].id
+                    if entry.room_id is not None else None
+                ),
+                "day_of_week": day,
+                "period_number": period,
+            }
+        return output
+
+    def place_hints(self, hints, period_slots: list[ProblemSlot]) -> int:
+        """
+        Place suggested ((section_id, day, period), ScheduleEntry) pairs that
+        are still valid: the assignment exists with the same teacher, still
+        needs lessons, and the slot, teacher limits and room allow it.
+        Placed hints can be moved by repair like any other entry.
+        Returns how many were placed.
+        """
+        slots_by_number = {slot.period_number: slot for slot in period_slots}
+        placed = 0
+        for (section_id, day, period), entry in hints:
+            index = self.requirement_index.get((section_id, entry.subject_id))
+            slot = slots_by_number.get(period)
+            if index is None or slot is None:
+                continue
+            assignment = self.problem.assignments[index]
+            if (
+                assignment.teacher != entry.teacher_id
+                or self.get_section_subject_count(section_id, entry.subject_id) >= assignment.weekly_periods
+            ):
+                continue
+
+            bit = 1 << self.conflict_detector.slot_index(day, period)
+            if not self.slot_grid_mask & self.teacher_candidate_mask(entry.teacher_id) & bit:
+                continue
+
+            room_id = None
+            if index in self.assignment_rooms:
+                rooms = self.assignment_rooms[index]
+                if entry.room_id in rooms and self.conflict_detector.check_room_available(entry.room_id, day, period):
+                    room_id = entry.room_id
+                else:
+                    room_id = self.free_room(index, day, period)
+                    if room_id is None:
+                        continue
+
+            if self.try_assign(section_id, entry.subject_id, entry.teacher_id, day, slot, room_id):
+                placed += 1
+        return placed
+
+    def outstanding(self, requirements: list[dict]) -> list[dict]:
+        """Drop the requirements already covered by placed lessons"""
+        placed = defaultdict(int)
+        for entry in self.schedule.values():
+            placed[self.requirement_index.get((entry.section_id, entry.subject_id))] += 1
+
+        remaining = []
+        for req in requirements:
+            if placed[req["assignment"]] > 0:
+                placed[req["assignment"]] -= 1
+            else:
+                remaining.append(req)
+        return remaining
+
+    def regenerate(self, pinned: list, dirty_sections: set, hints: list = ()) -> GenerationResult:
+        """
+        Re-solve only the lessons of dirty_sections around a fixed schedule.
+        pinned holds the ((section_id, day, period), ScheduleEntry) pairs to
+        keep; they occupy their slots and are never evicted, and the result
+        is an error naming any that cannot be placed. hints are the
+        dirty sections' previous entries, kept where still valid so that
+        as little as possible moves. Runs in-process whatever workers and
+        portfolio_size are set to.
+        """
+        self.reset()
+        started = time.perf_counter()
+
+        problem = self.load_problem()
+        if problem is None or not problem.slots:
+            return GenerationResult(
+                success=False,
+                errors=["No period template found for the given configuration"]
+            )
+        period_slots = list(problem.slots)
+
+        requirements = [
+            req for req in self.prepare()
+            if problem.assignments[req["assignment"]].section in dirty_sections
+        ]
+        rejected = self.place_entries(pinned, period_slots)
+        if rejected:
+            return GenerationResult(
+                success=False,
+                errors=[
+                    f"Pinned lesson of section {problem.sections[section_id].name} on day {day}, "
+                    f"period {period} cannot be kept: its slot is not schedulable or it clashes"
+                    for (section_id, day, period), _ in rejected
+                ],
+            )
+        self.pinned = {key for key, _ in pinned}
+        kept = self.place_hints(hints, period_slots)
+        requirements = self.outstanding(requirements)
+        loaded = time.perf_counter()
+
+        unplaced, repair_stats, phase_timings = self.solve(requirements, period_slots)
+        finished = time.perf_counter()
+
+        failed = [self.failure_record(req) for req in unplaced]
+
+        total = len(requirements) + kept
+        return GenerationResult(
+            success=len(failed) == 0,
+            schedule=self.schedule_output(),
+            conflicts=failed,
+            statistics={
+                "total_requirements": total,
+                "filled": total - len(failed),
+                "failed": len(failed),
+                "sections": len(dirty_sections),
+                "pinned": len(pinned),
+                "kept": kept,
+                "working_days": len(self.working_days),
+                "periods_per_day": len(period_slots),
+                "seed": self.seed,
+                "repair": repair_stats,
+                "quality": self.quality_metrics(),
+                "timings_ms": {
+                    "load": round((loaded - started) * 1000, 1),
+                    **phase_timings,
+                    "total": round((finished - started) * 1000, 1),
+                },
+            },
+        )
+
+    def generate_once(self) -> GenerationResult:
+        """Run a single generation"""
+        self.reset()
+        started = time.perf_counter()
+
+        problem = self.load_problem()
+        if problem is None or not problem.slots:
+            return GenerationResult(
+                success=False,
+                errors=["No period template found for the given configuration"]
+            )
+        period_slots = list(problem.slots)
+
+        if not problem.sections:
+            return GenerationResult(
+                success=False,
+                errors=["No sections found for the given configuration"]
+            )
+
+        requirements = self.prepare()
+
+        # Keep what still fits from the warm-start timetable and search for the rest
+        kept = self.place_hints(self.warm_start, period_slots) if self.warm_start else 0
+        pending = self.outstanding(requirements) if kept else requirements
+        loaded = time.perf_counter()
+
+        # Components are solved from empty grids, so kept placements stay in-process
+        components = problem.components() if self.workers > 1 and not kept else [problem]
+        if len(components) > 1 and not multiprocessing.current_process().daemon:
+            unplaced, repair_stats, phase_timings = self.solve_parallel(
+                components, period_slots, len(requirements)
+            )
+        else:
+            unplaced, repair_stats, phase_timings = self.solve(pending, period_slots)
+
+        optimize_stats = None
+        if self.optimize_time_limit > 0:
+            solved = time.perf_counter()
+            optimize_stats = self.optimize(deadline=solved + self.optimize_time_limit)
+            phase_timings["optimize"] = round((time.perf_counter() - solved) * 1000, 1)
+
+        finished = time.perf_counter()
+
+        failed = [self.failure_record(req) for req in unplaced]
+        if self.progress_callback:
+            self.progress_callback(len(requirements) - len(failed), len(requirements))
+
+        success = len(failed) == 0
+
+        statistics = {
+            "total_requirements": len(requirements),
+            "filled": len(requirements) - len(failed),
+            "failed": len(failed),
+            "sections": len(problem.sections),
+            "working_days": len(self.working_days),
+            "periods_per_day": len(period_slots),
+            "components": len(components),
+            "seed": self.seed,
+            "repair": repair_stats,
+            "quality": self.quality_metrics(),
+            "timings_ms": {
+                "load": round((loaded - started) * 1000, 1),
+                **phase_timings,
+                "total": round((finished - started) * 1000, 1),
+            },
+        }
+        if self.warm_start:
+            statistics["warm_start"] = {"hints": len(self.warm_start), "kept": kept}
+        if optimize_stats is not None:
+            statistics["optimize"] = optimize_stats
+
+        return GenerationResult(
+            success=success,
+            schedule=self.schedule_output(),
+            conflicts=failed,
+            statistics=statistics,
+        )
+
+
+def worker_context():
+    """
+    Multiprocessing context for generation pools. Where available, workers
+    fork from a server process that has imported only this package, so they
+    start fast and inherit no Django state or database connections.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+# Set in portfolio worker processes; signals that another run already succeeded
+_portfolio_stop_event = None
+
+
+def init_portfolio_worker(stop_event):
+    global _portfolio_stop_event
+    _portfolio_stop_event = stop_event
+
+
+def portfolio_cancelled() -> bool:
+    return _portfolio_stop_event is not None and _portfolio_stop_event.is_set()
+
+
+def run_portfolio_member(problem: Problem, options: dict, seed: int) -> tuple:
+    """
+    Run one seeded portfolio generation.
+    Returns (seed, result, placed entries, quality metrics), or None if the
+    run was cancelled before it finished.
+    """
+    generator = TimetableGenerator(
+        problem=problem,
+        seed=seed,
+        cancel_check=portfolio_cancelled,
+        **options,
+    )
+    result = generator.generate()
+    if portfolio_cancelled():
+        return None
+    return seed, result, list(generator.schedule.items()), generator.quality_metrics()
+
+
+def solve_component(problem: Problem, options: dict, seed: int) -> tuple:
+    """
+    Worker entry point for parallel generation.
+    Returns the placed entries, the unplaced requirements as
+    ((section, subject), reason) pairs, repair stats and phase timings.
+    """
+    generator = TimetableGenerator(problem=problem, seed=seed, **options)
+    generator.load_problem()
+    requirements = generator.prepare()
+    unplaced, repair_stats, phase_timings = generator.solve(requirements, list(problem.slots))
+
+    unplaced_keys = []
+    for req in unplaced:
+        assignment = problem.assignments[req["assignment"]]
+        unplaced_keys.append(((assignment.section, assignment.subject), req["reason"]))
+
+    return list(generator.schedule.items()), unplaced_keys, repair_stats, phase_timings
+
+
+def hopcroft_karp(adjacency: list[list]) -> list:
+    """
+    Maximum bipartite matching. adjacency[u] lists the right-hand vertices
+    left vertex u may match, in order of preference. Returns the matched
+    right vertex (or None) for each left vertex.
+    """
+    match_left = [None] * len(adjacency)
+    match_right = {}
+    unmatched = float("inf")
+
+    while True:
+        # BFS: layer the graph from free left vertices along alternating paths
+        distance = {}
+        queue = deque()
+        for u, partner in enumerate(match_left):
+            if partner is None:
+                distance[u] = 0
+                queue.append(u)
+        shortest = unmatched
+        while queue:
+            u = queue.popleft()
+            if distance[u] >= shortest:
+                continue
+            for v in adjacency[u]:
+                w = match_right.get(v)
+                if w is None:
+                    shortest = min(shortest, distance[u] + 1)
+                elif w not in distance:
+                    distance[w] = distance[u] + 1
+                    queue.append(w)
+        if shortest == unmatched:
+            return match_left
+
+        # DFS: augment along vertex-disjoint shortest paths
+        def augment(u):
+            for v in adjacency[u]:
+                w = match_right.get(v)
+                if (w is None and distance[u] + 1 == shortest) or (
+                    w is not None and distance.get(w) == distance[u] + 1 and augment(w)
+                ):
+                    match_left[u] = v
+                    match_right[v] = u
+                    return True
+            distance[u] = unmatched
+            return False
+
+        for u, partner in enumerate(match_left):
+            if partner is None:
+                augment(u)
+
+
+def load_trace(path: str) -> dict:
+    """Read a trace file written by TimetableGenerator.dump_trace"""
+    with open(path) as f:
+        data = json.load(f)
+    data["problem"] = Problem.from_dict(data["problem"])
+    data["options"]["warm_start"] = [
+        ((section_id, day, period), ScheduleEntry(section_id, subject_id, teacher_id, room_id))
+        for section_id, day, period, subject_id, teacher_id, room_id in data["options"].get("warm_start", [])
+    ]
+    return data
+
+
+def replay_trace(trace: dict) -> TimetableGenerator:
+    """
+    Re-apply the recorded decisions of a loaded trace without searching.
+    Returns the generator holding the replayed schedule; raises ValueError
+    if a recorded placement is no longer conflict-free.
+    """
+    generator = TimetableGenerator(problem=trace["problem"], seed=trace["seed"])
+    generator.load_problem()
+    generator.prepare()
+    slots_by_number = {slot.period_number: slot for slot in trace["problem"].slots}
+
+    for step, decision in enumerate(trace["decisions"]):
+        op = decision[0]
+        if op == "R":
+            generator.reset()
+        elif op == "A":
+            _, section_id, subject_id, teacher_id, day, period, room_id = decision
+            if not generator.try_assign(
+                section_id, subject_id, teacher_id, day, slots_by_number[period], room_id
+            ):
+                raise ValueError(f"Decision {step} {decision} conflicts with the replayed schedule")
+        elif op == "U":
+            _, section_id, day, period = decision
+            if generator.unassign(section_id, day, period) is None:
+                raise ValueError(f"Decision {step} {decision} removes an empty slot")
+        else:
+            raise ValueError(f"Unknown trace decision {decision!r}")
+
+    return generator
+
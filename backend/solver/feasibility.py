@@ -0,0 +1,154 @@
+"""
+Pre-solve feasibility analysis.
+
+Checks counting bounds that no timetable can break: every section's lessons
+must fit its slots, every teacher's lessons must fit their availability and
+period limits, and every room-bound subject needs enough fitting rooms. A
+problem that fails any of them cannot be fully scheduled, so the search can
+be skipped. Runs in time linear in the problem size.
+"""
+
+from collections import defaultdict
+
+from .problem import Problem
+
+
+def analyze_feasibility(problem: Problem) -> dict:
+    """
+    Return a report of the problem's capacity bounds:
+    {"feasible": bool, "errors": [...], "warnings": [...], "summary": {...}}.
+    Each error and warning has a type, a message and the numbers behind it.
+    """
+    from .engine import TimetableGenerator
+
+    # Reuse the engine's slot grid, availability masks and room index
+    generator = TimetableGenerator(problem=problem, seed=0)
+    generator.load_problem()
+    generator.prepare()
+
+    errors = []
+    warnings = []
+    days = len(problem.working_days)
+    periods = len(problem.slots)
+    grid_slots = generator.slot_grid_mask.bit_count()
+
+    section_demand = defaultdict(int)
+    teacher_demand = defaultdict(int)
+    room_type_demand = defaultdict(int)
+    for index, assignment in enumerate(problem.assignments):
+        section_demand[assignment.section] += assignment.weekly_periods
+        subject = problem.subjects[assignment.subject]
+        section = problem.sections[assignment.section]
+
+        if assignment.teacher is None:
+            warnings.append({
+                "type": "unstaffed",
+                "message": f"{section} - {subject.name} has no teacher assigned",
+                "section": section.id,
+                "subject": subject.id,
+            })
+        else:
+            teacher_demand[assignment.teacher] += assignment.weekly_periods
+
+        if index in generator.assignment_rooms:
+            if not generator.assignment_rooms[index]:
+                errors.append({
+                    "type": "no_fitting_room",
+                    "message": (
+                        f"{section} - {subject.name} needs a {subject.room_type} room "
+                        f"for {section.capacity} students and none fits"
+                    ),
+                    "section": section.id,
+                    "subject": subject.id,
+                })
+            room_type_demand[subject.room_type] += assignment.weekly_periods
+
+        if assignment.weekly_periods > days:
+            warnings.append({
+                "type": "subject_repeats",
+                "message": (
+                    f"{section} - {subject.name} has {assignment.weekly_periods} periods "
+                    f"over {days} days, so some days repeat it"
+                ),
+                "section": section.id,
+                "subject": subject.id,
+                "demand": assignment.weekly_periods,
+                "capacity": days,
+            })
+
+    for section_id, demand in section_demand.items():
+        if demand > grid_slots:
+            section = problem.sections[section_id]
+            errors.append({
+                "type": "section_capacity",
+                "message": f"{section} needs {demand} periods but has only {grid_slots} slots",
+                "section": section.id,
+                "demand": demand,
+                "capacity": grid_slots,
+            })
+
+    for teacher_id, demand in teacher_demand.items():
+        teacher = problem.teachers[teacher_id]
+        allowed = generator.teacher_allowed_mask.get(teacher_id, generator.slot_grid_mask)
+        available = allowed.bit_count()
+        if not available:
+            errors.append({
+                "type": "teacher_unavailable",
+                "message": f"{teacher.name} has {demand} periods but no available slots",
+                "teacher": teacher.id,
+                "demand": demand,
+                "capacity": 0,
+            })
+            continue
+
+        # Pigeonhole per day: at most max_periods_per_day of that day's open slots
+        daily = sum(
+            min(teacher.max_periods_per_day, (allowed & day_mask).bit_count())
+            for day_mask in generator.day_masks.values()
+        )
+        capacity = min(teacher.max_periods_per_week, daily)
+        if demand > capacity:
+            if capacity == teacher.max_periods_per_week:
+                limit = f"max {teacher.max_periods_per_week} periods per week"
+            elif daily == available:
+                limit = f"{available} available slots"
+            else:
+                limit = f"max {teacher.max_periods_per_day} periods per day"
+            errors.append({
+                "type": "teacher_capacity",
+                "message": f"{teacher.name} has {demand} periods but can teach at most {capacity} ({limit})",
+                "teacher": teacher.id,
+                "demand": demand,
+                "capacity": capacity,
+            })
+
+    rooms_by_type = defaultdict(int)
+    for room in problem.rooms:
+        rooms_by_type[room.room_type] += 1
+    for room_type, demand in room_type_demand.items():
+        capacity = rooms_by_type[room_type] * grid_slots
+        if demand > capacity:
+            errors.append({
+                "type": "room_capacity",
+                "message": (
+                    f"Subjects needing a {room_type} room have {demand} periods but "
+                    f"{rooms_by_type[room_type]} {room_type} room(s) offer {capacity}"
+                ),
+                "room_type": room_type,
+                "demand": demand,
+                "capacity": capacity,
+            })
+
+    return {
+        "feasible": not errors,
+        "errors": errors,
+        "warnings": warnings,
+        "summary": {
+            "sections": len(problem.sections),
+            "teachers": len(problem.teachers),
+            "lessons": sum(section_demand.values()),
+            "working_days": days,
+            "periods_per_day": periods,
+            "slots_per_section": grid_slots,
+        },
+    }
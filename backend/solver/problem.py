@@ -0,0 +1,153 @@
+"""
+Generation problem definition.
+
+A Problem is an immutable, ORM-free snapshot of everything the engine
+needs for one branch/session/shift. Sections, subjects and teachers are
+referred to by their index in the problem, so the engine works on plain
+integers and the problem can be written to JSON and replayed offline.
+apps.timetable.problem builds one from the database.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field, replace
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ProblemSlot:
+    period_number: int
+    period_slot_id: str
+    start_minute: int = 0  # Minutes since midnight
+    end_minute: int = 0
+
+
+@dataclass(frozen=True)
+class ProblemSection:
+    id: str
+    name: str  # "<grade> - <section>"
+    capacity: int = 40
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True)
+class ProblemSubject:
+    id: str
+    name: str
+    room_type: str = ""  # Room type lessons need; blank if taught in the section's own room
+
+
+@dataclass(frozen=True)
+class ProblemRoom:
+    id: str
+    name: str
+    room_type: str = "classroom"
+    capacity: int = 40
+
+
+@dataclass(frozen=True)
+class ProblemTeacher:
+    id: str
+    name: str
+    max_periods_per_day: int = 8
+    max_periods_per_week: int = 40
+
+
+@dataclass(frozen=True)
+class ProblemAvailability:
+    teacher: int  # Index into Problem.teachers
+    day: int
+    start_minute: int
+    end_minute: int
+    is_available: bool = True
+
+
+@dataclass(frozen=True)
+class ProblemAssignment:
+    section: int  # Index into Problem.sections
+    subject: int  # Index into Problem.subjects
+    teacher: Optional[int]  # Index into Problem.teachers, None if unstaffed
+    weekly_periods: int
+
+
+@dataclass(frozen=True)
+class Problem:
+    working_days: tuple[int, ...]
+    slots: tuple[ProblemSlot, ...]
+    sections: tuple[ProblemSection, ...]
+    subjects: tuple[ProblemSubject, ...]
+    teachers: tuple[ProblemTeacher, ...]
+    assignments: tuple[ProblemAssignment, ...]
+    availability: tuple[ProblemAvailability, ...] = ()
+    rooms: tuple[ProblemRoom, ...] = ()
+    meta: dict = field(default_factory=dict, compare=False, hash=False)
+
+    def components(self) -> list["Problem"]:
+        """
+        Split into independent sub-problems, one per connected component of
+        the section-teacher graph. Unstaffed assignments link only to their
+        section. Assignments needing the same room type share its rooms and
+        are kept together. Each keeps the full tables so indices stay valid,
+        and only its own assignments.
+        """
+        first_room_type = len(self.sections) + len(self.teachers)
+        room_types = {room.room_type for room in self.rooms}
+        room_type_nodes = {
+            room_type: first_room_type + i for i, room_type in enumerate(sorted(room_types))
+        }
+        parent = list(range(first_room_type + len(room_type_nodes)))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for assignment in self.assignments:
+            if assignment.teacher is not None:
+                parent[find(assignment.section)] = find(len(self.sections) + assignment.teacher)
+
+            room_type = self.subjects[assignment.subject].room_type
+            if room_type in room_type_nodes:
+                parent[find(assignment.section)] = find(room_type_nodes[room_type])
+
+        groups = {}  # {root: [assignment, ...]}, in first-seen order
+        for assignment in self.assignments:
+            groups.setdefault(find(assignment.section), []).append(assignment)
+
+        return [replace(self, assignments=tuple(group)) for group in groups.values()]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Problem":
+        return cls(
+            working_days=tuple(data["working_days"]),
+            slots=tuple(ProblemSlot(**s) for s in data["slots"]),
+            sections=tuple(ProblemSection(**s) for s in data["sections"]),
+            subjects=tuple(ProblemSubject(**s) for s in data["subjects"]),
+            teachers=tuple(ProblemTeacher(**t) for t in data["teachers"]),
+            assignments=tuple(ProblemAssignment(**a) for a in data["assignments"]),
+            availability=tuple(ProblemAvailability(**a) for a in data.get("availability", [])),
+            rooms=tuple(ProblemRoom(**r) for r in data.get("rooms", [])),
+            meta=data.get("meta", {}),
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, text: str) -> "Problem":
+        return cls.from_dict(json.loads(text))
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+    @classmethod
+    def load(cls, path: str) -> "Problem":
+        with open(path) as f:
+            return cls.from_json(f.read())
+
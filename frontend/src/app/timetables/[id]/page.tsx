@@ -52,8 +52,8 @@ interface TimetableEntry {
   subject: string;
   subject_name: string;
   subject_color: string;
-  teacher: string;
-  teacher_name: string;
+  teacher: string | null;
+  teacher_name: string | null;
 }
 
 interface EditingEntry {
@@ -66,8 +66,8 @@ interface EditingEntry {
   period_slot: string;
   subject: string;
   subject_name: string;
-  teacher: string;
-  teacher_name: string;
+  teacher: string | null;
+  teacher_name: string | null;
 }
 
 interface TeacherScheduleEntry {
@@ -467,7 +467,7 @@ export default function TimetableViewPage() {
                               {entry.subject_name}
                             </div>
                             <div style={{ fontSize: 11, color: '#666' }}>
-                              {entry.teacher_name}
+                              {entry.teacher_name || 'Unassigned'}
                             </div>
                           </div>
                         ) : (
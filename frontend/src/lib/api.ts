@@ -353,6 +353,8 @@ export const timetableEntriesApi = {
   create: (timetableId: string, data: any) => api.post(`/timetables/${timetableId}/entries/`, data),
   update: (entryId: string, data: any) => api.patch(`/timetable-entries/${entryId}/`, data),
   delete: (entryId: string) => api.delete(`/timetable-entries/${entryId}/`),
+  batch: (timetableId: string, operations: any[]) =>
+    api.post(`/timetables/${timetableId}/entries/batch/`, { operations }),
 };
 
 export default api;